@@ -0,0 +1,72 @@
+"""
+Benchmark do banco de médias móveis: um `rolling`/`ewm` do pandas por janela x
+`uber_stocks.medias_moveis.banco_medias_moveis`.
+
+Gera uma série de preços sintética, calcula as médias de todas as janelas pelos dois
+caminhos, confere que os resultados coincidem e exibe o tempo de cada tipo de média.
+
+Uso:
+    python benchmarks/benchmark_medias_moveis.py --linhas 1000000 --janelas 100
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import medias_moveis
+
+
+def referencia_ponderada(serie, janela):
+    # Convolução com pesos 1..janela (o mais recente pesa mais), uma janela por vez
+    pesos = np.arange(janela, 0, -1) / (janela * (janela + 1) / 2)
+    media = np.convolve(serie.to_numpy(), pesos, mode="full")[:len(serie)]
+    media[:janela - 1] = np.nan
+    return media
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark do banco de médias móveis.")
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Tamanho da série sintética.")
+    parser.add_argument("--janelas", type=int, default=100, help="Quantidade de janelas (5, 7, 9, ...).")
+    args = parser.parse_args(argumentos)
+
+    rng = np.random.default_rng(42)
+    serie = pd.Series(40 * np.exp(np.cumsum(rng.normal(0, 0.01, args.linhas))))
+    janelas = list(range(5, 5 + 2 * args.janelas, 2))
+    print(f"Série sintética com {args.linhas:,} linhas e {len(janelas)} janelas ({janelas[0]} a {janelas[-1]})")
+
+    referencias = {
+        "simples": lambda: np.column_stack([serie.rolling(janela).mean() for janela in janelas]),
+        "exponencial": lambda: np.column_stack([serie.ewm(span=janela, adjust=False).mean() for janela in janelas]),
+        "ponderada": lambda: np.column_stack([referencia_ponderada(serie, janela) for janela in janelas]),
+    }
+
+    linhas_tabela = []
+    for tipo, referencia in referencias.items():
+        esperado, t_ref = cronometrar(referencia)
+        obtido, t_banco = cronometrar(lambda: medias_moveis.banco_medias_moveis(serie, janelas, tipo))
+        iguais = np.allclose(esperado, obtido, equal_nan=True, rtol=1e-9, atol=1e-6)
+        linhas_tabela.append({
+            'Média': tipo,
+            'Uma chamada por janela (s)': round(t_ref, 3),
+            'Banco (s)': round(t_banco, 3),
+            'Ganho (x)': round(t_ref / t_banco, 1) if t_banco > 0 else float('inf'),
+            'Coincide': '✅' if iguais else '⚠️ não',
+        })
+
+    print(pd.DataFrame(linhas_tabela).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
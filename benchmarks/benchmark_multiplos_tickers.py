@@ -0,0 +1,75 @@
+"""
+Benchmark da análise de vários tickers: um processo x `uber_stocks.multiplos_tickers.analisar_tickers`
+com um processo por núcleo.
+
+Gera um universo sintético de tickers, executa as análises pelos dois caminhos, confere
+que as tabelas coincidem e exibe o tempo de cada um.
+
+Uso:
+    python benchmarks/benchmark_multiplos_tickers.py --tickers 500 --linhas 2000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import multiplos_tickers
+
+
+def gerar_universo(tickers, linhas, semente=42):
+    # Passeio aleatório por ticker, com máxima e mínima em torno da abertura e do fechamento
+    rng = np.random.default_rng(semente)
+    datas = pd.bdate_range("2019-05-10", periods=linhas)
+    universo = {}
+    for i in range(tickers):
+        fechamento = 40 * np.exp(np.cumsum(rng.normal(0, 0.02, linhas)))
+        abertura = fechamento * np.exp(rng.normal(0, 0.01, linhas))
+        amplitude = np.abs(rng.normal(0, 0.02, linhas)) * fechamento
+        universo[f"T{i:04d}"] = pd.DataFrame({
+            "Date": datas,
+            "Open": abertura,
+            "High": np.maximum(abertura, fechamento) + amplitude,
+            "Low": np.minimum(abertura, fechamento) - amplitude,
+            "Close": fechamento,
+            "Adj Close": fechamento,
+            "Volume": rng.integers(1_000_000, 50_000_000, linhas),
+        })
+    return universo
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark da análise de vários tickers.")
+    parser.add_argument("--tickers", type=int, default=500, help="Quantidade de tickers sintéticos.")
+    parser.add_argument("--linhas", type=int, default=2_000, help="Pregões por ticker.")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(), help="Processos do caminho paralelo.")
+    args = parser.parse_args(argumentos)
+
+    universo = gerar_universo(args.tickers, args.linhas)
+    print(f"Universo sintético com {args.tickers} tickers de {args.linhas:,} pregões")
+
+    sequencial, t_seq = cronometrar(lambda: multiplos_tickers.analisar_tickers(universo, processos=1))
+    paralelo, t_par = cronometrar(lambda: multiplos_tickers.analisar_tickers(universo, processos=args.processos))
+    iguais = sequencial.equals(paralelo)
+
+    print(pd.DataFrame([{
+        'Um processo (s)': round(t_seq, 3),
+        f'{args.processos} processos (s)': round(t_par, 3),
+        'Ganho (x)': round(t_seq / t_par, 1) if t_par > 0 else float('inf'),
+        'Coincide': '✅' if iguais else '⚠️ não',
+    }]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
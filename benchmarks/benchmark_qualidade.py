@@ -0,0 +1,185 @@
+"""
+Benchmark das verificações de qualidade: laços do notebook x módulo vetorizado.
+
+Gera um DataFrame OHLCV sintético (10 milhões de linhas por padrão), executa as funções
+do notebook `data_cleaning.ipynb` e `uber_stocks.qualidade.verificar_qualidade`, confere
+que os resultados coincidem e exibe o tempo de cada etapa e o ganho de velocidade.
+
+Uso:
+    python benchmarks/benchmark_qualidade.py --linhas 10000000
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import qualidade
+
+
+def gerar_ohlcv_sintetico(linhas, fracao_ausentes=0.001, semente=42):
+    """
+    Gera um DataFrame OHLCV sintético com preços em centavos e volumes inteiros.
+
+    Parâmetros:
+    - linhas (int): Quantidade de linhas.
+    - fracao_ausentes (float): Fração de valores apagados em cada coluna de preço,
+      imitando as falhas de um arquivo bruto.
+    - semente (int): Semente do gerador aleatório.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com Date, Adj Close, Close, High, Low, Open e Volume.
+    """
+    rng = np.random.default_rng(semente)
+    fechamento = np.round(40 * np.exp(np.cumsum(rng.normal(0, 0.0005, linhas))), 2)
+    abertura = np.round(fechamento * (1 + rng.normal(0, 0.002, linhas)), 2)
+    maximo = np.round(np.maximum(abertura, fechamento) * (1 + np.abs(rng.normal(0, 0.002, linhas))), 2)
+    minimo = np.round(np.minimum(abertura, fechamento) * (1 - np.abs(rng.normal(0, 0.002, linhas))), 2)
+    df = pd.DataFrame({
+        'Date': pd.date_range('2019-05-10', periods=linhas, freq='min'),
+        'Adj Close': fechamento,
+        'Close': fechamento.copy(),
+        'High': maximo,
+        'Low': minimo,
+        'Open': abertura,
+        'Volume': rng.integers(1_000, 500_000, linhas),
+    })
+    for coluna in ['Adj Close', 'Close', 'High', 'Low', 'Open']:
+        df.loc[rng.random(linhas) < fracao_ausentes, coluna] = np.nan
+    return df
+
+
+# Funções de referência, copiadas do notebook `data_cleaning.ipynb`
+
+def referencia_valores_ausentes(df):
+    valores_ausentes = df.isnull().sum()
+    percentual_ausentes = (valores_ausentes / df.shape[0]) * 100
+    tabela_ausentes = pd.DataFrame({
+        'Quantidade de Valores Ausentes': valores_ausentes,
+        'Percentual de Valores Ausentes (%)': percentual_ausentes
+    })
+    tabela_ausentes = tabela_ausentes[tabela_ausentes['Quantidade de Valores Ausentes'] > 0]
+    return tabela_ausentes.sort_values(by='Percentual de Valores Ausentes (%)', ascending=False)
+
+
+def referencia_valores_duplicados(df, colunas=None):
+    resultado = {}
+    if colunas is None:
+        colunas = df.columns
+    for coluna in colunas:
+        duplicados = df[df[coluna].duplicated(keep='first')]
+        qtd_duplicados = len(duplicados)
+        if qtd_duplicados > 0:
+            valores_duplicados = df[coluna].value_counts()[df[coluna].value_counts() > 1]
+            resultado[coluna] = {
+                'possui_duplicados': True,
+                'quantidade_duplicados': qtd_duplicados,
+                'valores_e_contagem': valores_duplicados.to_dict()
+            }
+        else:
+            resultado[coluna] = {
+                'possui_duplicados': False,
+                'quantidade_duplicados': 0,
+                'valores_e_contagem': {}
+            }
+    return resultado
+
+
+def referencia_colunas_numericas(df, colunas):
+    resultado = {}
+    inconsistencias = []
+    for coluna in colunas:
+        if coluna in df.columns:
+            col_numerica = pd.to_numeric(df[coluna], errors='coerce')
+            resultado[coluna] = col_numerica.notnull().all()
+            if not resultado[coluna]:
+                posicoes_inconsistentes = col_numerica[col_numerica.isnull()].index.tolist()
+                for posicao in posicoes_inconsistentes:
+                    inconsistencias.append({'Coluna': coluna, 'Posição': posicao, 'Valor': df.at[posicao, coluna]})
+        else:
+            resultado[coluna] = False
+    return resultado, pd.DataFrame(inconsistencias)
+
+
+def referencia_max_min(df):
+    colunas_numericas = df.select_dtypes(include=['int64', 'float64']).columns
+    colunas, valores_min, valores_max = [], [], []
+    for coluna in colunas_numericas:
+        colunas.append(coluna)
+        valores_min.append(df[coluna].min())
+        valores_max.append(df[coluna].max())
+    return pd.DataFrame({'Coluna': colunas, 'Valor Mínimo': valores_min, 'Valor Máximo': valores_max})
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark das verificações de qualidade.")
+    parser.add_argument("--linhas", type=int, default=10_000_000, help="Linhas do DataFrame sintético.")
+    parser.add_argument("--fracao-ausentes", type=float, default=0.001, help="Fração de preços ausentes.")
+    args = parser.parse_args(argumentos)
+
+    print(f"Gerando DataFrame sintético com {args.linhas:,} linhas...")
+    df = gerar_ohlcv_sintetico(args.linhas, args.fracao_ausentes)
+    colunas = list(df.columns)
+
+    etapas = [
+        ("Valores ausentes", lambda: referencia_valores_ausentes(df),
+         lambda: qualidade.verificar_ausentes(df)),
+        ("Valores duplicados", lambda: referencia_valores_duplicados(df),
+         lambda: qualidade.verificar_duplicados(df)),
+        ("Colunas numéricas", lambda: referencia_colunas_numericas(df, colunas),
+         lambda: qualidade.verificar_numericos(df, colunas)),
+        ("Valores máx/mín", lambda: referencia_max_min(df),
+         lambda: qualidade.valores_max_min(df)),
+    ]
+
+    linhas_tabela = []
+    total_referencia = total_vetorizado = 0.0
+    for nome, referencia, vetorizada in etapas:
+        esperado, t_ref = cronometrar(referencia)
+        obtido, t_vet = cronometrar(vetorizada)
+        total_referencia += t_ref
+        total_vetorizado += t_vet
+        linhas_tabela.append({
+            'Etapa': nome,
+            'Notebook (s)': round(t_ref, 3),
+            'Vetorizado (s)': round(t_vet, 3),
+            'Ganho (x)': round(t_ref / t_vet, 1) if t_vet > 0 else float('inf'),
+        })
+        if nome == "Valores duplicados":
+            iguais = all(
+                esperado[c]['quantidade_duplicados'] == obtido[c]['quantidade_duplicados']
+                and esperado[c]['valores_e_contagem'] == obtido[c]['valores_e_contagem']
+                for c in colunas
+            )
+            print(f"Duplicados coincidem com o notebook: {'✅' if iguais else '⚠️ não'}")
+        if nome == "Colunas numéricas":
+            iguais = esperado[0] == obtido[0] and esperado[1].equals(obtido[1])
+            print(f"Inconsistências coincidem com o notebook: {'✅' if iguais else '⚠️ não'}")
+
+    # Relatório completo numa única chamada
+    _, t_completo = cronometrar(qualidade.verificar_qualidade, df, colunas)
+    linhas_tabela.append({
+        'Etapa': 'Total',
+        'Notebook (s)': round(total_referencia, 3),
+        'Vetorizado (s)': round(t_completo, 3),
+        'Ganho (x)': round(total_referencia / t_completo, 1),
+    })
+
+    print(pd.DataFrame(linhas_tabela).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
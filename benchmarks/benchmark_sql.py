@@ -0,0 +1,317 @@
+"""
+Benchmark das consultas de `sql/` com tabelas sintéticas de tamanhos crescentes, com e sem índices de data.
+
+Para cada tamanho (10 mil, 1 milhão e 50 milhões de linhas por padrão), gera uma tabela
+`uber_stocks` OHLCV sintética com `uber_stocks.banco`, aplica `snake_case.sql` e
+`colunas_data.sql` e executa todas as consultas de `sql/table_creation_scripts`,
+`sql/simple_queries` e `sql/advanced_queries`, além das tabelas auxiliares refeitas sobre as
+colunas geradas (`media_mensal_ano_mes.sql` e `volume_medio_ano.sql`), primeiro sem índices
+e depois com o `idx_data` de `indice_date.sql` e os índices de ano e mês de `indice_ano.sql`.
+De cada execução registra o tempo de parede (lendo todas as linhas do resultado), a
+quantidade de linhas e o `EXPLAIN QUERY PLAN`. As tabelas exportadas pelos módulos Python
+(`anomalias_volume` e `ranking_dias`, lidas por `volume_diario.sql` e `ranking_dias.sql`) são
+montadas em cada banco sintético antes das medições, como na carga de `uber_stocks.banco`.
+
+As versões substituídas de algumas consultas são medidas ao lado das atuais
+(`CONSULTAS_REFERENCIA`): o filtro de ano por `strftime`, a subconsulta correlacionada da
+versão antiga de `fechamento.sql` e a junção por `strftime` da versão antiga de
+`volume_diario.sql`. A subconsulta correlacionada roda uma vez por ano: sem índice, cada
+execução percorre a tabela inteira (custo de anos × linhas; como as datas sintéticas cobrem
+sempre os mesmos anos, linear nas linhas, mas com um fator alto); com o `idx_data`, vira uma
+busca por ano.
+
+O relatório JSON traz também, para cada consulta, o expoente de crescimento do tempo entre
+tamanhos consecutivos (log da razão dos tempos / log da razão dos tamanhos): perto de 1 a
+consulta escala linearmente, perto de 2 o custo cresce com o quadrado do tamanho. As chaves
+são ordenadas e os tempos arredondados, para que relatórios de versões diferentes possam
+ser comparados com `diff`.
+
+Uso:
+    python benchmarks/benchmark_sql.py --saida benchmark_sql.json
+    python benchmarks/benchmark_sql.py --linhas 10000 1000000 --repeticoes 5 --limite 600
+"""
+import argparse
+import json
+import math
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import banco, consultas
+
+VERSAO_RELATORIO = 1
+TAMANHOS_PADRAO = (10_000, 1_000_000, 50_000_000)
+DIRETORIOS_CONSULTAS = ("table_creation_scripts", "simple_queries", "advanced_queries")
+LINHAS_POR_LOTE = 500_000
+# As datas sintéticas cobrem sempre o mesmo período; com muitas linhas, vários registros por dia
+INICIO_PERIODO = pd.Timestamp("2000-01-01")
+FIM_PERIODO = pd.Timestamp("2025-01-01")
+
+# Scripts aplicados antes das medições e scripts de índices da segunda rodada
+MIGRACOES_BASE = ("optimization_examples/snake_case.sql", "optimization_examples/colunas_data.sql")
+SCRIPTS_INDICES = ("optimization_examples/indice_date.sql", "optimization_examples/indice_ano.sql")
+# Migrações que refazem tabelas auxiliares, medidas ao lado das versões de `table_creation_scripts`
+SCRIPTS_RECRIADOS = ("optimization_examples/media_mensal_ano_mes.sql", "optimization_examples/volume_medio_ano.sql")
+
+# Consultas substituídas no projeto, mantidas para comparar com as versões atuais
+CONSULTAS_REFERENCIA = {
+    "referencia/ano_strftime.sql": """
+        SELECT COUNT(*), AVG(close) FROM uber_stocks WHERE strftime('%Y', date) = '2010'
+    """,
+    "referencia/ano_faixa.sql": """
+        SELECT COUNT(*), AVG(close) FROM uber_stocks WHERE date >= '2010-01-01' AND date < '2011-01-01'
+    """,
+    # Versão antiga de fechamento.sql (MAX dentro da subconsulta é inválido no SQLite), com o último
+    # pregão de cada ano calculado antes e o fechamento buscado por subconsulta correlacionada
+    "referencia/fechamento_correlacionada.sql": """
+        SELECT
+            anos.ano,
+            anos.ultima_data,
+            (SELECT close FROM uber_stocks u2 WHERE u2.date = anos.ultima_data) AS fechamento
+        FROM (SELECT strftime('%Y', date) AS ano, MAX(date) AS ultima_data FROM uber_stocks GROUP BY ano) anos
+    """,
+    "referencia/volume_diario_strftime.sql": """
+        SELECT u.date, u.volume, v.volume_medio, ROUND((u.volume * 1.0 / v.volume_medio), 2) AS proporcao_volume
+        FROM uber_stocks u
+        JOIN volume_medio_anual v ON strftime('%Y', u.date) = v.ano
+        WHERE u.volume > 1.5 * v.volume_medio
+        ORDER BY proporcao_volume DESC
+    """,
+}
+
+
+def gerar_lotes(linhas, linhas_por_lote=LINHAS_POR_LOTE, semente=42):
+    """
+    Gera a tabela OHLCV sintética em lotes, com as colunas do CSV processado.
+
+    Parâmetros:
+    - linhas (int): Quantidade total de linhas.
+    - linhas_por_lote (int): Linhas de cada lote.
+    - semente (int): Semente do gerador aleatório.
+
+    Retorna:
+    - generator: DataFrames com Date, Adj Close, Close, High, Low, Open e Volume.
+    """
+    rng = np.random.default_rng(semente)
+    segundos_periodo = int((FIM_PERIODO - INICIO_PERIODO).total_seconds())
+    passo = max(1, min(86_400, segundos_periodo // linhas))
+    formato = "%Y-%m-%d" if passo == 86_400 else "%Y-%m-%d %H:%M:%S"
+    ultimo = 40.0
+    for inicio in range(0, linhas, linhas_por_lote):
+        tamanho = min(linhas_por_lote, linhas - inicio)
+        # Passeio aleatório contínuo entre lotes, com máxima e mínima em torno de abertura e fechamento
+        fechamento = ultimo * np.exp(np.cumsum(rng.normal(0, 0.002, tamanho)))
+        ultimo = float(fechamento[-1])
+        abertura = fechamento * np.exp(rng.normal(0, 0.001, tamanho))
+        amplitude = np.abs(rng.normal(0, 0.002, tamanho)) * fechamento
+        datas = INICIO_PERIODO + pd.to_timedelta((inicio + np.arange(tamanho)) * passo, unit="s")
+        yield pd.DataFrame({
+            "Date": datas.strftime(formato),
+            "Adj Close": fechamento,
+            "Close": fechamento,
+            "High": np.maximum(abertura, fechamento) + amplitude,
+            "Low": np.minimum(abertura, fechamento) - amplitude,
+            "Open": abertura,
+            "Volume": rng.integers(1_000_000, 50_000_000, tamanho),
+        })
+
+
+def listar_consultas(diretorio_sql=banco.DIRETORIO_SQL):
+    # Scripts de criação primeiro: as tabelas auxiliares são usadas pelas consultas seguintes
+    consultas = {}
+    for pasta in DIRETORIOS_CONSULTAS:
+        for caminho in sorted((Path(diretorio_sql) / pasta).glob("*.sql")):
+            consultas[f"{pasta}/{caminho.name}"] = caminho.read_text(encoding="utf-8")
+    for nome in SCRIPTS_RECRIADOS:
+        consultas[nome] = (Path(diretorio_sql) / nome).read_text(encoding="utf-8")
+    consultas.update(CONSULTAS_REFERENCIA)
+    return consultas
+
+
+def _tabela_criada(script):
+    # Nome da tabela de um 'CREATE TABLE nome AS ...', para refazê-la a cada execução
+    palavras = script.split()
+    for i in range(len(palavras) - 2):
+        if palavras[i].upper() == "CREATE" and palavras[i + 1].upper() == "TABLE":
+            return palavras[i + 2]
+    return None
+
+
+def executar_consulta(conexao, nome, script, repeticoes, limite):
+    """
+    Executa uma consulta, lendo todas as linhas do resultado, e mede o tempo de cada repetição.
+
+    Parâmetros:
+    - conexao (sqlite3.Connection): Conexão com o banco.
+    - nome (str): Nome da consulta no relatório.
+    - script (str): Consulta ou script SQL; com vários comandos, só o último é medido e os
+      anteriores rodam antes de cada repetição.
+    - repeticoes (int): Quantidade de execuções.
+    - limite (float): Segundos após os quais a execução é interrompida.
+
+    Retorna:
+    - dict: 'consulta', 'segundos' (por repetição), 'melhor', 'linhas_resultado', 'plano',
+      'busca_idx_data' (algum passo é uma busca por faixa no idx_data), 'varredura_completa'
+      (algum passo percorre uma tabela ou índice inteiro) e 'erro' (None se a consulta terminou).
+    """
+    resultado = {"consulta": nome, "segundos": [], "melhor": None, "linhas_resultado": None,
+                 "plano": [], "busca_idx_data": False, "varredura_completa": False, "erro": None}
+    *preparacao, script = banco.dividir_comandos(script)
+    tabela = _tabela_criada(script)
+    if tabela:
+        conexao.execute(f"DROP TABLE IF EXISTS {tabela}")
+    try:
+        resultado["plano"] = consultas.plano_consulta(conexao, script)
+    except sqlite3.Error as erro:
+        resultado["erro"] = str(erro)
+        return resultado
+    detalhes = [passo["detalhe"] for passo in resultado["plano"]]
+    resultado["busca_idx_data"] = any(d.startswith("SEARCH") and "INDEX idx_data" in d for d in detalhes)
+    resultado["varredura_completa"] = any(d.startswith("SCAN") and not d.startswith("SCAN CONSTANT") for d in detalhes)
+
+    for _ in range(repeticoes):
+        if tabela:
+            conexao.execute(f"DROP TABLE IF EXISTS {tabela}")
+        for comando in preparacao:
+            conexao.execute(comando)
+        prazo = time.perf_counter() + limite
+        # O SQLite consulta o handler periodicamente; retorno verdadeiro interrompe a consulta
+        conexao.set_progress_handler(lambda: time.perf_counter() > prazo, 100_000)
+        inicio = time.perf_counter()
+        try:
+            cursor = conexao.execute(script)
+            linhas = 0
+            while True:
+                bloco = cursor.fetchmany(10_000)
+                if not bloco:
+                    break
+                linhas += len(bloco)
+        except sqlite3.OperationalError as erro:
+            resultado["erro"] = "interrompida após o limite de tempo" if "interrupt" in str(erro) else str(erro)
+            break
+        finally:
+            conexao.set_progress_handler(None, 0)
+        resultado["segundos"].append(round(time.perf_counter() - inicio, 4))
+        resultado["linhas_resultado"] = linhas
+    if resultado["segundos"]:
+        resultado["melhor"] = min(resultado["segundos"])
+    return resultado
+
+
+def medir_tamanho(linhas, consultas, diretorio, repeticoes, limite):
+    """
+    Monta o banco sintético de um tamanho e mede as consultas sem e com os índices de data.
+
+    Parâmetros:
+    - linhas (int): Linhas da tabela `uber_stocks`.
+    - consultas (dict): Nome -> SQL, como em `listar_consultas`.
+    - diretorio (str | Path): Diretório do banco temporário.
+    - repeticoes (int): Execuções de cada consulta.
+    - limite (float): Segundos por execução antes da interrupção.
+
+    Retorna:
+    - list: Resultados de `executar_consulta`, com 'linhas_tabela' e 'indice'.
+    """
+    caminho_banco = Path(diretorio) / f"sintetico_{linhas}.db"
+    banco.remover_banco(caminho_banco)
+    engine = banco.criar_engine(caminho_banco)
+    try:
+        inicio = time.perf_counter()
+        banco.inserir_lotes(engine, gerar_lotes(linhas))
+        banco.aplicar_migracoes(engine, MIGRACOES_BASE)
+        print(f"Tabela sintética com {linhas:,} linhas carregada em {time.perf_counter() - inicio:.1f}s")
+    finally:
+        engine.dispose()
+    inicio = time.perf_counter()
+    banco.exportar_anomalias(caminho_banco)
+    banco.exportar_ranking(caminho_banco)
+    print(f"Tabelas anomalias_volume e ranking_dias montadas em {time.perf_counter() - inicio:.1f}s")
+
+    resultados = []
+    conexao = sqlite3.connect(caminho_banco, isolation_level=None)
+    try:
+        for indice in (False, True):
+            if indice:
+                for script_indice in SCRIPTS_INDICES:
+                    conexao.executescript((banco.DIRETORIO_SQL / script_indice).read_text(encoding="utf-8"))
+            conexao.execute("ANALYZE")
+            for nome, script in consultas.items():
+                resultado = executar_consulta(conexao, nome, script, repeticoes, limite)
+                resultados.append({"linhas_tabela": linhas, "indice": indice, **resultado})
+                situacao = resultado["erro"] or f"{resultado['melhor']:.4f}s"
+                print(f"  {'com' if indice else 'sem'} índices | {nome}: {situacao}")
+    finally:
+        conexao.close()
+        banco.remover_banco(caminho_banco)
+    return resultados
+
+
+def calcular_escalonamento(resultados):
+    """
+    Expoente de crescimento do tempo de cada consulta entre tamanhos consecutivos.
+
+    Parâmetros:
+    - resultados (list): Resultados de `medir_tamanho`.
+
+    Retorna:
+    - list: Dicts com 'consulta', 'indice', 'de', 'para' e 'expoente' (None se faltar tempo).
+    """
+    tabela = pd.DataFrame(resultados)
+    escalonamento = []
+    for (consulta, indice), grupo in tabela.groupby(["consulta", "indice"], sort=True):
+        grupo = grupo.sort_values("linhas_tabela")
+        pares = zip(grupo.itertuples(index=False), grupo.iloc[1:].itertuples(index=False))
+        for menor, maior in pares:
+            expoente = None
+            # Tempos muito curtos são dominados por ruído e não dizem nada sobre o crescimento
+            if menor.melhor and maior.melhor and menor.melhor > 1e-4:
+                expoente = round(math.log(maior.melhor / menor.melhor) / math.log(maior.linhas_tabela / menor.linhas_tabela), 2)
+            escalonamento.append({"consulta": consulta, "indice": bool(indice), "de": int(menor.linhas_tabela),
+                                  "para": int(maior.linhas_tabela), "expoente": expoente})
+    return escalonamento
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark das consultas SQL com tabelas sintéticas.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=list(TAMANHOS_PADRAO), help="Tamanhos da tabela.")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções de cada consulta.")
+    parser.add_argument("--limite", type=float, default=300.0, help="Segundos por execução antes de interromper.")
+    parser.add_argument("--diretorio", help="Diretório dos bancos temporários (padrão: diretório temporário do sistema).")
+    parser.add_argument("--saida", default="benchmark_sql.json", help="Relatório JSON.")
+    args = parser.parse_args(argumentos)
+
+    consultas = listar_consultas()
+    resultados = []
+    with tempfile.TemporaryDirectory(dir=args.diretorio) as diretorio:
+        for linhas in sorted(args.linhas):
+            resultados.extend(medir_tamanho(linhas, consultas, diretorio, args.repeticoes, args.limite))
+
+    relatorio = {
+        "versao": VERSAO_RELATORIO,
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ambiente": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                     "plataforma": platform.platform()},
+        "tamanhos": sorted(args.linhas),
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+        "escalonamento": calcular_escalonamento(resultados),
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+
+    tabela = pd.DataFrame(resultados).pivot_table(index="consulta", columns=["linhas_tabela", "indice"], values="melhor")
+    print(tabela.to_string(float_format=lambda valor: f"{valor:.4f}"))
+    print(f"✅ Relatório gravado em '{args.saida}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+-- Consulta que retorna os 5 dias com maior diferença entre high e low a partir da tabela ranking_dias,
+-- refeita a cada carga por `python -m uber_stocks.banco` (ou exportada por `python -m uber_stocks.ranking --banco
+-- <arquivo>`), sem ordenar a tabela uber_stocks inteira.
+-- Para filtrar um período, basta restringir a coluna ano (e date, nas bordas do período).
+SELECT 
+    date,
+    ROUND(valor, 2) AS variacao_absoluta
+FROM ranking_dias
+WHERE metrica = 'amplitude'
+ORDER BY valor DESC
+LIMIT 5;
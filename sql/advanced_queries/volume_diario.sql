@@ -1,12 +1,13 @@
--- Traz os dias onde o volume negociado foi maior que 150% da média anual daquele ano.
--- Ajuda a detectar dias de anomalias ou grandes movimentações.
+-- Traz os dias em que o volume negociado foi anômalo em relação aos pregões anteriores, a partir da
+-- tabela anomalias_volume, refeita a cada carga por `python -m uber_stocks.banco` (ou exportada por
+-- `python -m uber_stocks.anomalias --banco <arquivo>`).
+-- A base é causal (mediana/MAD e média exponencial dos pregões anteriores), e não mais a média do
+-- ano inteiro; a razão mínima de 150% sobre a mediana foi mantida.
 SELECT 
-    u.date,
-    u.volume,
-    v.volume_medio,
-    ROUND((u.volume * 1.0 / v.volume_medio), 2) AS proporcao_volume
-FROM uber_stocks u
-JOIN volume_medio_anual v
-  ON strftime('%Y', u.date) = v.ano
-WHERE u.volume > 1.5 * v.volume_medio
+    date,
+    volume,
+    mediana AS volume_mediano,
+    ROUND(razao, 2) AS proporcao_volume,
+    metodo
+FROM anomalias_volume
 ORDER BY proporcao_volume DESC;
@@ -0,0 +1,6 @@
+-- Cria colunas geradas com o ano e o ano-mês de cada pregão, calculadas a partir de `date`.
+-- Agrupar ou filtrar por strftime('%Y', date) obriga o banco a calcular a expressão linha a linha e
+-- impede o uso de índices; as colunas geradas podem ser indexadas (ver indice_ano.sql).
+-- Com datas ISO (AAAA-MM-DD), substr dá o mesmo resultado que strftime, sem interpretar a data.
+ALTER TABLE uber_stocks ADD COLUMN ano TEXT GENERATED ALWAYS AS (substr(date, 1, 4)) VIRTUAL;
+ALTER TABLE uber_stocks ADD COLUMN ano_mes TEXT GENERATED ALWAYS AS (substr(date, 1, 7)) VIRTUAL;
@@ -0,0 +1,7 @@
+-- Refaz a VIEW de dados_ano.sql com o filtro por ano escrito como faixa semiaberta de datas.
+-- strftime('%Y', date) = '2023' calcula a expressão em todas as linhas; a faixa percorre só o
+-- trecho do ano no idx_data (ver indice_date.sql).
+DROP VIEW IF EXISTS uber_2023_dados;
+CREATE VIEW uber_2023_dados AS
+SELECT * FROM uber_stocks
+WHERE date >= '2023-01-01' AND date < '2024-01-01';
@@ -0,0 +1,4 @@
+-- Cria índices nas colunas geradas de colunas_data.sql, para agrupamentos por ano e por mês.
+-- Filtros por período não precisam deles: use faixas de datas em `date`, que usam o idx_data.
+CREATE INDEX idx_ano ON uber_stocks(ano, date);
+CREATE INDEX idx_ano_mes ON uber_stocks(ano_mes);
@@ -0,0 +1,10 @@
+-- Refaz a tabela de media_mensal.sql agrupando pela coluna gerada ano_mes (ver colunas_data.sql),
+-- que usa o idx_ano_mes em vez de calcular strftime('%Y-%m', Date) linha a linha.
+DROP TABLE IF EXISTS media_mensal_fechamento;
+CREATE TABLE media_mensal_fechamento AS
+SELECT
+    ano_mes,
+    AVG(Close) AS media_fechamento
+FROM uber_stocks
+GROUP BY ano_mes
+ORDER BY ano_mes;
@@ -0,0 +1,10 @@
+-- Refaz a tabela de volume_medio.sql agrupando pela coluna gerada ano (ver colunas_data.sql),
+-- que usa o idx_ano em vez de calcular strftime('%Y', Date) linha a linha.
+DROP TABLE IF EXISTS volume_medio_anual;
+CREATE TABLE volume_medio_anual AS
+SELECT
+    ano,
+    ROUND(AVG(Volume)) AS volume_medio
+FROM uber_stocks
+GROUP BY ano
+ORDER BY ano;
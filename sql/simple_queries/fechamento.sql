@@ -1,8 +1,10 @@
 -- Retorna o preço de fechamento no último dia disponível de cada ano.
 -- Usado para verificar evolução ano a ano.
+-- No SQLite, a coluna sem agregação (close) vem da mesma linha do MAX(date); o agrupamento
+-- pela coluna gerada ano percorre o idx_ano em ordem, sem ordenação temporária.
 SELECT 
-    strftime('%Y', date) AS ano,
+    ano,
     MAX(date) AS ultima_data,
-    (SELECT close FROM uber_stocks us2 WHERE us2.date = MAX(us1.date)) AS fechamento
-FROM uber_stocks us1
+    close AS fechamento
+FROM uber_stocks
 GROUP BY ano;
@@ -1,9 +1,14 @@
+import sys
+from pathlib import Path
 import streamlit as st
-import pandas as pd
 import plotly.express as px  # Importação faltante
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import armazenamento, carregamento, estatisticas
+
 # Configuração inicial do Streamlit
 st.set_page_config(
     page_title="Análise de Abertura e Fechamento - Uber Stocks",
@@ -67,13 +72,20 @@ st.markdown("""
 
 # Função para análise (mantida igual)
 def analisar_diferenca_abertura_fechamento(dados, coluna_abertura, coluna_fechamento):
-    if coluna_abertura not in dados.columns or coluna_fechamento not in dados.columns:
+    if coluna_abertura not in dados or coluna_fechamento not in dados:
         st.error("As colunas especificadas não existem no DataFrame.")
         return None
 
     dados['Diferenca'] = dados[coluna_fechamento] - dados[coluna_abertura]
-    dias_fechamento_maior = (dados['Diferenca'] > 0).sum()
-    estatisticas_diferenca = dados['Diferenca'].describe()
+    if (coluna_abertura, coluna_fechamento) == ("Open", "Close"):
+        # Resumo lido do acumulador salvo (Close - Open), atualizado só com os pregões novos
+        acumulador = estatisticas.sincronizar_estatisticas(dados)['Diferenca']
+    else:
+        # Outro par de colunas: o acumulador salvo não se aplica, resume a diferença recém-calculada
+        acumulador = estatisticas.AcumuladorEstatisticas(limiares=(0.0,))
+        acumulador.atualizar(dados['Diferenca'].to_numpy(dtype="float64"))
+    dias_fechamento_maior = acumulador.acima(0)
+    estatisticas_diferenca = acumulador.descrever()
 
     insights = {
         "resumo": {
@@ -93,9 +105,9 @@ def analisar_diferenca_abertura_fechamento(dados, coluna_abertura, coluna_fecham
 
     return insights
 
-# Carregar dados
-data_path = "D:/Portfolio/Uber Stocks Dataset 2025/data/processed/uber_stock_data_atualizado.csv"
-dados = pd.read_csv(data_path)
+# Carregar dados: visão da sessão sobre o armazém compartilhado; a coluna 'Diferenca' fica só nela
+data_path = carregamento.CAMINHO_PROCESSADO
+dados = armazenamento.abrir_armazem(data_path).visao()
 
 # Título do dashboard
 st.markdown("<h1 style='text-align: center; color: #FFFFFF;'>Dashboard de Análise: Diferença entre Abertura e Fechamento</h1>", 
@@ -143,8 +155,7 @@ if insights:
     st.markdown("<div class='header-style' style='margin-top: 30px;'>Distribuição das Diferenças (Fechamento - Abertura)</div>", 
                 unsafe_allow_html=True)
     fig = px.histogram(
-        dados,
-        x="Diferenca",
+        x=dados["Diferenca"],
         nbins=30,
         color_discrete_sequence=["#FFFFFF"],  # Barras brancas
         template="plotly_dark",  # Tema escuro
@@ -1,9 +1,14 @@
+import sys
+from pathlib import Path
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import armazenamento, calendario, carregamento, tipos
+
 # Configuração da página
 st.set_page_config(page_title="Análise das Ações da Uber", layout="wide", initial_sidebar_state="expanded")
 
@@ -30,25 +35,23 @@ st.markdown("""
 st.markdown("<h1 style='text-align: center; font-size: 5rem;'>Análise das Ações da Uber</h1>", unsafe_allow_html=True)
 st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)  # Espaço adicional
 
-# Função para carregar dados
-@st.cache_data
+# Função para carregar dados: visão da sessão sobre o armazém mapeado em memória, compartilhado
+# por todas as sessões, em vez de uma cópia do histórico por sessão
 def load_data(file_path):
-    data = pd.read_csv(file_path)
-    data['Date'] = pd.to_datetime(data['Date'])
-    data['Month'] = data['Date'].dt.month
-    data['Month_Name'] = data['Date'].dt.strftime('%B')
-    return data
+    data = armazenamento.abrir_armazem(file_path).visao()
+    # Month_Name como categoria, em vez de textos por linha; usado só no box plot mensal
+    return tipos.adicionar_campos_calendario(data, 'Date', campos=('Month_Name',))
 
 try:
     # Carregando dados
-    data = load_data('../data/processed/uber_stock_data_atualizado.csv')
+    data = load_data(carregamento.CAMINHO_PROCESSADO)
     
     # Análise da Evolução do Preço
     st.markdown("<h1 style='text-align: center;'>Evolução dos preços das ações</h1>", unsafe_allow_html=True)  # Título centralizado
     st.markdown("<div class='spacer'></div>", unsafe_allow_html=True)  # Espaço adicional
 
     # Criando gráfico interativo de tendência
-    fig_trend = px.line(data, x='Date', y='Adj Close', 
+    fig_trend = px.line(x=data['Date'], y=data['Adj Close'], 
                         template='plotly_white')  # Removido o title do px.line
 
     fig_trend.update_traces(line_color='#FFFFFF', line_width=1)
@@ -71,7 +74,7 @@ try:
 
     # Criando box plot mensal
 
-    fig_box = px.box(data, x='Month_Name', y='Adj Close', 
+    fig_box = px.box(x=data['Month_Name'], y=data['Adj Close'], 
                     template='plotly_white')
     fig_box.update_traces(line_color='#FFFFFF', line_width=3)
     fig_box.update_layout(
@@ -88,11 +91,6 @@ try:
     # Insights da Análise
     st.subheader("Principais Insights")
     
-    # Calculando insights
-    monthly_avg = data.groupby('Month_Name')['Adj Close'].mean().sort_values()
-    top_months = monthly_avg.nlargest(3).index.tolist()
-    bottom_months = monthly_avg.nsmallest(3).index.tolist()
-    
     # CSS personalizado para os insights
     st.markdown("""
         <style>
@@ -112,8 +110,8 @@ try:
         }
         </style>
     """, unsafe_allow_html=True)
-    # Calculando insights aprimorados
-    monthly_avg = data.groupby('Month')['Adj Close'].mean()
+    # Calculando insights: média mensal obtida do cubo de calendário, sem reagrupar as linhas
+    monthly_avg = calendario.obter_cubo().agregar(('mes',), 'Adj Close').set_index('mes')['media']
     monthly_avg_sorted = monthly_avg.sort_values()
     top_months = monthly_avg_sorted.nlargest(3).index.tolist()
     bottom_months = monthly_avg_sorted.nsmallest(3).index.tolist()
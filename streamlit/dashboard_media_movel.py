@@ -1,7 +1,12 @@
+import sys
+from pathlib import Path
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import armazenamento, medias_moveis
+
 # Configurações gerais do dashboard
 st.set_page_config(
     page_title="Análise de Médias Móveis - Uber Stocks",
@@ -67,11 +72,9 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def carregar_dados():
-    """Carrega e prepara os dados"""
+    """Abre uma visão da sessão sobre o armazém compartilhado dos dados"""
     try:
-        dados = pd.read_csv("D:/Portfolio/Uber Stocks Dataset 2025/data/processed/uber_stock_data_atualizado.csv")
-        dados['Date'] = pd.to_datetime(dados['Date'])
-        return dados.sort_values('Date')
+        return armazenamento.abrir_armazem().visao()
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return None
@@ -120,9 +123,10 @@ def main():
     if dados is None:
         return
     
-    # Cálculo das médias móveis
+    # Cálculo das médias móveis (incremental, a partir do estado salvo ao lado dos dados)
+    medias = medias_moveis.sincronizar_medias(dados, [7, 30])
     for periodo in [7, 30]:
-        dados[f'Media_Movel_{periodo}'] = dados['Close'].rolling(window=periodo).mean()
+        dados[f'Media_Movel_{periodo}'] = medias[periodo]
     
     # Métricas principais
     preco_atual = dados['Close'].iloc[-1]
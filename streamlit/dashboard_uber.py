@@ -1,8 +1,13 @@
+import sys
+from pathlib import Path
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from scipy.stats import pearsonr, spearmanr
+
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import carregamento, materializacao
 
 # Configurações gerais do dashboard
 st.set_page_config(
@@ -74,15 +79,31 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def carregar_dados():
-    try:
-        dados = pd.read_csv("D:/Portfolio/Uber Stocks Dataset 2025/data/processed/uber_stock_data_atualizado.csv")
-        dados['Date'] = pd.to_datetime(dados['Date'])
-        return dados.sort_values('Date')
-    except Exception as e:
-        st.error(f"Erro ao carregar dados: {e}")
-        return None
+@st.cache_resource(max_entries=1)
+def _ler_artefato(modificado_em):
+    return materializacao.ler_artefato()
+
+@st.cache_data(max_entries=4)
+def _desatualizado(versao, tamanho_dados, dados_modificados_em):
+    # Reavaliado apenas quando o CSV processado ou o artefato mudam
+    return materializacao.versao_desatualizada(versao)
+
+def artefato_atual():
+    # Resultados das páginas materializados por `python -m uber_stocks.materializacao`;
+    # relido apenas quando o arquivo muda
+    caminho = materializacao.caminho_artefato()
+    return _ler_artefato(caminho.stat().st_mtime_ns) if caminho.exists() else None
+
+def carregar_artefato():
+    artefato = artefato_atual()
+    if artefato is None:
+        st.warning("Resultados ainda não materializados. Execute `python -m uber_stocks.materializacao`.")
+    else:
+        estado = carregamento.CAMINHO_PROCESSADO.stat() if carregamento.CAMINHO_PROCESSADO.exists() else None
+        if estado is not None and _desatualizado(artefato.versao, estado.st_size, estado.st_mtime_ns):
+            st.warning("Os dados mudaram desde a materialização e os números abaixo estão desatualizados. "
+                       "Execute `python -m uber_stocks.materializacao`.")
+    return artefato
 
 def home():
     st.markdown("<div class='main-title'>🚕 Análise Completa das Ações da Uber</div>", unsafe_allow_html=True)
@@ -109,24 +130,23 @@ def home():
     """, unsafe_allow_html=True)
 
 def pagina_abertura_fechamento():
-    dados = carregar_dados()
-    if dados is None:
+    artefato = carregar_artefato()
+    if artefato is None:
         return
 
     st.markdown("<div class='main-title'>📈 Diferença Abertura-Fechamento</div>", unsafe_allow_html=True)
     
-    # Análise
-    dados['Diferenca'] = dados['Close'] - dados['Open']
-    estatisticas = dados['Diferenca'].describe()
-    dias_positivos = (dados['Diferenca'] > 0).sum()
+    # Análise lida do artefato materializado
+    resumo = artefato.metricas['abertura_fechamento']
+    dias_positivos = resumo['dias_positivos']
 
     # Métricas
     cols = st.columns(4)
     metrics = [
         ("Dias Positivos", dias_positivos, ""),
-        ("Média Diária", estatisticas['mean'], "$"),
-        ("Máxima Diária", estatisticas['max'], "$"),
-        ("Mínima Diária", estatisticas['min'], "$")
+        ("Média Diária", resumo['mean'], "$"),
+        ("Máxima Diária", resumo['max'], "$"),
+        ("Mínima Diária", resumo['min'], "$")
     ]
     
     for col, (title, value, prefix) in zip(cols, metrics):
@@ -140,7 +160,13 @@ def pagina_abertura_fechamento():
 
     # Gráfico
     st.markdown("<div class='section-title'>Distribuição das Diferenças Diárias</div>", unsafe_allow_html=True)
-    fig = px.histogram(dados, x="Diferenca", nbins=50, template="plotly_dark")
+    histograma = artefato.tabela('abertura_fechamento.histograma')
+    fig = go.Figure(go.Bar(
+        x=(histograma['inicio'] + histograma['fim']) / 2,
+        y=histograma['contagem'],
+        width=histograma['fim'] - histograma['inicio']
+    ))
+    fig.update_layout(template="plotly_dark", xaxis_title="Diferenca", yaxis_title="count", bargap=0)
     fig.update_traces(marker_color='#FFFFFF', marker_line_color='#000000')
     st.plotly_chart(fig, use_container_width=True)
 
@@ -153,11 +179,11 @@ def pagina_abertura_fechamento():
             <ul class='recommendation-list'>
                 <li>Dias positivos indicam fechamento acima da abertura (otimismo)</li>
                 <li>Amplitude média de $%.2f mostra volatilidade intraday</li>
-                <li>Máxima histórica de $%.2f em 05/12/2024</li>
+                <li>Máxima histórica de $%.2f em %s</li>
             </ul>
         </div>
     </div>
-    """ % (estatisticas['mean'], estatisticas['max']), unsafe_allow_html=True)
+    """ % (resumo['mean'], resumo['max'], pd.Timestamp(resumo['data_maxima']).strftime('%d/%m/%Y')), unsafe_allow_html=True)
 
     st.markdown("""
     <div class='insight-box'>
@@ -173,23 +199,22 @@ def pagina_abertura_fechamento():
     """, unsafe_allow_html=True)
 
 def pagina_volatilidade():
-    dados = carregar_dados()
-    if dados is None:
+    artefato = carregar_artefato()
+    if artefato is None:
         return
 
     st.markdown("<div class='main-title'>📉 Análise de Volatilidade</div>", unsafe_allow_html=True)
     
-    # Cálculos
-    dados['Volatilidade'] = dados['High'] - dados['Low']
-    estatisticas = dados['Volatilidade'].describe()
-    top5 = dados.nlargest(5, 'Volatilidade')
+    # Resultados lidos do artefato materializado
+    resumo = artefato.metricas['volatilidade']
+    top5 = artefato.tabela('volatilidade.top5')
 
     # Métricas
     cols = st.columns(3)
     metrics = [
-        ("Média Diária", estatisticas['mean'], "$"),
-        ("Máxima Histórica", estatisticas['max'], "$"),
-        ("Dias > $5.00", sum(dados['Volatilidade'] > 5), "")
+        ("Média Diária", resumo['mean'], "$"),
+        ("Máxima Histórica", resumo['max'], "$"),
+        ("Dias > $5.00", resumo['dias_acima_5'], "")
     ]
     
     for col, (title, value, prefix) in zip(cols, metrics):
@@ -226,7 +251,7 @@ def pagina_volatilidade():
             </ul>
         </div>
     </div>
-    """ % (estatisticas['mean'], estatisticas['75%']), unsafe_allow_html=True)
+    """ % (resumo['mean'], resumo['75%']), unsafe_allow_html=True)
 
     st.markdown("""
     <div class='insight-box'>
@@ -242,22 +267,22 @@ def pagina_volatilidade():
     """, unsafe_allow_html=True)
 
 def pagina_medias_moveis():
-    dados = carregar_dados()
-    if dados is None:
+    artefato = carregar_artefato()
+    if artefato is None:
         return
 
     st.markdown("<div class='main-title'>📊 Médias Móveis</div>", unsafe_allow_html=True)
     
-    # Cálculos
-    dados['MM7'] = dados['Close'].rolling(7).mean()
-    dados['MM30'] = dados['Close'].rolling(30).mean()
-    cruzamentos = sum((dados['MM7'] > dados['MM30']).diff() == True)
+    # Séries e cruzamentos lidos do artefato materializado
+    resumo = artefato.metricas['medias_moveis']
+    dados = artefato.tabela('medias_moveis.series')
+    cruzamentos = resumo['cruzamentos']
 
     # Métricas
     cols = st.columns(3)
     metrics = [
-        ("Média 7 Dias", dados['MM7'].iloc[-1], "$"),
-        ("Média 30 Dias", dados['MM30'].iloc[-1], "$"),
+        ("Média 7 Dias", resumo['mm7'], "$"),
+        ("Média 30 Dias", resumo['mm30'], "$"),
         ("Cruzamentos", cruzamentos, "")
     ]
     
@@ -307,15 +332,16 @@ def pagina_medias_moveis():
     """, unsafe_allow_html=True)
 
 def pagina_volume_preco():
-    dados = carregar_dados()
-    if dados is None:
+    artefato = carregar_artefato()
+    if artefato is None:
         return
 
     st.markdown("<div class='main-title'>🔍 Volume vs Preço</div>", unsafe_allow_html=True)
     
-    # Cálculos
-    corr_pearson, p_pearson = pearsonr(dados['Volume'], dados['Close'])
-    corr_spearman, p_spearman = spearmanr(dados['Volume'], dados['Close'])
+    # Correlações, tendência e séries lidas do artefato materializado
+    resumo = artefato.metricas['volume_preco']
+    corr_pearson, p_pearson = resumo['pearson'], resumo['p_pearson']
+    corr_spearman = resumo['spearman']
 
     # Métricas
     cols = st.columns(2)
@@ -336,16 +362,33 @@ def pagina_volume_preco():
     # Gráfico
     st.markdown("<div class='section-title'>Relação Volume-Preço</div>", unsafe_allow_html=True)
     fig = px.scatter(
-        dados,
+        artefato.tabela('volume_preco.dispersao'),
         x="Volume",
         y="Close",
-        trendline="lowess",
         template="plotly_dark",
         color_discrete_sequence=["#00FF7F"]
     )
     fig.update_traces(marker=dict(size=5, opacity=0.5))
+    # Tendência calculada uma vez por versão dos dados, com o motor escolhido pelo tamanho da série
+    curva = artefato.tabela('volume_preco.tendencia')
+    fig.add_trace(go.Scatter(x=curva['Volume'], y=curva['Close'], mode="lines",
+                             name=f"Tendência ({resumo['motor_tendencia']})", line=dict(color="#FFFFFF", width=2)))
     st.plotly_chart(fig, use_container_width=True)
 
+    # Correlação móvel: como a relação volume-preço muda ao longo do tempo
+    st.markdown("<div class='section-title'>Correlação Móvel (30 pregões)</div>", unsafe_allow_html=True)
+    correlacao_movel = artefato.tabela('volume_preco.correlacao_movel')
+    fig_movel = go.Figure()
+    for metodo, cor in [("pearson", "#00FF7F"), ("spearman", "#1E90FF")]:
+        fig_movel.add_trace(go.Scatter(
+            x=correlacao_movel['Date'],
+            y=correlacao_movel[metodo],
+            name=metodo.capitalize(),
+            line=dict(color=cor)
+        ))
+    fig_movel.update_layout(template="plotly_dark", yaxis=dict(title="Correlação", range=[-1, 1]))
+    st.plotly_chart(fig_movel, use_container_width=True)
+
     # Insights
     st.markdown("""
     <div class='insight-box'>
@@ -374,15 +417,14 @@ def pagina_volume_preco():
     """, unsafe_allow_html=True)
 
 def pagina_sazonalidade():
-    dados = carregar_dados()
-    if dados is None:
+    artefato = carregar_artefato()
+    if artefato is None:
         return
 
     st.markdown("<div class='main-title'>📅 Padrões Sazonais</div>", unsafe_allow_html=True)
     
-    # Processamento
-    dados['Mês'] = dados['Date'].dt.month_name()
-    media_mensal = dados.groupby('Mês')['Close'].mean().reset_index()
+    # Média mensal (roll-up do cubo de calendário) lida do artefato materializado
+    media_mensal = artefato.tabela('sazonalidade.media_mensal')
 
     # Gráfico
     st.markdown("<div class='section-title'>Desempenho Mensal Médio</div>", unsafe_allow_html=True)
@@ -444,7 +486,9 @@ with st.sidebar:
     
     st.markdown("---")
     st.markdown("**Fonte dos Dados:**  \nYahoo Finance")
-    st.markdown("**Período Analisado:**  \n2019-2024")
+    artefato = artefato_atual()
+    periodo = f"{artefato.metricas['geral']['inicio'][:4]}-{artefato.metricas['geral']['fim'][:4]}" if artefato else "2019-2024"
+    st.markdown(f"**Período Analisado:**  \n{periodo}")
     st.markdown("---")
     st.markdown("**Desenvolvido por:**  \n[Seu Nome]")
 
@@ -1,5 +1,11 @@
+import sys
+from pathlib import Path
 import streamlit as st
 
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import carregamento, materializacao
+
 # Configuração da página
 st.set_page_config(
     page_title="Relatório de Volatilidade Diária",
@@ -46,14 +52,37 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+@st.cache_resource(max_entries=1)
+def _ler_artefato(modificado_em):
+    return materializacao.ler_artefato()
+
+@st.cache_data(max_entries=4)
+def _desatualizado(versao, tamanho_dados, dados_modificados_em):
+    # Reavaliado apenas quando o CSV processado ou o artefato mudam
+    return materializacao.versao_desatualizada(versao)
+
+# Números do relatório lidos do artefato materializado, em vez de valores fixos no texto;
+# relido apenas quando o arquivo muda
+caminho_artefato = materializacao.caminho_artefato()
+artefato = _ler_artefato(caminho_artefato.stat().st_mtime_ns) if caminho_artefato.exists() else None
+if artefato is None:
+    st.warning("Resultados ainda não materializados. Execute `python -m uber_stocks.materializacao`.")
+    st.stop()
+estado_dados = carregamento.CAMINHO_PROCESSADO.stat() if carregamento.CAMINHO_PROCESSADO.exists() else None
+if estado_dados is not None and _desatualizado(artefato.versao, estado_dados.st_size, estado_dados.st_mtime_ns):
+    st.warning("Os dados mudaram desde a materialização e os números abaixo estão desatualizados. "
+               "Execute `python -m uber_stocks.materializacao`.")
+resumo = artefato.metricas['volatilidade']
+top5 = artefato.tabela('volatilidade.top5')
+
 # Conteúdo do relatório
 st.markdown('<div class="report-title">📊 INSIGHTS SOBRE A VOLATILIDADE DIÁRIA</div>', unsafe_allow_html=True)
 st.markdown(
-    """
+    f"""
     <div class="content">
         A volatilidade diária foi calculada com base na diferença entre os preços mais altos (High) e mais baixos (Low) de cada dia.<br>
-        A média da volatilidade diária é de <b>$1.64</b>, com um desvio padrão de <b>$0.83</b>.<br>
-        O menor valor de volatilidade registrado foi de <b>$0.39</b>, enquanto o maior foi de <b>$7.75</b>.
+        A média da volatilidade diária é de <b>${resumo['mean']:.2f}</b>, com um desvio padrão de <b>${resumo['std']:.2f}</b>.<br>
+        O menor valor de volatilidade registrado foi de <b>${resumo['min']:.2f}</b>, enquanto o maior foi de <b>${resumo['max']:.2f}</b>.
     </div>
     """,
     unsafe_allow_html=True
@@ -61,27 +90,27 @@ st.markdown(
 
 st.markdown('<div class="section-title">📋 DETALHES ADICIONAIS</div>', unsafe_allow_html=True)
 st.markdown(
-    """
+    f"""
     <div class="content">
         Estatísticas adicionais:<br>
-        - Mediana da volatilidade: <b>$1.43</b><br>
-        - Primeiro quartil (Q1): <b>$1.10</b><br>
-        - Terceiro quartil (Q3): <b>$2.00</b><br>
-        - Total de dias analisados: <b>1444</b>
+        - Mediana da volatilidade: <b>${resumo['50%']:.2f}</b><br>
+        - Primeiro quartil (Q1): <b>${resumo['25%']:.2f}</b><br>
+        - Terceiro quartil (Q3): <b>${resumo['75%']:.2f}</b><br>
+        - Total de dias analisados: <b>{int(resumo['count'])}</b>
     </div>
     """,
     unsafe_allow_html=True
 )
 
 st.markdown('<div class="section-title">📅 DIAS COM MAIOR VOLATILIDADE</div>', unsafe_allow_html=True)
+dias = "<br>\n".join(
+    f"        - Data: <b>{data}</b>, Volatilidade: <b>${valor:.2f}</b>"
+    for data, valor in zip(top5['Date'], top5['Volatilidade'])
+)
 st.markdown(
-    """
+    f"""
     <div class="content">
-        - Data: <b>2024-12-05 00:00:00</b>, Volatilidade: <b>$7.75</b><br>
-        - Data: <b>2021-04-29 00:00:00</b>, Volatilidade: <b>$6.11</b><br>
-        - Data: <b>2020-03-19 00:00:00</b>, Volatilidade: <b>$5.56</b><br>
-        - Data: <b>2021-03-04 00:00:00</b>, Volatilidade: <b>$5.55</b><br>
-        - Data: <b>2024-08-06 00:00:00</b>, Volatilidade: <b>$5.32</b>
+{dias}
     </div>
     """,
     unsafe_allow_html=True
@@ -1,12 +1,17 @@
+import sys
+from pathlib import Path
 import streamlit as st
-import pandas as pd
 import numpy as np
 import seaborn as sns
 from scipy.stats import pearsonr, spearmanr
 import matplotlib.pyplot as plt
 
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import carregamento, correlacao, estatisticas, particoes
+
 # Função de análise
-def analisar_relacao_volume_preco(dados, coluna_volume, coluna_preco):
+def analisar_relacao_volume_preco(dados, coluna_volume, coluna_preco, acumuladores=None):
     """
     Analisa a relação entre o volume negociado e o preço de fechamento.
 
@@ -14,6 +19,7 @@ def analisar_relacao_volume_preco(dados, coluna_volume, coluna_preco):
     - dados (pd.DataFrame): DataFrame contendo os dados de mercado.
     - coluna_volume (str): Nome da coluna com o volume negociado.
     - coluna_preco (str): Nome da coluna com o preço de fechamento.
+    - acumuladores (dict, opcional): Acumuladores salvos das duas colunas; se None, são calculados a partir de `dados`.
 
     Retorna:
     - dict: Insights detalhados sobre a relação entre volume e preço de fechamento.
@@ -23,13 +29,23 @@ def analisar_relacao_volume_preco(dados, coluna_volume, coluna_preco):
         raise ValueError("As colunas especificadas não existem no DataFrame.")
 
     # Estatísticas descritivas
-    estatisticas_volume = dados[coluna_volume].describe()
-    estatisticas_preco = dados[coluna_preco].describe()
+    if acumuladores is None:
+        acumuladores = {}
+        for coluna in (coluna_volume, coluna_preco):
+            acumuladores[coluna] = estatisticas.AcumuladorEstatisticas()
+            acumuladores[coluna].atualizar(dados[coluna])
+    estatisticas_volume = acumuladores[coluna_volume].descrever()
+    estatisticas_preco = acumuladores[coluna_preco].descrever()
 
     # Calcular a correlação de Pearson e Spearman
     correlacao_pearson, p_valor_pearson = pearsonr(dados[coluna_volume], dados[coluna_preco])
     correlacao_spearman, p_valor_spearman = spearmanr(dados[coluna_volume], dados[coluna_preco])
 
+    # Correlações da janela mais recente, pelo motor incremental
+    janela = min(30, len(dados))
+    pearson_recente = correlacao.correlacao_movel(dados[coluna_volume], dados[coluna_preco], janela)[-1]
+    spearman_recente = correlacao.correlacao_movel(dados[coluna_volume], dados[coluna_preco], janela, "spearman")[-1]
+
     # Criar gráfico interativo com Plotly
     import plotly.express as px
 
@@ -58,6 +74,7 @@ def analisar_relacao_volume_preco(dados, coluna_volume, coluna_preco):
             <ul>
                 <li>Correlação de Pearson: {correlacao_pearson:.2f} (p-valor: {p_valor_pearson:.4f})</li>
                 <li>Correlação de Spearman: {correlacao_spearman:.2f} (p-valor: {p_valor_spearman:.4f})</li>
+                <li>Últimos {janela} pregões: Pearson {pearson_recente:.2f} | Spearman {spearman_recente:.2f}</li>
             </ul>
         </div>
         """,
@@ -116,12 +133,21 @@ st.set_page_config(layout="wide")  # Configurar layout para ocupar toda a largur
 st.title("Análise da Relação entre Volume e Preço de Fechamento")
 
 # Carregar o DataFrame diretamente do caminho especificado
-caminho_arquivo = r"D:\Portfolio\Uber Stocks Dataset 2025\data\processed\uber_stock_data_atualizado.csv"
+caminho_arquivo = carregamento.CAMINHO_PROCESSADO
 try:
-    dados = pd.read_csv(caminho_arquivo)
+    # Só as partições do ano escolhido são lidas; 'Todos' percorre o histórico inteiro
+    particoes.atualizar_particoes(caminho_arquivo)
+    anos = particoes.anos_disponiveis()
+    ano = st.sidebar.selectbox("Ano", ["Todos"] + anos[::-1])
+    if ano == "Todos":
+        dados = particoes.ler_particoes(tickers=particoes.TICKER_PADRAO)
+    else:
+        dados = particoes.ler_particoes(tickers=particoes.TICKER_PADRAO, inicio=f"{ano}-01-01", fim=f"{ano}-12-31")
 
     # Chamada da função e exibição dos insights
-    insights_relacao = analisar_relacao_volume_preco(dados, 'Volume', 'Close')
+    # No histórico inteiro as estatísticas vêm dos acumuladores salvos, atualizados só com os pregões novos
+    acumuladores = estatisticas.sincronizar_estatisticas(dados, caminho_arquivo) if ano == "Todos" else None
+    insights_relacao = analisar_relacao_volume_preco(dados, 'Volume', 'Close', acumuladores)
 
     #st.subheader("Resumo da Análise")
     st.markdown(f"<div style='font-size: 24px;'>{insights_relacao['resumo']}</div>", unsafe_allow_html=True)
@@ -0,0 +1,76 @@
+"""
+Paridade das correlações móveis de `uber_stocks.correlacao` com o `rolling().corr()` do pandas.
+
+Uso:
+    python -m pytest tests/test_correlacao.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Permite importar o pacote compartilhado `uber_stocks` a partir da raiz do projeto
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from uber_stocks import correlacao
+
+
+def _series(linhas=400, semente=0):
+    rng = np.random.default_rng(semente)
+    volume = rng.lognormal(17, 0.5, linhas)
+    fechamento = 40 + np.cumsum(rng.normal(0, 1, linhas)) + 1e-8 * volume
+    return volume, fechamento
+
+
+@pytest.mark.parametrize("min_periodos", [None, 10])
+def test_pearson_movel_com_falhas_coincide_com_pandas(min_periodos):
+    volume, fechamento = _series()
+    volume[[5, 150, 151]] = np.nan
+    fechamento[[40, 300]] = np.nan
+    janela = 30
+
+    obtido = correlacao.pearson_movel(volume, fechamento, janela, min_periodos)
+    esperado = pd.Series(volume).rolling(janela, min_periods=min_periodos).corr(pd.Series(fechamento)).to_numpy(copy=True)
+
+    # As primeiras janela - 1 posições ficam vazias mesmo com min_periodos menor
+    esperado[:janela - 1] = np.nan
+    np.testing.assert_array_equal(np.isnan(obtido), np.isnan(esperado))
+    np.testing.assert_allclose(obtido, esperado, rtol=1e-7, atol=1e-9)
+
+
+def test_pearson_movel_sem_falhas_coincide_com_pandas_em_varias_series():
+    volume, fechamento = _series()
+    x = np.column_stack([volume, volume[::-1]])
+    y = np.column_stack([fechamento, fechamento * 2])
+
+    obtido = correlacao.pearson_movel(x, y, 20)
+    for coluna in range(2):
+        esperado = pd.Series(x[:, coluna]).rolling(20).corr(pd.Series(y[:, coluna])).to_numpy()
+        np.testing.assert_allclose(obtido[:, coluna], esperado, rtol=1e-7, atol=1e-9)
+
+
+def test_spearman_movel_com_falhas_coincide_com_pandas():
+    volume, fechamento = _series()
+    volume[[5, 150, 151]] = np.nan
+    fechamento[[40, 300]] = np.nan
+    janela = 30
+
+    obtido = correlacao.correlacao_movel(volume, fechamento, janela, "spearman")
+    # O rolling do pandas não tem Spearman: postos de cada janela sem falhas, correlacionados por Pearson
+    esperado = np.full(len(volume), np.nan)
+    for fim in range(janela, len(volume) + 1):
+        x, y = pd.Series(volume[fim - janela:fim]), pd.Series(fechamento[fim - janela:fim])
+        if x.notna().all() and y.notna().all():
+            esperado[fim - 1] = x.rank().corr(y.rank())
+
+    np.testing.assert_array_equal(np.isnan(obtido), np.isnan(esperado))
+    np.testing.assert_allclose(obtido, esperado, rtol=1e-7, atol=1e-9)
+
+
+def test_pearson_movel_falha_unica_afeta_so_as_janelas_que_a_contem():
+    volume, fechamento = _series()
+    volume[100] = np.nan
+    obtido = correlacao.pearson_movel(volume, fechamento, 30)
+    vazias = np.flatnonzero(np.isnan(obtido[29:])) + 29
+    np.testing.assert_array_equal(vazias, np.arange(100, 130))
@@ -0,0 +1,6 @@
+"""
+Pacote compartilhado com o carregamento e o processamento dos dados das ações da Uber.
+
+Os dashboards em `streamlit/`, os notebooks e os scripts de linha de comando importam
+daqui as rotinas comuns, evitando que cada aplicação reimplemente a leitura do CSV.
+"""
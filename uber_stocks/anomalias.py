@@ -0,0 +1,423 @@
+"""
+Detecção contínua de volume anômalo, pregão a pregão, para vários tickers.
+
+Substitui `sql/advanced_queries/volume_diario.sql`, que compara o volume de cada dia com
+150% da média do seu ano civil (`volume_medio_anual`, unida por `strftime('%Y', ...)`): essa
+média só é conhecida depois que o ano termina, e o relatório sai a posteriori. Aqui a linha
+de base de cada pregão usa apenas os pregões anteriores, em duas versões:
+
+- mediana/MAD móveis: mediana e desvio absoluto mediano dos últimos `janela` volumes; o
+  escore robusto é (volume - mediana) / (1.4826 * MAD);
+- EWMA: média e variância exponenciais do log do volume; o escore é o z do log do volume.
+
+Um pregão é anômalo quando algum escore passa do seu limiar e o volume é pelo menos
+`razao_minima` vezes a mediana (os mesmos 150% da consulta antiga, agora sobre uma base
+causal). O `DetectorVolume` guarda, por ticker, só a janela de volumes e as duas estatísticas
+exponenciais (estado de tamanho fixo) e processa um pregão de todo o universo por chamada,
+emitindo os alertas no mesmo dia. `detectar_lote` refaz o histórico de forma vetorizada,
+com resultados idênticos aos do modo contínuo.
+
+Uso:
+    python -m uber_stocks.anomalias --processado data/processed/uber_stock_data_atualizado.csv
+    python -m uber_stocks.anomalias --tickers UBER LYFT TSLA --banco uber.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from uber_stocks import carregamento, multiplos_tickers, particoes
+
+JANELA_PADRAO = 21
+SPAN_EWMA = 21
+LIMIAR_MAD = 3.5
+LIMIAR_EWMA = 3.0
+RAZAO_MINIMA = 1.5
+# Fator que torna o MAD comparável ao desvio padrão em dados normais
+ESCALA_MAD = 1.4826
+VERSAO_ESTADO = 1
+TABELA_SQL = "anomalias_volume"
+# Janelas por bloco no cálculo vetorizado da mediana/MAD, para limitar a memória em históricos longos
+JANELAS_POR_BLOCO = 500_000
+COLUNAS_EVENTO = [particoes.COLUNA_TICKER, carregamento.COLUNA_DATA, "Volume", "mediana", "razao",
+                  "escore_mad", "escore_ewma", "metodo"]
+
+
+def _escores(volumes, mediana, mad, media_log, variancia_log):
+    # Escores de um pregão contra a base anterior; dispersão nula vira escore infinito (ou 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        escore_mad = np.where(mad > 0, (volumes - mediana) / (ESCALA_MAD * mad),
+                              np.where(volumes > mediana, np.inf, 0.0))
+        desvio_log = np.sqrt(variancia_log)
+        diferenca_log = np.log1p(volumes) - media_log
+        escore_ewma = np.where(desvio_log > 0, diferenca_log / desvio_log,
+                               np.where(diferenca_log > 0, np.inf, 0.0))
+        razao = volumes / mediana
+    return escore_mad, escore_ewma, razao
+
+
+def _classificar(escore_mad, escore_ewma, razao, parametros):
+    # 'mad', 'ewma', 'mad+ewma' ou '' para cada pregão
+    relevante = razao >= parametros["razao_minima"]
+    por_mad = relevante & (escore_mad > parametros["limiar_mad"])
+    por_ewma = relevante & (escore_ewma > parametros["limiar_ewma"])
+    return np.where(por_mad & por_ewma, "mad+ewma", np.where(por_mad, "mad", np.where(por_ewma, "ewma", "")))
+
+
+class DetectorVolume:
+    """
+    Detector contínuo de volume anômalo para um universo de tickers.
+
+    Parâmetros:
+    - tickers (list): Tickers acompanhados, na ordem dos volumes passados a `atualizar`.
+    - janela (int): Pregões da mediana/MAD móveis (também o aquecimento mínimo).
+    - span (int): Span da média e da variância exponenciais (alfa = 2 / (span + 1)).
+    - limiar_mad (float): Escore robusto acima do qual o pregão é anômalo.
+    - limiar_ewma (float): Escore EWMA acima do qual o pregão é anômalo.
+    - razao_minima (float): Razão mínima entre o volume e a mediana para emitir o alerta.
+    """
+
+    def __init__(self, tickers, janela=JANELA_PADRAO, span=SPAN_EWMA, limiar_mad=LIMIAR_MAD,
+                 limiar_ewma=LIMIAR_EWMA, razao_minima=RAZAO_MINIMA):
+        if janela < 2:
+            raise ValueError("A janela deve ter pelo menos 2 pregões.")
+        self.tickers = list(tickers)
+        self.parametros = {"janela": int(janela), "span": int(span), "limiar_mad": float(limiar_mad),
+                           "limiar_ewma": float(limiar_ewma), "razao_minima": float(razao_minima)}
+        quantidade = len(self.tickers)
+        self._indice = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._janela = np.zeros((quantidade, self.parametros["janela"]))
+        self._posicao = np.zeros(quantidade, dtype="int64")
+        self._contagem = np.zeros(quantidade, dtype="int64")
+        self._media_log = np.zeros(quantidade)
+        self._variancia_log = np.zeros(quantidade)
+        self.ultima_data = None
+
+    @property
+    def alfa(self):
+        return 2.0 / (self.parametros["span"] + 1)
+
+    def _vetor(self, volumes):
+        # Aceita um array na ordem dos tickers ou um dict ticker -> volume (ausentes = NaN)
+        if isinstance(volumes, dict):
+            vetor = np.full(len(self.tickers), np.nan)
+            for ticker, volume in volumes.items():
+                if ticker in self._indice:
+                    vetor[self._indice[ticker]] = volume
+            return vetor
+        vetor = np.asarray(volumes, dtype="float64")
+        if vetor.shape != (len(self.tickers),):
+            raise ValueError(f"Esperado um volume por ticker ({len(self.tickers)}).")
+        return vetor
+
+    def atualizar(self, data, volumes):
+        """
+        Processa um pregão de todos os tickers e devolve os alertas do dia.
+
+        Tickers sem volume (NaN) no pregão não têm o estado alterado.
+
+        Parâmetros:
+        - data (str | Timestamp): Data do pregão.
+        - volumes (array-like | dict): Volume de cada ticker.
+
+        Retorna:
+        - list: Alertas do pregão, como dicts com as chaves de `COLUNAS_EVENTO`.
+        """
+        volumes = self._vetor(volumes)
+        data = pd.Timestamp(data)
+        janela, alfa = self.parametros["janela"], self.alfa
+        ativos = np.flatnonzero(~np.isnan(volumes))
+
+        # Escores contra a base anterior, só para os tickers já aquecidos
+        eventos = []
+        aquecidos = ativos[self._contagem[ativos] >= janela]
+        if len(aquecidos):
+            valores = self._janela[aquecidos]
+            mediana = np.median(valores, axis=1)
+            mad = np.median(np.abs(valores - mediana[:, None]), axis=1)
+            escore_mad, escore_ewma, razao = _escores(volumes[aquecidos], mediana, mad,
+                                                      self._media_log[aquecidos], self._variancia_log[aquecidos])
+            metodos = _classificar(escore_mad, escore_ewma, razao, self.parametros)
+            for j in np.flatnonzero(metodos != ""):
+                eventos.append(dict(zip(COLUNAS_EVENTO, (
+                    self.tickers[aquecidos[j]], data, float(volumes[aquecidos[j]]), float(mediana[j]),
+                    float(razao[j]), float(escore_mad[j]), float(escore_ewma[j]), str(metodos[j]),
+                ))))
+
+        # Atualiza a janela circular e as estatísticas exponenciais (mesmas operações do lote)
+        self._janela[ativos, self._posicao[ativos]] = volumes[ativos]
+        self._posicao[ativos] = (self._posicao[ativos] + 1) % janela
+        log_volume = np.log1p(volumes[ativos])
+        primeiros = self._contagem[ativos] == 0
+        desvio = log_volume - self._media_log[ativos]
+        media = alfa * log_volume + (1 - alfa) * self._media_log[ativos]
+        variancia = (1 - alfa) * alfa * (desvio * desvio) + (1 - alfa) * self._variancia_log[ativos]
+        self._media_log[ativos] = np.where(primeiros, log_volume, media)
+        self._variancia_log[ativos] = np.where(primeiros, 0.0, variancia)
+        self._contagem[ativos] += 1
+        self.ultima_data = data if self.ultima_data is None else max(self.ultima_data, data)
+        return eventos
+
+    def processar(self, datas, volumes):
+        """
+        Processa vários pregões em ordem, um de cada vez.
+
+        Parâmetros:
+        - datas (array-like): Datas dos pregões.
+        - volumes (numpy.ndarray): Matriz (pregões x tickers).
+
+        Retorna:
+        - pandas.DataFrame: Alertas de todos os pregões.
+        """
+        eventos = []
+        for data, linha in zip(datas, np.asarray(volumes, dtype="float64")):
+            eventos.extend(self.atualizar(data, linha))
+        return pd.DataFrame(eventos, columns=COLUNAS_EVENTO)
+
+    def para_dict(self):
+        return {
+            "versao": VERSAO_ESTADO,
+            "tickers": self.tickers,
+            "parametros": self.parametros,
+            "janela": self._janela.tolist(),
+            "posicao": self._posicao.tolist(),
+            "contagem": self._contagem.tolist(),
+            "media_log": self._media_log.tolist(),
+            "variancia_log": self._variancia_log.tolist(),
+            "ultima_data": None if self.ultima_data is None else self.ultima_data.isoformat(),
+        }
+
+    @classmethod
+    def de_dict(cls, estado):
+        detector = cls(estado["tickers"], **estado["parametros"])
+        detector._janela = np.asarray(estado["janela"], dtype="float64").reshape(len(detector.tickers), -1)
+        detector._posicao = np.asarray(estado["posicao"], dtype="int64")
+        detector._contagem = np.asarray(estado["contagem"], dtype="int64")
+        detector._media_log = np.asarray(estado["media_log"], dtype="float64")
+        detector._variancia_log = np.asarray(estado["variancia_log"], dtype="float64")
+        detector.ultima_data = None if estado["ultima_data"] is None else pd.Timestamp(estado["ultima_data"])
+        return detector
+
+
+def _ewma_lote(log_volumes, alfa):
+    # Mesma recorrência do modo contínuo, por filtro recursivo: m[t] = alfa*x[t] + (1-alfa)*m[t-1]
+    media = np.empty(len(log_volumes))
+    variancia = np.zeros(len(log_volumes))
+    if len(log_volumes) == 0:
+        return media, variancia
+    media[0] = log_volumes[0]
+    media[1:], _ = lfilter([alfa], [1.0, -(1 - alfa)], log_volumes[1:], zi=[(1 - alfa) * log_volumes[0]])
+    desvio = log_volumes[1:] - media[:-1]
+    variancia[1:], _ = lfilter([(1 - alfa) * alfa], [1.0, -(1 - alfa)], desvio * desvio, zi=[0.0])
+    return media, variancia
+
+
+def _mediana_mad(volumes, janela):
+    # Mediana e MAD de cada janela [t - janela, t), calculadas por blocos de janelas
+    janelas = sliding_window_view(volumes, janela)[:-1]
+    mediana = np.empty(len(janelas))
+    mad = np.empty(len(janelas))
+    for inicio in range(0, len(janelas), JANELAS_POR_BLOCO):
+        bloco = janelas[inicio:inicio + JANELAS_POR_BLOCO]
+        mediana_bloco = np.median(bloco, axis=1)
+        mediana[inicio:inicio + len(bloco)] = mediana_bloco
+        mad[inicio:inicio + len(bloco)] = np.median(np.abs(bloco - mediana_bloco[:, None]), axis=1)
+    return mediana, mad
+
+
+def detectar_lote(datas, volumes, ticker=particoes.TICKER_PADRAO, janela=JANELA_PADRAO, span=SPAN_EWMA,
+                  limiar_mad=LIMIAR_MAD, limiar_ewma=LIMIAR_EWMA, razao_minima=RAZAO_MINIMA):
+    """
+    Detecta os pregões anômalos de um histórico inteiro, de forma vetorizada.
+
+    Dá os mesmos alertas que o `DetectorVolume` alimentado pregão a pregão.
+
+    Parâmetros:
+    - datas (array-like): Datas em ordem cronológica.
+    - volumes (array-like): Volume de cada pregão (ausentes são ignorados).
+    - ticker (str): Ticker dos alertas.
+    - janela, span, limiar_mad, limiar_ewma, razao_minima: Como no `DetectorVolume`.
+
+    Retorna:
+    - pandas.DataFrame: Alertas, com as colunas de `COLUNAS_EVENTO`.
+    """
+    volumes = np.asarray(volumes, dtype="float64")
+    validos = ~np.isnan(volumes)
+    datas = pd.to_datetime(np.asarray(datas)[validos])
+    volumes = volumes[validos]
+    parametros = {"limiar_mad": limiar_mad, "limiar_ewma": limiar_ewma, "razao_minima": razao_minima}
+    if len(volumes) <= janela:
+        return pd.DataFrame(columns=COLUNAS_EVENTO)
+
+    # A base do pregão t é a janela [t - janela, t), que termina no pregão anterior
+    mediana, mad = _mediana_mad(volumes, janela)
+    media_log, variancia_log = _ewma_lote(np.log1p(volumes), 2.0 / (span + 1))
+
+    atuais = volumes[janela:]
+    escore_mad, escore_ewma, razao = _escores(atuais, mediana, mad, media_log[janela - 1:-1],
+                                              variancia_log[janela - 1:-1])
+    metodos = _classificar(escore_mad, escore_ewma, razao, parametros)
+    alertas = np.flatnonzero(metodos != "")
+    return pd.DataFrame({
+        particoes.COLUNA_TICKER: ticker,
+        carregamento.COLUNA_DATA: datas[janela:][alertas],
+        "Volume": atuais[alertas],
+        "mediana": mediana[alertas],
+        "razao": razao[alertas],
+        "escore_mad": escore_mad[alertas],
+        "escore_ewma": escore_ewma[alertas],
+        "metodo": metodos[alertas],
+    }, columns=COLUNAS_EVENTO)
+
+
+def preparar_detector(dados_por_ticker, coluna_volume="Volume", coluna_data=carregamento.COLUNA_DATA, **parametros):
+    """
+    Monta um detector já posicionado no fim do histórico, sem percorrê-lo pregão a pregão.
+
+    Parâmetros:
+    - dados_por_ticker (dict): Ticker -> DataFrame em ordem cronológica.
+    - coluna_volume (str): Coluna de volume.
+    - coluna_data (str): Nome da coluna de datas.
+    - **parametros: Parâmetros do `DetectorVolume`.
+
+    Retorna:
+    - DetectorVolume: Detector pronto para receber o próximo pregão.
+    """
+    detector = DetectorVolume(list(dados_por_ticker), **parametros)
+    janela = detector.parametros["janela"]
+    for i, dados in enumerate(dados_por_ticker.values()):
+        volumes = dados[coluna_volume].to_numpy(dtype="float64", na_value=np.nan)
+        datas = pd.to_datetime(dados[coluna_data]).to_numpy()[~np.isnan(volumes)]
+        volumes = volumes[~np.isnan(volumes)]
+        if len(volumes) == 0:
+            continue
+        media_log, variancia_log = _ewma_lote(np.log1p(volumes), detector.alfa)
+        # Os últimos volumes ocupam a janela circular na posição em que o modo contínuo os deixaria
+        ultimos = volumes[-janela:]
+        posicoes = np.arange(len(volumes) - len(ultimos), len(volumes)) % janela
+        detector._janela[i, posicoes] = ultimos
+        detector._posicao[i] = len(volumes) % janela
+        detector._contagem[i] = len(volumes)
+        detector._media_log[i], detector._variancia_log[i] = media_log[-1], variancia_log[-1]
+        ultima = pd.Timestamp(datas[-1])
+        detector.ultima_data = ultima if detector.ultima_data is None else max(detector.ultima_data, ultima)
+    return detector
+
+
+def caminho_estado(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho do estado do detector salvo ao lado do CSV processado.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo JSON com o estado.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(caminho_processado.stem + ".anomalias.json")
+
+
+def ler_detector(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Lê o detector salvo.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - DetectorVolume | None: Detector salvo, ou None se não existe ou é de outra versão.
+    """
+    try:
+        with open(caminho_estado(caminho_processado), encoding="utf-8") as arquivo:
+            estado = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return DetectorVolume.de_dict(estado) if estado.get("versao") == VERSAO_ESTADO else None
+
+
+def salvar_detector(detector, caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Grava o estado do detector com troca atômica do arquivo.
+
+    Parâmetros:
+    - detector (DetectorVolume): Detector a ser salvo.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    """
+    destino = caminho_estado(caminho_processado)
+    temporario = destino.with_name(destino.name + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(detector.para_dict(), arquivo)
+    os.replace(temporario, destino)
+
+
+def exportar_sqlite(eventos, caminho_banco, tabela=TABELA_SQL):
+    """
+    Grava os alertas como tabela SQLite, para consultas como `sql/advanced_queries/volume_diario.sql`.
+
+    Parâmetros:
+    - eventos (pandas.DataFrame): Alertas de `detectar_lote` ou do `DetectorVolume`.
+    - caminho_banco (str | Path): Caminho do banco SQLite.
+    - tabela (str): Nome da tabela de destino (substituída a cada exportação).
+
+    Retorna:
+    - int: Quantidade de linhas exportadas.
+    """
+    tabela_eventos = eventos.rename(columns={particoes.COLUNA_TICKER: "ticker", carregamento.COLUNA_DATA: "date",
+                                             "Volume": "volume"})
+    tabela_eventos["date"] = pd.to_datetime(tabela_eventos["date"]).dt.strftime("%Y-%m-%d")
+    # closing fecha a conexão; o `with conexao` só confirma a transação
+    with closing(sqlite3.connect(caminho_banco)) as conexao, conexao:
+        tabela_eventos.to_sql(tabela, conexao, if_exists="replace", index=False)
+        conexao.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_date ON {tabela}(date)")
+    return len(tabela_eventos)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Detecção de volume anômalo com base causal.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--tickers", nargs="*", default=None,
+                        help="Tickers lidos do conjunto particionado, em vez do CSV processado.")
+    parser.add_argument("--janela", type=int, default=JANELA_PADRAO, help="Pregões da mediana/MAD móveis.")
+    parser.add_argument("--span", type=int, default=SPAN_EWMA, help="Span da média exponencial.")
+    parser.add_argument("--banco", help="Banco SQLite para exportar a tabela de alertas.")
+    parser.add_argument("--top", type=int, default=10, help="Alertas mais recentes exibidos.")
+    args = parser.parse_args(argumentos)
+
+    if args.tickers is not None:
+        dados_por_ticker = multiplos_tickers.carregar_tickers(args.tickers or None)
+    else:
+        dados_por_ticker = {particoes.TICKER_PADRAO: carregamento.carregar_dados(args.processado)}
+    if not dados_por_ticker:
+        print("⚠️ Nenhum ticker encontrado")
+        return
+
+    eventos = pd.concat([
+        detectar_lote(dados[carregamento.COLUNA_DATA], dados["Volume"], ticker, args.janela, args.span)
+        for ticker, dados in dados_por_ticker.items()
+    ], ignore_index=True).sort_values([carregamento.COLUNA_DATA, particoes.COLUNA_TICKER], ignore_index=True)
+    print(f"✅ {len(eventos)} pregões com volume anômalo em {len(dados_por_ticker)} ticker(s)")
+    print(eventos.tail(args.top).to_string(index=False))
+
+    # O estado do detector contínuo fica salvo para a ingestão emitir os alertas dos próximos pregões
+    if args.tickers is None:
+        detector = preparar_detector(dados_por_ticker, janela=args.janela, span=args.span)
+        try:
+            salvar_detector(detector, args.processado)
+        except OSError:
+            # Sem permissão de escrita o detector continua disponível, apenas sem ser salvo
+            pass
+    if args.banco:
+        linhas = exportar_sqlite(eventos, args.banco)
+        print(f"✅ {linhas} alertas exportados para a tabela '{TABELA_SQL}' em '{args.banco}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento
+
+COLUNAS_OHLCV = ["Date", "Open", "High", "Low", "Close", "Adj Close", "Volume"]
+DIRETORIO_ARMAZEM = carregamento.DIRETORIO_CACHE / "ohlcv"
+
+# Armazéns já abertos neste processo, por (arquivo de origem, versão dos dados); só a versão
+# mais recente de cada arquivo é mantida
+_ARMAZENS_ABERTOS = {}
+
+
+class ArmazemOHLCV:
+    """
+    Colunas OHLCV gravadas como arrays .npy contíguos e abertas com mapeamento em memória.
+
+    Os arrays são somente leitura: todas as sessões do Streamlit e todos os processos que
+    abrem a mesma versão compartilham as páginas do arquivo pelo cache do sistema
+    operacional, sem cópias por sessão.
+
+    Parâmetros:
+    - diretorio (str | Path): Pasta de uma versão do armazém, criada por `construir_armazem`.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        with open(self.diretorio / "manifesto.json", encoding="utf-8") as arquivo:
+            manifesto = json.load(arquivo)
+
+        self.versao = manifesto["versao"]
+        self.colunas = list(manifesto["arquivos"])
+        self._linhas = manifesto["linhas"]
+
+        # Arquivos vazios não podem ser mapeados em memória
+        modo = "r" if self._linhas > 0 else None
+        self._arrays = {
+            coluna: np.load(self.diretorio / nome_arquivo, mmap_mode=modo)
+            for coluna, nome_arquivo in manifesto["arquivos"].items()
+        }
+
+    def __len__(self):
+        return self._linhas
+
+    def __contains__(self, coluna):
+        return coluna in self._arrays
+
+    def __getitem__(self, coluna):
+        return self._arrays[coluna]
+
+    def visao(self):
+        """
+        Cria uma visão da sessão sobre o armazém completo.
+
+        Retorna:
+        - VisaoOHLCV: Visão sem cópia das colunas base.
+        """
+        return VisaoOHLCV(self)
+
+
+class VisaoOHLCV:
+    """
+    Visão de uma sessão sobre um `ArmazemOHLCV`.
+
+    As colunas base são entregues como `pandas.Series` que apontam para os arrays mapeados,
+    sem cópia. Colunas derivadas (ex.: 'Diferenca', 'MM7') ficam guardadas apenas nesta
+    visão, de modo que cada página acrescenta as suas sem afetar as demais sessões.
+
+    Parâmetros:
+    - armazem (ArmazemOHLCV): Armazém de origem.
+    - inicio (int): Primeira linha da visão.
+    - fim (int, opcional): Linha final (exclusiva) da visão.
+    """
+
+    def __init__(self, armazem, inicio=0, fim=None):
+        self._armazem = armazem
+        self._fatia = slice(inicio, len(armazem) if fim is None else fim)
+        self._derivadas = {}
+
+    @property
+    def colunas(self):
+        return self._armazem.colunas + list(self._derivadas)
+
+    def __len__(self):
+        return self._fatia.stop - self._fatia.start
+
+    def __contains__(self, coluna):
+        return coluna in self._derivadas or coluna in self._armazem
+
+    def __getitem__(self, coluna):
+        if coluna in self._derivadas:
+            return self._derivadas[coluna]
+        if coluna not in self._armazem:
+            raise KeyError(coluna)
+        return pd.Series(self._armazem[coluna][self._fatia], name=coluna, copy=False)
+
+    def __setitem__(self, coluna, valores):
+        if coluna in self._armazem:
+            raise ValueError(f"A coluna base '{coluna}' é somente leitura.")
+
+        serie = valores if isinstance(valores, pd.Series) else pd.Series(valores, copy=False)
+        if len(serie) != len(self):
+            raise ValueError(f"A coluna '{coluna}' tem {len(serie)} linhas; a visão tem {len(self)}.")
+        self._derivadas[coluna] = serie.rename(coluna)
+
+    def periodo(self, inicio=None, fim=None, coluna_data="Date"):
+        """
+        Restringe a visão a um intervalo de datas por busca binária, sem copiar os dados.
+
+        Parâmetros:
+        - inicio (str | datetime, opcional): Data inicial (inclusiva).
+        - fim (str | datetime, opcional): Data final (inclusiva).
+        - coluna_data (str): Coluna de datas, ordenada de forma crescente.
+
+        Retorna:
+        - VisaoOHLCV: Nova visão sobre o intervalo, sem as colunas derivadas desta.
+        """
+        datas = self._armazem[coluna_data][self._fatia]
+        primeira = 0 if inicio is None else np.searchsorted(datas, np.datetime64(pd.Timestamp(inicio)), side="left")
+        ultima = len(datas) if fim is None else np.searchsorted(datas, np.datetime64(pd.Timestamp(fim)), side="right")
+        base = self._fatia.start
+        return VisaoOHLCV(self._armazem, base + int(primeira), base + int(ultima))
+
+    def nlargest(self, n, coluna, colunas=("Date",)):
+        """
+        Retorna as `n` linhas com os maiores valores de `coluna`, copiando apenas essas linhas.
+
+        Parâmetros:
+        - n (int): Quantidade de linhas.
+        - coluna (str): Coluna usada na ordenação.
+        - colunas (tuple): Colunas adicionais incluídas no resultado.
+
+        Retorna:
+        - pandas.DataFrame: DataFrame com as `n` linhas selecionadas.
+        """
+        posicoes = self[coluna].nlargest(n).index.to_numpy()
+        return pd.DataFrame({nome: self[nome].to_numpy()[posicoes] for nome in [*colunas, coluna]})
+
+    def para_dataframe(self, colunas=None):
+        """
+        Copia as colunas pedidas para um DataFrame, para uso em gráficos e agrupamentos.
+
+        Parâmetros:
+        - colunas (list, opcional): Colunas desejadas. Se None, usa todas.
+
+        Retorna:
+        - pandas.DataFrame: DataFrame com as colunas selecionadas.
+        """
+        if colunas is None:
+            colunas = self.colunas
+        return pd.DataFrame({coluna: self[coluna].to_numpy() for coluna in colunas})
+
+
+def construir_armazem(dados, destino, versao=None, colunas=COLUNAS_OHLCV, origem=None):
+    """
+    Grava as colunas OHLCV de um DataFrame como arrays .npy contíguos.
+
+    Parâmetros:
+    - dados (pandas.DataFrame): Dados ordenados por data.
+    - destino (str | Path): Pasta da versão a ser criada.
+    - versao (str, opcional): Identificador da versão dos dados.
+    - colunas (list): Colunas a serem gravadas.
+    - origem (str | Path, opcional): Arquivo de origem, registrado no manifesto para que só as
+      versões antigas do mesmo arquivo sejam removidas.
+
+    Retorna:
+    - Path: Pasta criada.
+    """
+    destino = Path(destino)
+    faltantes = [coluna for coluna in colunas if coluna not in dados.columns]
+    if faltantes:
+        raise ValueError(f"Colunas inválidas: {faltantes}")
+
+    # A versão é montada numa pasta temporária e publicada com uma única renomeação
+    temporario = destino.with_name(f"{destino.name}.tmp-{os.getpid()}")
+    temporario.mkdir(parents=True, exist_ok=True)
+
+    arquivos = {}
+    for coluna in colunas:
+        nome_arquivo = coluna.replace(" ", "_") + ".npy"
+        np.save(temporario / nome_arquivo, np.ascontiguousarray(dados[coluna].to_numpy()))
+        arquivos[coluna] = nome_arquivo
+
+    with open(temporario / "manifesto.json", "w", encoding="utf-8") as arquivo:
+        json.dump({"versao": versao, "linhas": len(dados), "arquivos": arquivos,
+                   "origem": None if origem is None else str(Path(origem).resolve())}, arquivo, indent=2)
+
+    try:
+        os.replace(temporario, destino)
+    except OSError:
+        # Outro processo publicou a mesma versão primeiro
+        shutil.rmtree(temporario, ignore_errors=True)
+        if not (destino / "manifesto.json").exists():
+            raise
+    return destino
+
+
+def _remover_versoes_antigas(origem, atual, diretorio):
+    # Remove as outras versões do mesmo arquivo de origem (e as de manifestos antigos, sem origem).
+    # A pasta é renomeada antes de apagada: se algum arquivo ainda estiver mapeado (Windows), a
+    # renomeação falha e a versão fica para a próxima limpeza, inteira
+    for pasta in Path(diretorio).iterdir():
+        if not pasta.is_dir() or pasta == atual or ".tmp-" in pasta.name:
+            continue
+        if ".remover-" not in pasta.name:
+            try:
+                with open(pasta / "manifesto.json", encoding="utf-8") as arquivo:
+                    manifesto = json.load(arquivo)
+            except (OSError, ValueError):
+                continue
+            if manifesto.get("origem") not in (None, origem):
+                continue
+            descartada = pasta.with_name(f"{pasta.name}.remover-{os.getpid()}")
+            try:
+                os.replace(pasta, descartada)
+            except OSError:
+                continue
+            pasta = descartada
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def abrir_armazem(caminho_arquivo=carregamento.CAMINHO_PROCESSADO, diretorio=DIRETORIO_ARMAZEM):
+    """
+    Abre (criando, se preciso) o armazém mapeado em memória da versão atual do CSV processado.
+
+    O armazém de cada versão é aberto uma única vez por processo e compartilhado por todas
+    as chamadas seguintes; quando o CSV muda, uma nova versão é gravada e as versões antigas
+    do mesmo arquivo são removidas do disco e da memória do processo.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): Caminho do CSV processado.
+    - diretorio (str | Path): Pasta raiz dos armazéns.
+
+    Retorna:
+    - ArmazemOHLCV: Armazém da versão atual dos dados.
+    """
+    # Garante o snapshot do carregamento, que guarda o hash usado como versão
+    if carregamento.validar_snapshot(caminho_arquivo) is None:
+        carregamento.carregar_dados(caminho_arquivo)
+    versao = carregamento.versao_dados(caminho_arquivo)
+
+    chave = (str(Path(caminho_arquivo).resolve()), versao)
+    if chave in _ARMAZENS_ABERTOS:
+        return _ARMAZENS_ABERTOS[chave]
+
+    destino = Path(diretorio) / versao[:16]
+    if not (destino / "manifesto.json").exists():
+        construir_armazem(carregamento.carregar_dados(caminho_arquivo), destino, versao=versao, origem=chave[0])
+
+    armazem = ArmazemOHLCV(destino)
+    # Esquece as versões anteriores do mesmo arquivo: o mapeamento é liberado quando a última
+    # visão que ainda aponta para elas deixa de existir
+    for anterior in [aberta for aberta in _ARMAZENS_ABERTOS if aberta[0] == chave[0]]:
+        del _ARMAZENS_ABERTOS[anterior]
+    _ARMAZENS_ABERTOS[chave] = armazem
+    _remover_versoes_antigas(chave[0], destino, diretorio)
+    return armazem
@@ -0,0 +1,298 @@
+"""
+Backtest vetorizado da estratégia de cruzamento de médias móveis e varredura de janelas.
+
+Mede a recomendação da página de médias móveis ("Comprar em cruzamentos ascendentes /
+Vender parcial em cruzamentos descendentes"), que até aqui não era avaliada. Todo o caminho
+sinal -> posição -> resultado com custos é feito com operações sobre matrizes (pregões x
+pares de janelas), sem laço por pregão:
+
+- sinal: média curta acima da longa (as médias de todas as janelas saem de uma única
+  chamada a `medias_moveis.banco_medias_moveis`);
+- posição: 1 acima da longa e `exposicao_baixa` abaixo dela (0 = venda total), aplicada no
+  pregão seguinte ao sinal;
+- resultado: posição x retorno do pregão, menos `custo` por unidade negociada.
+
+A varredura distribui os pares de janelas em lotes entre os processos de um
+`ProcessPoolExecutor`; cada processo calcula o banco de médias uma única vez, ao iniciar.
+
+Uso:
+    python -m uber_stocks.backtest --curta 7 --longa 30
+    python -m uber_stocks.backtest --grade --janela-minima 2 --janela-maxima 200 --saida varredura.csv
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento, medias_moveis
+
+COLUNA_PRECO = "Close"
+CUSTO_PADRAO = 0.001
+EXPOSICAO_BAIXA_PADRAO = 0.0
+PREGOES_ANO = 252
+PARES_POR_LOTE = 1_000
+METRICAS = ("retorno_total", "retorno_anual", "volatilidade_anual", "sharpe", "max_drawdown", "giro_anual",
+            "negociacoes", "exposicao_media")
+
+# Estado de cada processo da varredura, preenchido uma vez por `_iniciar_processo`
+_ESTADO = {}
+
+
+def calcular_retornos(precos):
+    """
+    Retornos simples diários; pregões sem preço repetem o último preço conhecido (retorno 0).
+
+    Parâmetros:
+    - precos (array-like): Preços em ordem cronológica.
+
+    Retorna:
+    - numpy.ndarray: Retorno de cada pregão (0 no primeiro).
+    """
+    precos = pd.Series(np.asarray(precos, dtype="float64")).ffill().to_numpy()
+    retornos = np.zeros(len(precos))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        retornos[1:] = precos[1:] / precos[:-1] - 1
+    retornos[~np.isfinite(retornos)] = 0.0
+    return retornos
+
+
+def posicoes_cruzamento(media_curta, media_longa, exposicao_baixa=EXPOSICAO_BAIXA_PADRAO):
+    """
+    Posição mantida em cada pregão para cada par de médias.
+
+    O sinal do fechamento de um pregão é executado nesse fechamento, então a posição só
+    rende a partir do pregão seguinte. Enquanto alguma das médias não está definida a
+    posição é zero.
+
+    Parâmetros:
+    - media_curta (numpy.ndarray): Médias curtas, (pregões,) ou (pregões x pares).
+    - media_longa (numpy.ndarray): Médias longas, com a mesma forma.
+    - exposicao_baixa (float): Fração mantida com a curta abaixo da longa (0 = venda total).
+
+    Retorna:
+    - numpy.ndarray: Posição de cada pregão, com a forma das médias.
+    """
+    validas = ~(np.isnan(media_curta) | np.isnan(media_longa))
+    alvo = np.where(validas, np.where(media_curta > media_longa, 1.0, exposicao_baixa), 0.0)
+    posicoes = np.zeros_like(alvo)
+    posicoes[1:] = alvo[:-1]
+    return posicoes
+
+
+def simular(retornos, posicoes, custo=CUSTO_PADRAO):
+    """
+    Resultado diário das posições, descontando o custo de cada negociação.
+
+    Parâmetros:
+    - retornos (numpy.ndarray): Retorno de cada pregão, (pregões,).
+    - posicoes (numpy.ndarray): Posições, (pregões,) ou (pregões x pares).
+    - custo (float): Custo por unidade negociada (ex.: 0.001 = 10 pontos-base).
+
+    Retorna:
+    - numpy.ndarray: Retorno da estratégia em cada pregão, com a forma de `posicoes`.
+    - numpy.ndarray: Quantidade negociada em cada pregão.
+    """
+    retornos = np.asarray(retornos, dtype="float64")
+    if posicoes.ndim == 2:
+        retornos = retornos[:, None]
+    negociado = np.abs(np.diff(posicoes, axis=0, prepend=0.0))
+    return posicoes * retornos - custo * negociado, negociado
+
+
+def calcular_metricas(resultado, posicoes, negociado, pregoes_ano=PREGOES_ANO):
+    """
+    Métricas de desempenho de uma ou várias estratégias, vetorizadas sobre as colunas.
+
+    Parâmetros:
+    - resultado (numpy.ndarray): Retorno diário da estratégia, (pregões,) ou (pregões x pares).
+    - posicoes (numpy.ndarray): Posições, com a mesma forma.
+    - negociado (numpy.ndarray): Quantidade negociada, com a mesma forma.
+    - pregoes_ano (int): Pregões por ano, usados na anualização.
+
+    Retorna:
+    - dict: Métrica -> valor (float) ou array com um valor por coluna.
+    """
+    pregoes = len(resultado)
+    anos = pregoes / pregoes_ano
+    crescimento = np.cumprod(1 + resultado, axis=0)
+    pico = np.maximum.accumulate(np.maximum(crescimento, 1.0), axis=0)
+    media = resultado.mean(axis=0)
+    desvio = resultado.std(axis=0, ddof=1) if pregoes > 1 else np.full_like(media, np.nan)
+    total = crescimento[-1] - 1
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "retorno_total": total,
+            "retorno_anual": np.maximum(1 + total, 0.0) ** (1 / anos) - 1,
+            "volatilidade_anual": desvio * np.sqrt(pregoes_ano),
+            "sharpe": np.where(desvio > 0, media / desvio * np.sqrt(pregoes_ano), np.nan),
+            "max_drawdown": (crescimento / pico - 1).min(axis=0),
+            "giro_anual": negociado.sum(axis=0) / anos,
+            "negociacoes": np.count_nonzero(negociado, axis=0),
+            "exposicao_media": posicoes.mean(axis=0),
+        }
+
+
+def backtest_cruzamento(dados, curta=7, longa=30, custo=CUSTO_PADRAO, exposicao_baixa=EXPOSICAO_BAIXA_PADRAO,
+                        coluna_preco=COLUNA_PRECO, coluna_data=carregamento.COLUNA_DATA):
+    """
+    Backtest de um único par de janelas, com o resultado de cada pregão.
+
+    Parâmetros:
+    - dados (pandas.DataFrame): Dados em ordem cronológica.
+    - curta (int): Janela da média curta.
+    - longa (int): Janela da média longa.
+    - custo (float): Custo por unidade negociada.
+    - exposicao_baixa (float): Fração mantida com a curta abaixo da longa.
+    - coluna_preco (str): Coluna de preço.
+    - coluna_data (str): Nome da coluna de datas.
+
+    Retorna:
+    - pandas.DataFrame: Date, Posicao, Retorno (do ativo), Resultado e Patrimonio (base 1).
+    - dict: Métricas da estratégia.
+    """
+    if curta >= longa:
+        raise ValueError("A janela curta deve ser menor que a longa.")
+    precos = dados[coluna_preco].to_numpy(dtype="float64", na_value=np.nan)
+    retornos = calcular_retornos(precos)
+    medias = medias_moveis.banco_medias_moveis(pd.Series(precos).ffill(), [curta, longa], "simples")
+    posicoes = posicoes_cruzamento(medias[:, 0], medias[:, 1], exposicao_baixa)
+    resultado, negociado = simular(retornos, posicoes, custo)
+
+    diario = pd.DataFrame({
+        coluna_data: dados[coluna_data].to_numpy(),
+        "Posicao": posicoes,
+        "Retorno": retornos,
+        "Resultado": resultado,
+        "Patrimonio": np.cumprod(1 + resultado),
+    })
+    metricas = {nome: float(valor) for nome, valor in calcular_metricas(resultado, posicoes, negociado).items()}
+    return diario, metricas
+
+
+def pares_grade(janelas_curtas, janelas_longas):
+    """
+    Todos os pares (curta, longa) da grade com curta < longa.
+
+    Parâmetros:
+    - janelas_curtas (iterable): Janelas candidatas à média curta.
+    - janelas_longas (iterable): Janelas candidatas à média longa.
+
+    Retorna:
+    - numpy.ndarray: Matriz (pares x 2).
+    """
+    curtas, longas = np.meshgrid(np.unique(list(janelas_curtas)), np.unique(list(janelas_longas)), indexing="ij")
+    pares = np.column_stack([curtas.ravel(), longas.ravel()]).astype("int64")
+    return pares[pares[:, 0] < pares[:, 1]]
+
+
+def _iniciar_processo(precos, janelas, custo, exposicao_baixa):
+    # Uma vez por processo: retornos e o banco com as médias de todas as janelas da grade
+    _ESTADO["retornos"] = calcular_retornos(precos)
+    _ESTADO["medias"] = np.asfortranarray(
+        medias_moveis.banco_medias_moveis(pd.Series(precos).ffill(), janelas, "simples"))
+    _ESTADO["coluna"] = {int(janela): i for i, janela in enumerate(janelas)}
+    _ESTADO["custo"] = custo
+    _ESTADO["exposicao_baixa"] = exposicao_baixa
+
+
+def _avaliar_lote(pares):
+    # Métricas de um lote de pares, todas as colunas de uma vez
+    medias, coluna = _ESTADO["medias"], _ESTADO["coluna"]
+    curtas = medias[:, [coluna[janela] for janela in pares[:, 0]]]
+    longas = medias[:, [coluna[janela] for janela in pares[:, 1]]]
+    posicoes = posicoes_cruzamento(curtas, longas, _ESTADO["exposicao_baixa"])
+    resultado, negociado = simular(_ESTADO["retornos"], posicoes, _ESTADO["custo"])
+    return pares, calcular_metricas(resultado, posicoes, negociado)
+
+
+def varrer_grade(precos, janelas_curtas, janelas_longas, custo=CUSTO_PADRAO,
+                 exposicao_baixa=EXPOSICAO_BAIXA_PADRAO, processos=None, pares_por_lote=PARES_POR_LOTE):
+    """
+    Avalia todos os pares de janelas da grade, distribuindo os lotes entre processos.
+
+    Parâmetros:
+    - precos (array-like): Preços em ordem cronológica.
+    - janelas_curtas (iterable): Janelas candidatas à média curta.
+    - janelas_longas (iterable): Janelas candidatas à média longa.
+    - custo (float): Custo por unidade negociada.
+    - exposicao_baixa (float): Fração mantida com a curta abaixo da longa.
+    - processos (int, opcional): Quantidade de processos. Se None, um por núcleo.
+    - pares_por_lote (int): Pares avaliados juntos em cada tarefa.
+
+    Retorna:
+    - pandas.DataFrame: Uma linha por par (curta, longa) com as métricas, do maior ao menor Sharpe.
+    """
+    precos = np.asarray(precos, dtype="float64")
+    pares = pares_grade(janelas_curtas, janelas_longas)
+    if len(pares) == 0:
+        return pd.DataFrame(columns=["curta", "longa", *METRICAS])
+    janelas = np.unique(pares)
+    lotes = [pares[inicio:inicio + pares_por_lote] for inicio in range(0, len(pares), pares_por_lote)]
+    processos = processos or os.cpu_count() or 1
+
+    argumentos_inicio = (precos, janelas, custo, exposicao_baixa)
+    if processos == 1 or len(lotes) == 1:
+        _iniciar_processo(*argumentos_inicio)
+        try:
+            partes = [_avaliar_lote(lote) for lote in lotes]
+        finally:
+            _ESTADO.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(lotes)), initializer=_iniciar_processo,
+                                 initargs=argumentos_inicio) as executor:
+            partes = list(executor.map(_avaliar_lote, lotes))
+
+    tabela = pd.concat([
+        pd.DataFrame({"curta": lote[:, 0], "longa": lote[:, 1], **metricas}) for lote, metricas in partes
+    ], ignore_index=True)
+    return tabela.sort_values("sharpe", ascending=False, na_position="last", ignore_index=True)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Backtest da estratégia de cruzamento de médias móveis.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--curta", type=int, default=7, help="Janela da média curta.")
+    parser.add_argument("--longa", type=int, default=30, help="Janela da média longa.")
+    parser.add_argument("--custo", type=float, default=CUSTO_PADRAO, help="Custo por unidade negociada.")
+    parser.add_argument("--exposicao-baixa", type=float, default=EXPOSICAO_BAIXA_PADRAO,
+                        help="Fração mantida após um cruzamento descendente (0 = venda total).")
+    parser.add_argument("--grade", action="store_true", help="Varre todos os pares de janelas da grade.")
+    parser.add_argument("--janela-minima", type=int, default=2, help="Menor janela da grade.")
+    parser.add_argument("--janela-maxima", type=int, default=200, help="Maior janela da grade.")
+    parser.add_argument("--processos", type=int, default=None, help="Processos da varredura (padrão: um por núcleo).")
+    parser.add_argument("--top", type=int, default=10, help="Pares exibidos da varredura.")
+    parser.add_argument("--saida", default=None, help="CSV onde gravar a tabela da varredura.")
+    args = parser.parse_args(argumentos)
+
+    dados = carregamento.carregar_dados(args.processado)
+    precos = dados[COLUNA_PRECO].to_numpy(dtype="float64", na_value=np.nan)
+    retornos = calcular_retornos(precos)
+    # Referência: comprar no primeiro pregão e manter até o fim, sem custos
+    manter = np.ones_like(retornos)
+    resultado, negociado = simular(retornos, manter, 0.0)
+    referencia = {nome: float(valor) for nome, valor in calcular_metricas(resultado, manter, negociado).items()}
+
+    if not args.grade:
+        _, metricas = backtest_cruzamento(dados, args.curta, args.longa, args.custo, args.exposicao_baixa)
+        tabela = pd.DataFrame({f"MM{args.curta} x MM{args.longa}": metricas, "Comprar e manter": referencia})
+        print(tabela.to_string())
+        return
+
+    janelas = range(args.janela_minima, args.janela_maxima + 1)
+    inicio = time.perf_counter()
+    tabela = varrer_grade(precos, janelas, janelas, args.custo, args.exposicao_baixa, args.processos)
+    duracao = time.perf_counter() - inicio
+    print(f"✅ {len(tabela):,} pares avaliados em {duracao:.2f}s sobre {len(precos):,} pregões")
+    print(f"Comprar e manter: Sharpe {referencia['sharpe']:.2f} | drawdown máximo {referencia['max_drawdown']:.1%}")
+    print(tabela.head(args.top).to_string(index=False))
+    if args.saida:
+        tabela.to_csv(args.saida, index=False)
+        print(f"✅ Varredura salva em '{args.saida}'")
+
+
+if __name__ == "__main__":
+    main()
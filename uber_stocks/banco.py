@@ -0,0 +1,411 @@
+"""
+Carga do CSV processado num banco SQLite e aplicação dos scripts de `sql/` como migrações.
+
+Os scripts de `sql/` supõem uma tabela `uber_stocks` que nada criava nem carregava, e os de
+otimização e de tabelas auxiliares precisam rodar numa ordem definida. Aqui:
+
+- a carga lê o CSV em lotes e insere cada lote com um único `executemany`, numa transação
+  por lote, com o banco em modo WAL; os índices só são criados depois da carga, pelas
+  migrações, em vez de atualizados linha a linha durante a inserção;
+- as migrações rodam na ordem de `MIGRACOES`, cada script numa transação junto com o seu
+  registro em `migracoes_aplicadas`: rodar de novo pula o que já foi aplicado, e um script
+  alterado depois de aplicado é recusado em vez de aplicado pela metade;
+- a carga em modo de acréscimo insere só os pregões posteriores ao último do banco e refaz
+  as tabelas auxiliares (`TABELAS_DERIVADAS`) com o script mais recente já aplicado de cada uma;
+- as tabelas `anomalias_volume` e `ranking_dias`, lidas por `sql/advanced_queries/volume_diario.sql`
+  e `ranking_dias.sql`, são refeitas a cada carga a partir do histórico do banco
+  (`exportar_anomalias` e `exportar_ranking`).
+
+Uso:
+    python -m uber_stocks.banco --banco data/uber_stocks.db
+    python -m uber_stocks.banco --banco data/uber_stocks.db --sem-carga   # só as migrações pendentes
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, event
+
+from uber_stocks import anomalias, carregamento, ranking
+
+CAMINHO_BANCO = carregamento.RAIZ_PROJETO / "data" / "uber_stocks.db"
+DIRETORIO_SQL = carregamento.RAIZ_PROJETO / "sql"
+TABELA = "uber_stocks"
+TABELA_MIGRACOES = "migracoes_aplicadas"
+TAMANHO_LOTE = 200_000
+
+# Ordem de aplicação: nomes em snake_case, índice por data, colunas e índices de ano/mês,
+# visão por ano, tabelas auxiliares e, por fim, a visão e as tabelas refeitas sobre as faixas
+# de datas e as colunas geradas. Scripts já aplicados não são editados: mudanças entram como
+# novas migrações no fim da lista.
+MIGRACOES = (
+    "optimization_examples/snake_case.sql",
+    "optimization_examples/indice_date.sql",
+    "optimization_examples/colunas_data.sql",
+    "optimization_examples/indice_ano.sql",
+    "optimization_examples/dados_ano.sql",
+    "table_creation_scripts/media_mensal.sql",
+    "table_creation_scripts/variacao_diaria.sql",
+    "table_creation_scripts/volume_medio.sql",
+    "optimization_examples/dados_ano_faixa.sql",
+    "optimization_examples/media_mensal_ano_mes.sql",
+    "optimization_examples/volume_medio_ano.sql",
+)
+
+# Tabelas auxiliares calculadas sobre `uber_stocks` e os scripts que as criam, do mais antigo ao
+# mais recente; no acréscimo de linhas, cada tabela é refeita pelo último script já aplicado
+TABELAS_DERIVADAS = {
+    "media_mensal_fechamento": ("table_creation_scripts/media_mensal.sql",
+                                "optimization_examples/media_mensal_ano_mes.sql"),
+    "variacao_diaria_preco": ("table_creation_scripts/variacao_diaria.sql",),
+    "volume_medio_anual": ("table_creation_scripts/volume_medio.sql", "optimization_examples/volume_medio_ano.sql"),
+}
+
+# Tipos SQLite das colunas do CSV processado; as demais colunas são numéricas
+TIPOS_COLUNAS = {carregamento.COLUNA_DATA: "TEXT", "Volume": "INTEGER"}
+
+
+def criar_engine(caminho_banco=CAMINHO_BANCO):
+    """
+    Cria a engine SQLAlchemy do banco, em modo WAL e com transações explícitas.
+
+    O driver `sqlite3` só abre transações antes de comandos DML; aqui cada `begin()` emite
+    um BEGIN, para que DDL e carga fiquem de fato dentro da transação.
+
+    Parâmetros:
+    - caminho_banco (str | Path): Caminho do banco SQLite.
+
+    Retorna:
+    - sqlalchemy.engine.Engine: Engine do banco.
+    """
+    Path(caminho_banco).parent.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(f"sqlite:///{Path(caminho_banco)}")
+
+    @event.listens_for(engine, "connect")
+    def _configurar(conexao_dbapi, _registro):
+        conexao_dbapi.isolation_level = None
+        cursor = conexao_dbapi.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Com WAL, NORMAL só perde as últimas transações numa queda de energia, sem corromper o banco
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _iniciar(conexao):
+        conexao.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def _normalizar(nome):
+    # 'Adj Close' e 'adj_close' são a mesma coluna antes e depois de `snake_case.sql`
+    return nome.strip().lower().replace(" ", "_")
+
+
+def _colunas_tabela(conexao, tabela):
+    return [linha[1] for linha in conexao.exec_driver_sql(f'PRAGMA table_info("{tabela}")')]
+
+
+def _preparar_tabela(conexao, tabela, colunas):
+    # Cria a tabela com os nomes do CSV, ou associa as colunas do CSV às de uma tabela existente
+    existentes = _colunas_tabela(conexao, tabela)
+    if not existentes:
+        definicoes = ", ".join(f'"{coluna}" {TIPOS_COLUNAS.get(coluna, "REAL")}' for coluna in colunas)
+        conexao.exec_driver_sql(f'CREATE TABLE "{tabela}" ({definicoes})')
+        return list(colunas)
+    por_nome = {_normalizar(coluna): coluna for coluna in existentes}
+    faltando = [coluna for coluna in colunas if _normalizar(coluna) not in por_nome]
+    if faltando:
+        raise ValueError(f"Colunas ausentes na tabela '{tabela}': {faltando}")
+    return [por_nome[_normalizar(coluna)] for coluna in colunas]
+
+
+def inserir_lotes(engine, lotes, tabela=TABELA):
+    """
+    Insere lotes de linhas na tabela, um `executemany` e uma transação por lote.
+
+    A tabela é criada a partir das colunas do primeiro lote se ainda não existir. Valores
+    ausentes (NaN) são gravados como NULL.
+
+    Parâmetros:
+    - engine (sqlalchemy.engine.Engine): Engine de `criar_engine`.
+    - lotes (iterable): DataFrames com as colunas do CSV processado.
+    - tabela (str): Tabela de destino.
+
+    Retorna:
+    - int: Quantidade de linhas inseridas.
+
+    Lança:
+    - ValueError: Se a tabela existente não tiver alguma coluna dos lotes.
+    """
+    total = 0
+    comando = None
+    for lote in lotes:
+        if lote.empty:
+            continue
+        if comando is None:
+            with engine.begin() as conexao:
+                colunas = _preparar_tabela(conexao, tabela, list(lote.columns))
+            nomes = ", ".join(f'"{coluna}"' for coluna in colunas)
+            comando = f'INSERT INTO "{tabela}" ({nomes}) VALUES ({", ".join("?" * len(colunas))})'
+
+        # Tuplas de tipos nativos montadas por coluna, sem iterar o DataFrame linha a linha
+        valores = []
+        for coluna in lote.columns:
+            serie = lote[coluna]
+            if coluna == carregamento.COLUNA_DATA and not pd.api.types.is_string_dtype(serie):
+                serie = pd.to_datetime(serie).dt.strftime("%Y-%m-%d")
+            valores.append(serie.astype(object).where(serie.notna(), None).tolist())
+        with engine.begin() as conexao:
+            conexao.exec_driver_sql(comando, list(zip(*valores)))
+        total += len(lote)
+    return total
+
+
+def dividir_comandos(script):
+    """
+    Divide um script SQL em comandos completos, sem depender de ';' dentro de literais.
+
+    Parâmetros:
+    - script (str): Script SQL.
+
+    Retorna:
+    - list: Comandos do script, na ordem.
+    """
+    comandos, atual = [], ""
+    for linha in script.splitlines(keepends=True):
+        atual += linha
+        if sqlite3.complete_statement(atual):
+            comandos.append(atual.strip())
+            atual = ""
+    # Sobra sem ';' final: vale como comando se não for só comentário
+    resto = "".join(linha for linha in atual.splitlines(keepends=True) if not linha.strip().startswith("--"))
+    if resto.strip():
+        comandos.append(resto.strip())
+    return comandos
+
+
+def aplicar_migracoes(engine, migracoes=MIGRACOES, diretorio=DIRETORIO_SQL):
+    """
+    Aplica, em ordem, os scripts ainda não aplicados ao banco.
+
+    Cada script roda numa transação junto com o seu registro (nome, hash e data) em
+    `migracoes_aplicadas`; se falhar, nada dele fica no banco.
+
+    Parâmetros:
+    - engine (sqlalchemy.engine.Engine): Engine de `criar_engine`.
+    - migracoes (iterable): Caminhos dos scripts, relativos a `diretorio`.
+    - diretorio (str | Path): Diretório dos scripts SQL.
+
+    Retorna:
+    - list: Scripts aplicados nesta execução.
+
+    Lança:
+    - ValueError: Se um script já aplicado foi alterado depois disso.
+    """
+    with engine.begin() as conexao:
+        conexao.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {TABELA_MIGRACOES} (nome TEXT PRIMARY KEY, hash TEXT NOT NULL, "
+            "aplicada_em TEXT NOT NULL)"
+        )
+        aplicadas = dict(conexao.exec_driver_sql(f"SELECT nome, hash FROM {TABELA_MIGRACOES}").fetchall())
+
+    executadas = []
+    for nome in migracoes:
+        script = (Path(diretorio) / nome).read_text(encoding="utf-8")
+        assinatura = hashlib.sha256(script.encode("utf-8")).hexdigest()
+        if nome in aplicadas:
+            if aplicadas[nome] != assinatura:
+                raise ValueError(f"A migração '{nome}' mudou depois de aplicada; recrie o banco com a carga completa.")
+            continue
+        with engine.begin() as conexao:
+            for comando in dividir_comandos(script):
+                conexao.exec_driver_sql(comando)
+            conexao.exec_driver_sql(
+                f"INSERT INTO {TABELA_MIGRACOES} (nome, hash, aplicada_em) VALUES (?, ?, ?)",
+                (nome, assinatura, datetime.now(timezone.utc).isoformat()),
+            )
+        executadas.append(nome)
+    return executadas
+
+
+def refazer_derivadas(engine, ignorar=(), diretorio=DIRETORIO_SQL):
+    """
+    Recria as tabelas auxiliares de `TABELAS_DERIVADAS` com os dados atuais de `uber_stocks`.
+
+    Cada tabela é refeita numa transação pelo último dos seus scripts já registrado em
+    `migracoes_aplicadas`; tabelas sem script aplicado ficam de fora.
+
+    Parâmetros:
+    - engine (sqlalchemy.engine.Engine): Engine de `criar_engine`.
+    - ignorar (iterable): Scripts cujas tabelas já estão atualizadas (ex.: aplicados nesta carga).
+    - diretorio (str | Path): Diretório dos scripts SQL.
+
+    Retorna:
+    - list: Tabelas refeitas.
+    """
+    with engine.begin() as conexao:
+        if not _colunas_tabela(conexao, TABELA_MIGRACOES):
+            return []
+        aplicadas = {linha[0] for linha in conexao.exec_driver_sql(f"SELECT nome FROM {TABELA_MIGRACOES}")}
+
+    refeitas = []
+    for tabela, scripts in TABELAS_DERIVADAS.items():
+        aplicados = [nome for nome in scripts if nome in aplicadas]
+        if not aplicados or aplicados[-1] in ignorar:
+            continue
+        script = (Path(diretorio) / aplicados[-1]).read_text(encoding="utf-8")
+        with engine.begin() as conexao:
+            conexao.exec_driver_sql(f'DROP TABLE IF EXISTS "{tabela}"')
+            for comando in dividir_comandos(script):
+                conexao.exec_driver_sql(comando)
+        refeitas.append(tabela)
+    return refeitas
+
+
+def _ultima_data(engine, tabela=TABELA):
+    # Último pregão gravado, ou None se a tabela ainda não existe ou está vazia
+    with engine.begin() as conexao:
+        if not _colunas_tabela(conexao, tabela):
+            return None
+        return conexao.exec_driver_sql(f'SELECT MAX(date) FROM "{tabela}"').scalar()
+
+
+def remover_banco(caminho_banco):
+    """
+    Apaga o banco SQLite e os arquivos -wal e -shm do modo WAL, se existirem.
+
+    Parâmetros:
+    - caminho_banco (str | Path): Caminho do banco SQLite.
+    """
+    for sufixo in ("", "-wal", "-shm"):
+        try:
+            os.remove(f"{caminho_banco}{sufixo}")
+        except FileNotFoundError:
+            pass
+
+
+def exportar_anomalias(caminho_banco=CAMINHO_BANCO, tabela=TABELA):
+    """
+    Refaz a tabela `anomalias_volume` com os alertas de volume de todo o histórico do banco.
+
+    Parâmetros:
+    - caminho_banco (str | Path): Caminho do banco SQLite.
+    - tabela (str): Tabela com o histórico de preços.
+
+    Retorna:
+    - int: Quantidade de alertas exportados.
+    """
+    # SQLite compara nomes de coluna sem diferenciar maiúsculas: vale antes e depois de `snake_case.sql`
+    with closing(sqlite3.connect(caminho_banco)) as conexao:
+        historico = pd.read_sql_query(f'SELECT date, volume FROM "{tabela}" ORDER BY date', conexao)
+    eventos = anomalias.detectar_lote(historico["date"], historico["volume"])
+    return anomalias.exportar_sqlite(eventos, caminho_banco)
+
+
+def exportar_ranking(caminho_banco=CAMINHO_BANCO, tabela=TABELA):
+    """
+    Refaz a tabela `ranking_dias` com os maiores dias de cada métrica no histórico do banco.
+
+    Parâmetros:
+    - caminho_banco (str | Path): Caminho do banco SQLite.
+    - tabela (str): Tabela com o histórico de preços.
+
+    Retorna:
+    - int: Quantidade de linhas exportadas.
+    """
+    colunas = ", ".join(f'{coluna} AS "{coluna}"'
+                        for coluna in (carregamento.COLUNA_DATA, "Open", "High", "Low", "Close"))
+    with closing(sqlite3.connect(caminho_banco)) as conexao:
+        historico = pd.read_sql_query(f'SELECT {colunas} FROM "{tabela}" ORDER BY date', conexao)
+    ranking_dias = ranking.RankingDias()
+    ranking_dias.atualizar(historico)
+    return ranking.exportar_sqlite(caminho_banco, ranking=ranking_dias)
+
+
+def carregar_banco(caminho_processado=carregamento.CAMINHO_PROCESSADO, caminho_banco=CAMINHO_BANCO,
+                   tamanho_lote=TAMANHO_LOTE, recriar=True, migrar=True):
+    """
+    Carrega o CSV processado na tabela `uber_stocks`, aplica as migrações pendentes e refaz
+    as tabelas `anomalias_volume` e `ranking_dias`.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    - caminho_banco (str | Path): Caminho do banco SQLite.
+    - tamanho_lote (int): Linhas lidas e inseridas por transação.
+    - recriar (bool): Se True, apaga o banco antes da carga (tabelas auxiliares e índices são
+      refeitos pelas migrações). Se False, acrescenta à tabela existente só as linhas com data
+      posterior à última do banco e refaz as tabelas auxiliares.
+    - migrar (bool): Se True, aplica as migrações depois da carga.
+
+    Retorna:
+    - dict: 'linhas', 'segundos_carga', 'migracoes' (aplicadas nesta execução), 'derivadas'
+      (tabelas auxiliares refeitas), 'anomalias' (alertas exportados) e 'ranking' (linhas do ranking).
+    """
+    if recriar:
+        remover_banco(caminho_banco)
+    engine = criar_engine(caminho_banco)
+    try:
+        ultima_data = None if recriar else _ultima_data(engine)
+        inicio = time.perf_counter()
+        lotes = pd.read_csv(caminho_processado, chunksize=tamanho_lote, dtype={carregamento.COLUNA_DATA: str})
+        if ultima_data is not None:
+            # Datas ISO comparadas como texto: recarregar o mesmo CSV não duplica nenhum pregão
+            lotes = (lote[lote[carregamento.COLUNA_DATA] > ultima_data] for lote in lotes)
+        linhas = inserir_lotes(engine, lotes)
+        segundos = time.perf_counter() - inicio
+
+        migracoes = aplicar_migracoes(engine) if migrar else []
+        # Tabelas criadas pelas migrações desta carga já incluem as linhas novas
+        derivadas = refazer_derivadas(engine, ignorar=migracoes) if linhas and not recriar else []
+        alertas = exportar_anomalias(caminho_banco)
+        linhas_ranking = exportar_ranking(caminho_banco)
+        # Estatísticas para o planejador de consultas escolher os índices recém-criados
+        with engine.begin() as conexao:
+            conexao.exec_driver_sql("ANALYZE")
+    finally:
+        engine.dispose()
+    return {"linhas": linhas, "segundos_carga": segundos, "migracoes": migracoes, "derivadas": derivadas,
+            "anomalias": alertas, "ranking": linhas_ranking}
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Carga do CSV processado em SQLite e migrações de sql/.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--banco", default=str(CAMINHO_BANCO), help="Banco SQLite de destino.")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="Linhas por transação.")
+    parser.add_argument("--acrescentar", action="store_true",
+                        help="Acrescenta só os pregões posteriores ao último do banco, em vez de recriá-lo.")
+    parser.add_argument("--sem-carga", action="store_true", help="Apenas aplica as migrações pendentes.")
+    args = parser.parse_args(argumentos)
+
+    if args.sem_carga:
+        engine = criar_engine(args.banco)
+        try:
+            migracoes = aplicar_migracoes(engine)
+        finally:
+            engine.dispose()
+    else:
+        resumo = carregar_banco(args.processado, args.banco, args.lote, recriar=not args.acrescentar)
+        print(f"✅ {resumo['linhas']:,} linhas carregadas em '{TABELA}' em {resumo['segundos_carga']:.2f}s")
+        if resumo["derivadas"]:
+            print(f"✅ Tabelas auxiliares refeitas: {', '.join(resumo['derivadas'])}")
+        print(f"✅ {resumo['anomalias']} alertas de volume gravados em '{anomalias.TABELA_SQL}'")
+        print(f"✅ {resumo['ranking']} dias ranqueados gravados em '{ranking.TABELA_SQL}'")
+        migracoes = resumo["migracoes"]
+
+    if migracoes:
+        print(f"✅ Migrações aplicadas: {', '.join(migracoes)}")
+    else:
+        print("⚠️ Nenhuma migração pendente")
+
+
+if __name__ == "__main__":
+    main()
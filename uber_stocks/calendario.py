@@ -0,0 +1,374 @@
+"""
+Cubo de agregados por calendário (ano x mês x semana ISO x dia da semana).
+
+As páginas de sazonalidade agrupavam o histórico inteiro por nomes de mês em texto
+(`Date.dt.month_name()`, `groupby('Month_Name')` e, logo depois, `groupby('Month')` para o
+mesmo resultado). Aqui os pregões são agregados uma vez por versão dos dados em células de
+chaves inteiras, com soma, contagem, mínimo e máximo de cada medida; qualquer recorte
+sazonal (média por mês, por dia da semana, por ano e mês...) é obtido somando células do
+cubo, sem voltar às linhas. Para quantis, cada célula de ano x mês x dia da semana guarda
+também um t-digest, combinável entre células.
+
+O ano é o do calendário (o mesmo do mês), não o ano ISO da semana: a semana 1 de um pregão
+de 30 de dezembro fica no ano em que o pregão ocorreu.
+
+Uso:
+    python -m uber_stocks.calendario --por mes --medida Close
+    python -m uber_stocks.calendario --por ano mes --medida Retorno --ano 2023 2024
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento
+from uber_stocks.estatisticas import COMPRESSAO_PADRAO, TDigest
+
+CHAVES = ("ano", "mes", "semana", "dia_semana")
+# Chaves das células que guardam esboços de quantis
+CHAVES_ESBOCO = ("ano", "mes", "dia_semana")
+MEDIDAS = ("Close", "Adj Close", "Volume", "Retorno")
+
+
+def chaves_calendario(datas):
+    """
+    Calcula as chaves inteiras de calendário de cada data.
+
+    Parâmetros:
+    - datas (array-like): Datas dos pregões.
+
+    Retorna:
+    - numpy.ndarray: Matriz (pregões x 4) com ano, mês, semana ISO e dia da semana (0 = segunda).
+    """
+    datas = pd.DatetimeIndex(pd.to_datetime(np.asarray(datas)))
+    return np.column_stack([
+        datas.year, datas.month, datas.isocalendar().week.to_numpy(), datas.weekday,
+    ]).astype("int16")
+
+
+def valores_medidas(dados):
+    """
+    Extrai as medidas do cubo, incluindo o retorno diário do fechamento.
+
+    O retorno de um pregão é `Close / Close anterior - 1` e fica ausente quando um dos dois
+    fechamentos está ausente (sem preencher com o pregão anterior).
+
+    Parâmetros:
+    - dados (pandas.DataFrame | VisaoOHLCV): Pregões em ordem cronológica.
+
+    Retorna:
+    - numpy.ndarray: Matriz (pregões x medidas), na ordem de `MEDIDAS`.
+    """
+    fechamento = np.asarray(dados["Close"], dtype="float64")
+    retorno = np.full(len(fechamento), np.nan)
+    retorno[1:] = fechamento[1:] / fechamento[:-1] - 1
+    return np.column_stack([
+        fechamento,
+        np.asarray(dados["Adj Close"], dtype="float64"),
+        np.asarray(dados["Volume"], dtype="float64"),
+        retorno,
+    ])
+
+
+def _agrupar(chaves, posicoes):
+    # Grupos distintos de um subconjunto de colunas das chaves e o grupo de cada linha
+    if not posicoes:
+        return np.empty((1, 0), dtype=chaves.dtype), np.zeros(len(chaves), dtype="int64")
+    grupos, inverso = np.unique(chaves[:, posicoes], axis=0, return_inverse=True)
+    return grupos, inverso.ravel()
+
+
+def _somar_por_grupo(inverso, grupos, soma, contagem, minimo, maximo):
+    # Soma, contagem, mínimo e máximo de células que caem no mesmo grupo
+    n = len(grupos)
+    soma_grupo = np.column_stack([np.bincount(inverso, soma[:, i], n) for i in range(soma.shape[1])])
+    contagem_grupo = np.column_stack([np.bincount(inverso, contagem[:, i], n) for i in range(contagem.shape[1])])
+    minimo_grupo = np.full((n, minimo.shape[1]), np.inf)
+    maximo_grupo = np.full((n, maximo.shape[1]), -np.inf)
+    np.minimum.at(minimo_grupo, inverso, minimo)
+    np.maximum.at(maximo_grupo, inverso, maximo)
+    return soma_grupo, contagem_grupo, minimo_grupo, maximo_grupo
+
+
+class CuboCalendario:
+    """
+    Agregados das medidas por célula de ano, mês, semana ISO e dia da semana.
+
+    Parâmetros:
+    - chaves (numpy.ndarray): Matriz (células x 4) com as chaves de cada célula, na ordem de `CHAVES`.
+    - soma, contagem, minimo, maximo (numpy.ndarray): Matrizes (células x medidas), ignorando valores ausentes.
+    - esbocos (dict): Para cada medida, um par (chaves das células x 3, lista de TDigest), nas chaves de `CHAVES_ESBOCO`.
+    - versao (str, opcional): Versão dos dados de origem.
+    """
+
+    def __init__(self, chaves, soma, contagem, minimo, maximo, esbocos, versao=None):
+        self.chaves = np.asarray(chaves, dtype="int16").reshape(-1, len(CHAVES))
+        self.soma = np.asarray(soma, dtype="float64")
+        self.contagem = np.asarray(contagem, dtype="float64")
+        self.minimo = np.asarray(minimo, dtype="float64")
+        self.maximo = np.asarray(maximo, dtype="float64")
+        self.esbocos = esbocos
+        self.versao = versao
+
+    def __len__(self):
+        return len(self.chaves)
+
+    @classmethod
+    def construir(cls, dados, coluna_data=carregamento.COLUNA_DATA, compressao=COMPRESSAO_PADRAO, versao=None):
+        """
+        Agrega os pregões nas células do cubo.
+
+        Parâmetros:
+        - dados (pandas.DataFrame | VisaoOHLCV): Pregões em ordem cronológica, com Date, Close, Adj Close e Volume.
+        - coluna_data (str): Coluna de datas.
+        - compressao (int): Compressão dos t-digests das células.
+        - versao (str, opcional): Versão dos dados de origem.
+
+        Retorna:
+        - CuboCalendario: Cubo com uma célula por combinação de chaves presente nos dados.
+        """
+        chaves = chaves_calendario(dados[coluna_data])
+        valores = valores_medidas(dados)
+        presentes = ~np.isnan(valores)
+
+        celulas, inverso = _agrupar(chaves, list(range(len(CHAVES))))
+        soma, contagem, minimo, maximo = _somar_por_grupo(
+            inverso, celulas, np.where(presentes, valores, 0.0), presentes.astype("float64"),
+            np.where(presentes, valores, np.inf), np.where(presentes, valores, -np.inf),
+        )
+
+        # Um t-digest por célula de ano x mês x dia da semana, com os valores já ordenados por célula
+        posicoes_esboco = [CHAVES.index(chave) for chave in CHAVES_ESBOCO]
+        celulas_esboco, inverso_esboco = _agrupar(chaves, posicoes_esboco)
+        ordem = np.argsort(inverso_esboco, kind="stable")
+        limites = np.searchsorted(inverso_esboco[ordem], np.arange(len(celulas_esboco) + 1))
+        esbocos = {}
+        for i, medida in enumerate(MEDIDAS):
+            ordenados = valores[ordem, i]
+            digests = []
+            for inicio, fim in zip(limites[:-1], limites[1:]):
+                digest = TDigest(compressao)
+                digest.adicionar(ordenados[inicio:fim])
+                digests.append(digest)
+            esbocos[medida] = (celulas_esboco, digests)
+
+        return cls(celulas, soma, contagem, minimo, maximo, esbocos, versao)
+
+    @staticmethod
+    def _mascara(chaves, filtros, nomes=CHAVES):
+        # Células que atendem a todos os filtros {chave: valor ou lista de valores}
+        mascara = np.ones(len(chaves), dtype=bool)
+        for chave, valores in (filtros or {}).items():
+            if chave not in nomes:
+                raise ValueError(f"Filtro inválido: '{chave}'. Use um de {list(nomes)}.")
+            mascara &= np.isin(chaves[:, nomes.index(chave)], np.atleast_1d(valores))
+        return mascara
+
+    @staticmethod
+    def _validar(por, medida, nomes=CHAVES):
+        invalidas = [chave for chave in por if chave not in nomes]
+        if invalidas:
+            raise ValueError(f"Chaves inválidas: {invalidas}. Use entre {list(nomes)}.")
+        if medida not in MEDIDAS:
+            raise ValueError(f"Medida inválida: '{medida}'. Use uma de {list(MEDIDAS)}.")
+
+    def agregar(self, por=("mes",), medida="Close", filtros=None):
+        """
+        Consolida as células do cubo nas chaves pedidas (roll-up).
+
+        Parâmetros:
+        - por (tuple): Chaves mantidas, entre 'ano', 'mes', 'semana' e 'dia_semana'; vazio consolida tudo.
+        - medida (str): Uma de `MEDIDAS`.
+        - filtros (dict, opcional): Valores aceitos por chave, ex.: {'ano': [2023, 2024]}.
+
+        Retorna:
+        - pandas.DataFrame: Uma linha por grupo, com as chaves e 'soma', 'contagem', 'media', 'minimo' e 'maximo'.
+        """
+        por = tuple(por)
+        self._validar(por, medida)
+        i = MEDIDAS.index(medida)
+        mascara = self._mascara(self.chaves, filtros)
+        chaves = self.chaves[mascara]
+
+        grupos, inverso = _agrupar(chaves, [CHAVES.index(chave) for chave in por])
+        if len(chaves) == 0:
+            grupos = grupos[:0]
+        soma, contagem, minimo, maximo = _somar_por_grupo(
+            inverso, grupos, self.soma[mascara, i:i + 1], self.contagem[mascara, i:i + 1],
+            self.minimo[mascara, i:i + 1], self.maximo[mascara, i:i + 1],
+        )
+
+        resultado = pd.DataFrame(grupos.astype("int64"), columns=list(por))
+        resultado['soma'] = soma[:, 0]
+        resultado['contagem'] = contagem[:, 0].astype("int64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            resultado['media'] = soma[:, 0] / contagem[:, 0]
+        # Grupos sem nenhum valor presente ficam com mínimo e máximo ausentes
+        resultado['minimo'] = np.where(contagem[:, 0] > 0, minimo[:, 0], np.nan)
+        resultado['maximo'] = np.where(contagem[:, 0] > 0, maximo[:, 0], np.nan)
+        return resultado
+
+    def quantis(self, por=("mes",), medida="Close", quantis=(0.25, 0.5, 0.75), filtros=None):
+        """
+        Estima quantis por grupo combinando os t-digests das células.
+
+        Disponível apenas para chaves e filtros entre 'ano', 'mes' e 'dia_semana'.
+
+        Parâmetros:
+        - por (tuple): Chaves mantidas; vazio consolida tudo.
+        - medida (str): Uma de `MEDIDAS`.
+        - quantis (tuple): Quantis entre 0 e 1.
+        - filtros (dict, opcional): Valores aceitos por chave.
+
+        Retorna:
+        - pandas.DataFrame: Uma linha por grupo, com as chaves e uma coluna por quantil ('25%', '50%', ...).
+        """
+        por = tuple(por)
+        self._validar(por, medida, CHAVES_ESBOCO)
+        celulas, digests = self.esbocos[medida]
+        mascara = self._mascara(celulas, filtros, CHAVES_ESBOCO)
+        selecionadas = np.flatnonzero(mascara)
+
+        grupos, inverso = _agrupar(celulas[selecionadas], [CHAVES_ESBOCO.index(chave) for chave in por])
+        combinados = [TDigest(digests[0].compressao if digests else COMPRESSAO_PADRAO) for _ in range(len(grupos))]
+        for grupo, celula in zip(inverso, selecionadas):
+            combinados[grupo].mesclar(digests[celula])
+        if len(selecionadas) == 0:
+            grupos, combinados = grupos[:0], []
+
+        resultado = pd.DataFrame(grupos.astype("int64"), columns=list(por))
+        estimados = np.array([digest.quantil(list(quantis)) for digest in combinados]).reshape(len(combinados), len(quantis))
+        for j, q in enumerate(quantis):
+            resultado[f"{q:.0%}"] = estimados[:, j]
+        return resultado
+
+    def salvar(self, caminho):
+        """
+        Grava o cubo (.npz) com troca atômica do arquivo.
+
+        Os t-digests de cada medida são gravados como centróides concatenados, com os limites de cada célula.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo.
+        """
+        caminho = Path(caminho)
+        arrays = {
+            "chaves": self.chaves, "soma": self.soma, "contagem": self.contagem,
+            "minimo": self.minimo, "maximo": self.maximo,
+            "versao": np.array(self.versao or "", dtype=str),
+        }
+        for i, medida in enumerate(MEDIDAS):
+            celulas, digests = self.esbocos[medida]
+            centroides = [digest._juntar() for digest in digests]
+            arrays[f"esboco_chaves_{i}"] = celulas
+            arrays[f"esboco_limites_{i}"] = np.cumsum([0] + [len(medias) for medias, _ in centroides])
+            arrays[f"esboco_medias_{i}"] = np.concatenate([medias for medias, _ in centroides] or [np.empty(0)])
+            arrays[f"esboco_pesos_{i}"] = np.concatenate([pesos for _, pesos in centroides] or [np.empty(0)])
+            arrays[f"esboco_extremos_{i}"] = np.array([[digest.minimo, digest.maximo] for digest in digests]).reshape(-1, 2)
+            arrays[f"esboco_compressao_{i}"] = np.array([digest.compressao for digest in digests[:1]] or [COMPRESSAO_PADRAO])
+
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        with open(temporario, "wb") as arquivo:
+            np.savez(arquivo, **arrays)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """
+        Lê um cubo gravado por `salvar`.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo.
+
+        Retorna:
+        - CuboCalendario | None: Cubo lido, ou None se o arquivo não existe ou é inválido.
+        """
+        try:
+            with np.load(caminho, allow_pickle=False) as arquivo:
+                esbocos = {}
+                for i, medida in enumerate(MEDIDAS):
+                    limites = arquivo[f"esboco_limites_{i}"]
+                    medias, pesos = arquivo[f"esboco_medias_{i}"], arquivo[f"esboco_pesos_{i}"]
+                    compressao = int(arquivo[f"esboco_compressao_{i}"][0])
+                    digests = []
+                    for inicio, fim, (minimo, maximo) in zip(limites[:-1], limites[1:], arquivo[f"esboco_extremos_{i}"]):
+                        digests.append(TDigest.de_dict({
+                            "compressao": compressao, "medias": medias[inicio:fim], "pesos": pesos[inicio:fim],
+                            "minimo": float(minimo), "maximo": float(maximo),
+                        }))
+                    esbocos[medida] = (arquivo[f"esboco_chaves_{i}"], digests)
+                return cls(arquivo["chaves"], arquivo["soma"], arquivo["contagem"], arquivo["minimo"],
+                           arquivo["maximo"], esbocos, str(arquivo["versao"]) or None)
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def caminho_cubo(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho do cubo guardado ao lado do CSV processado.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo .npz do cubo.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(caminho_processado.stem + ".calendario.npz")
+
+
+def obter_cubo(caminho_processado=carregamento.CAMINHO_PROCESSADO, coluna_data=carregamento.COLUNA_DATA):
+    """
+    Lê o cubo de calendário salvo, reconstruindo-o apenas se os dados mudaram.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    - coluna_data (str): Coluna de datas.
+
+    Retorna:
+    - CuboCalendario: Cubo da versão atual dos dados.
+    """
+    # Garante o snapshot do carregamento, que guarda o hash usado como versão
+    if carregamento.validar_snapshot(caminho_processado) is None:
+        carregamento.carregar_dados(caminho_processado)
+    versao = carregamento.versao_dados(caminho_processado)
+
+    caminho = caminho_cubo(caminho_processado)
+    cubo = CuboCalendario.carregar(caminho)
+    if cubo is not None and cubo.versao == versao:
+        return cubo
+
+    dados = carregamento.carregar_dados(caminho_processado)
+    cubo = CuboCalendario.construir(dados, coluna_data, versao=versao)
+    try:
+        cubo.salvar(caminho)
+    except OSError:
+        # Sem permissão de escrita o cubo continua disponível, apenas sem ser salvo
+        pass
+    return cubo
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Consulta o cubo de agregados por calendário.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--por", nargs="*", default=["mes"], choices=CHAVES, help="Chaves do agrupamento.")
+    parser.add_argument("--medida", default="Close", choices=MEDIDAS, help="Medida agregada.")
+    parser.add_argument("--ano", nargs="*", type=int, help="Restringe aos anos informados.")
+    parser.add_argument("--quantis", action="store_true", help="Exibe também os quartis (sem a chave 'semana').")
+    args = parser.parse_args(argumentos)
+
+    cubo = obter_cubo(args.processado)
+    filtros = {"ano": args.ano} if args.ano else None
+    resultado = cubo.agregar(args.por, args.medida, filtros)
+    if args.quantis:
+        resultado = resultado.merge(cubo.quantis(args.por, args.medida, filtros=filtros), on=args.por) \
+            if args.por else pd.concat([resultado, cubo.quantis((), args.medida, filtros=filtros)], axis=1)
+
+    print(f"✅ Cubo com {len(cubo)} células; {args.medida} por {', '.join(args.por) or 'total'}")
+    print(resultado.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Parquet é opcional: sem o pyarrow o snapshot é gravado em .npz
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+# Caminhos padrão do projeto
+RAIZ_PROJETO = Path(__file__).resolve().parents[1]
+CAMINHO_PROCESSADO = RAIZ_PROJETO / "data" / "processed" / "uber_stock_data_atualizado.csv"
+DIRETORIO_CACHE = RAIZ_PROJETO / "data" / "cache"
+
+COLUNA_DATA = "Date"
+VERSAO_SNAPSHOT = 1
+
+
+def calcular_hash_arquivo(caminho_arquivo, tamanho_bloco=1 << 20):
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo, lendo-o em blocos.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): Caminho do arquivo.
+    - tamanho_bloco (int): Quantidade de bytes lidos por vez.
+
+    Retorna:
+    - str: Hash hexadecimal do conteúdo.
+    """
+    sha = hashlib.sha256()
+    with open(caminho_arquivo, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def assinatura_prefixo(colunas, linhas):
+    """
+    Calcula o hash SHA-256 das primeiras linhas de um conjunto de colunas.
+
+    Usado pelos estados incrementais para saber se o histórico já processado foi revisto:
+    qualquer valor alterado no prefixo muda a assinatura, não só os da última linha.
+
+    Parâmetros:
+    - colunas (iterable): Arrays (ou Series) de mesmo comprimento; None é ignorado.
+    - linhas (int): Quantidade de linhas iniciais consideradas.
+
+    Retorna:
+    - str: Hash hexadecimal do prefixo.
+    """
+    sha = hashlib.sha256(str(int(linhas)).encode("utf-8"))
+    for valores in colunas:
+        if valores is None:
+            continue
+        # hash_array dá o mesmo resultado para o mesmo valor em qualquer dtype (inclusive object e NaN)
+        sha.update(pd.util.hash_array(np.asarray(valores)[:linhas]).tobytes())
+    return sha.hexdigest()
+
+
+def _caminho_temporario(destino):
+    # Nome único por processo e thread: sessões do Streamlit são threads do mesmo processo
+    # e não podem sobrescrever o temporário uma da outra antes do os.replace
+    return destino.with_name(f"{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def salvar_colunas(df, caminho_base):
+    """
+    Grava um DataFrame em formato colunar tipado (Parquet ou, na falta do pyarrow, .npz).
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser salvo.
+    - caminho_base (str | Path): Caminho do arquivo sem extensão.
+
+    Retorna:
+    - Path: Caminho do arquivo gravado.
+    """
+    caminho_base = Path(caminho_base)
+    caminho_base.parent.mkdir(parents=True, exist_ok=True)
+
+    if PARQUET_DISPONIVEL:
+        destino = caminho_base.with_name(caminho_base.name + ".parquet")
+        temporario = _caminho_temporario(destino)
+        df.to_parquet(temporario, index=False)
+    else:
+        destino = caminho_base.with_name(caminho_base.name + ".npz")
+        temporario = _caminho_temporario(destino)
+        colunas = {f"col_{i}": _array_para_npz(df[coluna]) for i, coluna in enumerate(df.columns)}
+        with open(temporario, "wb") as arquivo:
+            np.savez(arquivo, __colunas__=np.array(df.columns, dtype=str), **colunas)
+
+    # A troca atômica impede que um leitor encontre o snapshot pela metade
+    os.replace(temporario, destino)
+    return destino
+
+
+def ler_colunas(caminho):
+    """
+    Lê um arquivo gravado por `salvar_colunas`.
+
+    Parâmetros:
+    - caminho (str | Path): Caminho do arquivo .parquet ou .npz.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com os tipos preservados.
+    """
+    caminho = Path(caminho)
+    if caminho.suffix == ".parquet":
+        return pd.read_parquet(caminho)
+
+    with np.load(caminho, allow_pickle=False) as arquivo:
+        nomes = arquivo["__colunas__"].tolist()
+        return pd.DataFrame({nome: arquivo[f"col_{i}"] for i, nome in enumerate(nomes)})
+
+
+def _array_para_npz(serie):
+    # Colunas de texto viram strings de tamanho fixo para dispensar o pickle
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+        return serie.to_numpy(dtype=str)
+    return serie.to_numpy()
+
+
+def _caminho_snapshot(caminho_arquivo, diretorio_cache):
+    # O hash do caminho absoluto separa arquivos homônimos de pastas diferentes
+    caminho_arquivo = Path(caminho_arquivo).resolve()
+    sufixo = hashlib.sha1(str(caminho_arquivo).encode("utf-8")).hexdigest()[:8]
+    return Path(diretorio_cache) / f"{caminho_arquivo.stem}-{sufixo}"
+
+
+def _ler_metadados(caminho_meta):
+    try:
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_metadados(caminho_meta, metadados):
+    temporario = _caminho_temporario(caminho_meta)
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(metadados, arquivo, indent=2)
+    os.replace(temporario, caminho_meta)
+
+
+def _ler_csv(caminho_arquivo, coluna_data):
+    dados = pd.read_csv(caminho_arquivo)
+    if coluna_data:
+        dados[coluna_data] = pd.to_datetime(dados[coluna_data])
+        dados = dados.sort_values(coluna_data, kind="stable").reset_index(drop=True)
+    return dados
+
+
+def validar_snapshot(caminho_arquivo=CAMINHO_PROCESSADO, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Verifica se existe um snapshot válido para o CSV informado.
+
+    O snapshot é considerado válido quando o mtime e o tamanho do CSV coincidem com os
+    registrados. Se apenas o mtime mudou (arquivo tocado ou copiado), o hash do conteúdo
+    decide, e os metadados são atualizados para que a próxima verificação seja imediata.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): Caminho do CSV processado.
+    - diretorio_cache (str | Path): Pasta onde os snapshots são mantidos.
+
+    Retorna:
+    - dict | None: Metadados do snapshot válido, ou None se ele precisar ser recriado.
+    """
+    base = _caminho_snapshot(caminho_arquivo, diretorio_cache)
+    caminho_meta = base.with_name(base.name + ".meta.json")
+    metadados = _ler_metadados(caminho_meta)
+    if metadados is None or metadados.get("versao") != VERSAO_SNAPSHOT:
+        return None
+    if not (base.parent / metadados["snapshot"]).exists():
+        return None
+
+    estado = os.stat(caminho_arquivo)
+    if estado.st_size != metadados["tamanho"]:
+        return None
+    if estado.st_mtime_ns == metadados["mtime_ns"]:
+        return metadados
+
+    # Mesmo tamanho com mtime diferente: o conteúdo decide
+    if calcular_hash_arquivo(caminho_arquivo) != metadados["sha256"]:
+        return None
+    metadados["mtime_ns"] = estado.st_mtime_ns
+    try:
+        _gravar_metadados(caminho_meta, metadados)
+    except OSError:
+        pass
+    return metadados
+
+
+def versao_dados(caminho_arquivo=CAMINHO_PROCESSADO, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Retorna o hash de conteúdo do CSV, reaproveitando o valor guardado no snapshot quando válido.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): Caminho do CSV processado.
+    - diretorio_cache (str | Path): Pasta onde os snapshots são mantidos.
+
+    Retorna:
+    - str: Hash SHA-256 que identifica a versão dos dados.
+    """
+    metadados = validar_snapshot(caminho_arquivo, diretorio_cache)
+    if metadados is not None:
+        return metadados["sha256"]
+    return calcular_hash_arquivo(caminho_arquivo)
+
+
+def carregar_dados(caminho_arquivo=CAMINHO_PROCESSADO, coluna_data=COLUNA_DATA, diretorio_cache=DIRETORIO_CACHE):
+    """
+    Carrega o CSV processado usando um snapshot colunar tipado como cache em disco.
+
+    Na primeira leitura (ou quando o CSV muda) o arquivo é lido, a coluna de datas é
+    convertida e o resultado é gravado em Parquet/.npz. As leituras seguintes carregam
+    as colunas já tipadas, sem reprocessar o CSV nem chamar `pd.to_datetime`.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): Caminho do CSV processado.
+    - coluna_data (str, opcional): Coluna de datas a ser convertida e usada na ordenação.
+    - diretorio_cache (str | Path, opcional): Pasta dos snapshots. Se None, lê direto do CSV.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame ordenado pela coluna de datas.
+    """
+    if diretorio_cache is None:
+        return _ler_csv(caminho_arquivo, coluna_data)
+
+    base = _caminho_snapshot(caminho_arquivo, diretorio_cache)
+    metadados = validar_snapshot(caminho_arquivo, diretorio_cache)
+    if metadados is not None and metadados.get("coluna_data") == coluna_data:
+        return ler_colunas(base.parent / metadados["snapshot"])
+
+    # Hash e stat são obtidos antes da leitura para não registrar uma versão mais nova que a lida
+    estado = os.stat(caminho_arquivo)
+    sha256 = calcular_hash_arquivo(caminho_arquivo)
+    dados = _ler_csv(caminho_arquivo, coluna_data)
+
+    try:
+        snapshot = salvar_colunas(dados, base)
+        _gravar_metadados(base.with_name(base.name + ".meta.json"), {
+            "versao": VERSAO_SNAPSHOT,
+            "origem": str(Path(caminho_arquivo).resolve()),
+            "snapshot": snapshot.name,
+            "coluna_data": coluna_data,
+            "mtime_ns": estado.st_mtime_ns,
+            "tamanho": estado.st_size,
+            "sha256": sha256,
+        })
+    except OSError:
+        # Sem permissão de escrita o carregamento segue funcionando, apenas sem cache
+        pass
+
+    return dados
@@ -0,0 +1,282 @@
+"""
+Consultas por período no banco SQLite com predicados que usam os índices de data.
+
+Filtros como `strftime('%Y', date) = '2023'` aplicam uma função sobre a coluna indexada: o
+SQLite precisa calcular a expressão em todas as linhas e o `idx_data` não é usado. A mesma
+condição escrita como faixa semiaberta, `date >= '2023-01-01' AND date < '2024-01-01'`, vira
+uma busca no índice que lê apenas as linhas daquele ano. Este módulo:
+
+- monta essas faixas para anos, meses e períodos quaisquer (`intervalo_ano`, `intervalo_mes`,
+  `intervalo_periodo`) e consulta o banco com elas (`consultar_periodo`, `consultar_ano`,
+  `consultar_mes`);
+- reescreve, em SQL existente, comparações de `strftime('%Y', ...)` e `strftime('%Y-%m', ...)`
+  com literais nas faixas equivalentes (`reescrever_filtros`);
+- confere pelo `EXPLAIN QUERY PLAN` que a consulta busca por faixa num índice em vez de
+  percorrer a tabela inteira (`plano_consulta`, `busca_indice`).
+
+Agrupamentos por ano e por mês usam as colunas geradas `ano` e `ano_mes` e os seus índices,
+criados pelas migrações `colunas_data.sql` e `indice_ano.sql` (ver `uber_stocks.banco`).
+
+Uso:
+    python -m uber_stocks.consultas --banco data/uber_stocks.db --ano 2023
+    python -m uber_stocks.consultas --banco data/uber_stocks.db --inicio 2023-03-01 --fim 2023-06-30
+    python -m uber_stocks.consultas --reescrever sql/simple_queries/registros_ano.sql
+"""
+import argparse
+import re
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from uber_stocks import banco
+
+COLUNA_DATA_SQL = "date"
+
+# strftime('%Y', coluna) ou strftime('%Y-%m', coluna) comparado com um literal de ano ou ano-mês
+PADRAO_FILTRO = re.compile(
+    r"(?i:strftime)\(\s*'(?P<formato>%Y|%Y-%m)'\s*,\s*(?P<coluna>[\w.\"]+)\s*\)\s*"
+    r"(?P<operador>>=|<=|=|<|>)\s*'(?P<valor>\d{4}(?:-\d{2})?)'"
+)
+
+
+def _inicio_mes(ano, mes):
+    # Primeiro dia do mês, com a virada de ano tratada (mes 13 = janeiro do ano seguinte)
+    ano, mes = ano + (mes - 1) // 12, (mes - 1) % 12 + 1
+    return f"{ano:04d}-{mes:02d}-01"
+
+
+def intervalo_ano(ano):
+    """
+    Faixa semiaberta [início, fim) de datas de um ano.
+
+    Parâmetros:
+    - ano (int): Ano.
+
+    Retorna:
+    - tuple: ('AAAA-01-01', 'AAAA+1-01-01').
+    """
+    ano = int(ano)
+    return _inicio_mes(ano, 1), _inicio_mes(ano + 1, 1)
+
+
+def intervalo_mes(ano, mes):
+    """
+    Faixa semiaberta [início, fim) de datas de um mês.
+
+    Parâmetros:
+    - ano (int): Ano.
+    - mes (int): Mês (1 a 12).
+
+    Retorna:
+    - tuple: ('AAAA-MM-01', primeiro dia do mês seguinte).
+    """
+    ano, mes = int(ano), int(mes)
+    return _inicio_mes(ano, mes), _inicio_mes(ano, mes + 1)
+
+
+def intervalo_periodo(inicio=None, fim=None):
+    """
+    Faixa semiaberta [início, fim) equivalente ao período fechado [inicio, fim] em dias.
+
+    O fim vira o dia seguinte, para que registros com horário no último dia entrem na faixa.
+
+    Parâmetros:
+    - inicio (str | Timestamp, opcional): Primeiro dia do período.
+    - fim (str | Timestamp, opcional): Último dia do período.
+
+    Retorna:
+    - tuple: (início, fim) como 'AAAA-MM-DD', com None nas pontas abertas.
+    """
+    inicio = None if inicio is None else pd.Timestamp(inicio).strftime("%Y-%m-%d")
+    fim = None if fim is None else (pd.Timestamp(fim).normalize() + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    return inicio, fim
+
+
+def _faixa(formato, valor, operador):
+    # Limites da comparação de strftime traduzidos em limites de data: (limite inferior, limite superior)
+    if formato == "%Y":
+        inicio, seguinte = intervalo_ano(valor)
+    else:
+        ano, mes = valor.split("-")
+        inicio, seguinte = intervalo_mes(ano, mes)
+    return {
+        "=": (inicio, seguinte),
+        ">=": (inicio, None),
+        ">": (seguinte, None),
+        "<": (None, inicio),
+        "<=": (None, seguinte),
+    }[operador]
+
+
+def reescrever_filtros(sql):
+    """
+    Reescreve comparações de `strftime('%Y'|'%Y-%m', coluna)` com literais em faixas de datas.
+
+    Só as comparações com literais são reescritas; `strftime` em SELECT ou GROUP BY fica como
+    está (nesses casos, use as colunas geradas `ano` e `ano_mes`).
+
+    Parâmetros:
+    - sql (str): Consulta SQL.
+
+    Retorna:
+    - str: Consulta com os filtros na forma `coluna >= 'início' AND coluna < 'fim'`.
+    """
+    def substituir(correspondencia):
+        formato = correspondencia["formato"]
+        # Um literal que não combina com o formato (ex.: '2023' contra '%Y-%m') nunca é igual; fica como está
+        if len(correspondencia["valor"]) != (4 if formato == "%Y" else 7):
+            return correspondencia[0]
+        coluna = correspondencia["coluna"]
+        inferior, superior = _faixa(formato, correspondencia["valor"], correspondencia["operador"])
+        condicoes = []
+        if inferior is not None:
+            condicoes.append(f"{coluna} >= '{inferior}'")
+        if superior is not None:
+            condicoes.append(f"{coluna} < '{superior}'")
+        return f"({' AND '.join(condicoes)})" if len(condicoes) > 1 else condicoes[0]
+
+    return PADRAO_FILTRO.sub(substituir, sql)
+
+
+def plano_consulta(conexao, sql, parametros=()):
+    """
+    Retorna o `EXPLAIN QUERY PLAN` de uma consulta.
+
+    Parâmetros:
+    - conexao (sqlite3.Connection): Conexão com o banco.
+    - sql (str): Consulta ou comando SQL.
+    - parametros (tuple): Parâmetros da consulta.
+
+    Retorna:
+    - list: Passos do plano, como dicts com 'id', 'pai' e 'detalhe'.
+    """
+    return [{"id": linha[0], "pai": linha[1], "detalhe": linha[3]}
+            for linha in conexao.execute("EXPLAIN QUERY PLAN " + sql, parametros)]
+
+
+def busca_indice(conexao, sql, parametros=(), tabela=banco.TABELA):
+    """
+    Indica se a consulta lê a tabela por uma busca num índice, e não por varredura completa.
+
+    Parâmetros:
+    - conexao (sqlite3.Connection): Conexão com o banco.
+    - sql (str): Consulta SQL.
+    - parametros (tuple): Parâmetros da consulta.
+    - tabela (str): Tabela verificada.
+
+    Retorna:
+    - bool: True se todo acesso à tabela no plano é um SEARCH com índice.
+    """
+    acessos = [passo["detalhe"] for passo in plano_consulta(conexao, sql, parametros)
+               if re.match(rf"(SCAN|SEARCH) {re.escape(tabela)}\b", passo["detalhe"])]
+    return bool(acessos) and all(acesso.startswith("SEARCH") and "INDEX" in acesso for acesso in acessos)
+
+
+def _sql_periodo(inicio, fim, colunas, tabela):
+    # Faixa semiaberta em `date`, com as pontas abertas omitidas
+    condicoes, parametros = [], []
+    if inicio is not None:
+        condicoes.append(f"{COLUNA_DATA_SQL} >= ?")
+        parametros.append(inicio)
+    if fim is not None:
+        condicoes.append(f"{COLUNA_DATA_SQL} < ?")
+        parametros.append(fim)
+    selecao = ", ".join(colunas) if colunas else "*"
+    sql = f"SELECT {selecao} FROM {tabela}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    return sql + f" ORDER BY {COLUNA_DATA_SQL}", tuple(parametros)
+
+
+def consultar_periodo(conexao, inicio=None, fim=None, colunas=None, tabela=banco.TABELA):
+    """
+    Lê os registros de um período [inicio, fim] (dias inteiros) por uma busca no `idx_data`.
+
+    Parâmetros:
+    - conexao (sqlite3.Connection): Conexão com o banco.
+    - inicio (str | Timestamp, opcional): Primeiro dia do período.
+    - fim (str | Timestamp, opcional): Último dia do período.
+    - colunas (list, opcional): Colunas lidas. Se None, todas.
+    - tabela (str): Tabela consultada.
+
+    Retorna:
+    - pandas.DataFrame: Registros do período, em ordem de data.
+    """
+    sql, parametros = _sql_periodo(*intervalo_periodo(inicio, fim), colunas, tabela)
+    return pd.read_sql_query(sql, conexao, params=parametros)
+
+
+def consultar_ano(conexao, ano, colunas=None, tabela=banco.TABELA):
+    """
+    Lê os registros de um ano, percorrendo só o trecho do ano no `idx_data`.
+
+    Parâmetros:
+    - conexao (sqlite3.Connection): Conexão com o banco.
+    - ano (int): Ano.
+    - colunas (list, opcional): Colunas lidas. Se None, todas.
+    - tabela (str): Tabela consultada.
+
+    Retorna:
+    - pandas.DataFrame: Registros do ano, em ordem de data.
+    """
+    sql, parametros = _sql_periodo(*intervalo_ano(ano), colunas, tabela)
+    return pd.read_sql_query(sql, conexao, params=parametros)
+
+
+def consultar_mes(conexao, ano, mes, colunas=None, tabela=banco.TABELA):
+    """
+    Lê os registros de um mês, percorrendo só o trecho do mês no `idx_data`.
+
+    Parâmetros:
+    - conexao (sqlite3.Connection): Conexão com o banco.
+    - ano (int): Ano.
+    - mes (int): Mês (1 a 12).
+    - colunas (list, opcional): Colunas lidas. Se None, todas.
+    - tabela (str): Tabela consultada.
+
+    Retorna:
+    - pandas.DataFrame: Registros do mês, em ordem de data.
+    """
+    sql, parametros = _sql_periodo(*intervalo_mes(ano, mes), colunas, tabela)
+    return pd.read_sql_query(sql, conexao, params=parametros)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Consultas por período com faixas de datas indexadas.")
+    parser.add_argument("--banco", default=str(banco.CAMINHO_BANCO), help="Banco SQLite.")
+    parser.add_argument("--ano", type=int, help="Ano consultado.")
+    parser.add_argument("--mes", type=int, help="Mês consultado (junto com --ano).")
+    parser.add_argument("--inicio", help="Data inicial (AAAA-MM-DD).")
+    parser.add_argument("--fim", help="Data final (AAAA-MM-DD).")
+    parser.add_argument("--reescrever", help="Arquivo SQL cujos filtros por strftime são reescritos em faixas.")
+    args = parser.parse_args(argumentos)
+
+    if args.reescrever:
+        print(reescrever_filtros(Path(args.reescrever).read_text(encoding="utf-8")))
+        return
+
+    if args.ano is not None and args.mes is not None:
+        inicio, fim = intervalo_mes(args.ano, args.mes)
+    elif args.ano is not None:
+        inicio, fim = intervalo_ano(args.ano)
+    else:
+        inicio, fim = intervalo_periodo(args.inicio, args.fim)
+    sql, parametros = _sql_periodo(inicio, fim, None, banco.TABELA)
+
+    with sqlite3.connect(args.banco) as conexao:
+        dados = pd.read_sql_query(sql, conexao, params=parametros)
+        plano = plano_consulta(conexao, sql, parametros)
+        indexada = busca_indice(conexao, sql, parametros)
+
+    print(f"✅ {len(dados)} registros entre {inicio or 'o início'} e {fim or 'o fim'} (fim exclusivo)")
+    print(dados.head().to_string(index=False))
+    print("\nPlano da consulta:")
+    for passo in plano:
+        print(f"  {passo['detalhe']}")
+    if not indexada:
+        print("⚠️ A consulta não usa busca por índice; crie o idx_data com `python -m uber_stocks.banco`")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Correlações móveis de Pearson e Spearman atualizadas de forma incremental.
+
+`pearsonr`/`spearmanr` respondem apenas pela correlação do histórico inteiro e são
+recalculadas a cada execução. Aqui a correlação é calculada numa janela móvel:
+
+- Pearson: somas correntes de x, y, x², y² e xy, atualizadas em O(1) por pregão.
+- Spearman: os postos (ranks) de cada valor dentro da janela são mantidos e apenas
+  ajustados quando um valor entra ou sai (`postos += (valores > v) + 0.5 * (valores == v)`),
+  sem reordenar a janela a cada passo.
+
+O `MotorCorrelacao` processa várias séries (ex.: vários tickers) ao mesmo tempo: cada passo
+é uma operação vetorizada sobre todas elas. Pregões em que x ou y falta (NaN) ocupam a
+janela sem entrar nas contas, e só as janelas que os contêm ficam sem correlação (NaN),
+como em `pearson_movel` e no `rolling().corr()` do pandas.
+"""
+import numpy as np
+
+METODOS = ("pearson", "spearman")
+
+
+class MotorCorrelacao:
+    """
+    Correlações de Pearson e Spearman numa janela móvel, para várias séries em paralelo.
+
+    Parâmetros:
+    - janela (int): Tamanho da janela, em pregões.
+    - series (int): Quantidade de pares (x, y) processados em paralelo.
+    """
+
+    def __init__(self, janela, series=1):
+        if janela < 2:
+            raise ValueError("A janela deve ter pelo menos 2 pregões.")
+        self.janela = int(janela)
+        self.series = int(series)
+
+        forma = (self.series, self.janela)
+        self._x = np.zeros(forma)
+        self._y = np.zeros(forma)
+        self._postos_x = np.zeros(forma)
+        self._postos_y = np.zeros(forma)
+        self._faltas = np.zeros(forma, dtype=bool)
+        self._posicao = 0
+        self._contagem = 0
+        # Somas correntes: x, y, x², y² e xy, uma linha por série
+        self._somas = np.zeros((5, self.series))
+
+    def __len__(self):
+        return self._contagem
+
+    def _recalcular_somas(self):
+        # Somas exatas a partir da janela, a cada volta completa do buffer
+        x, y = self._x, self._y
+        self._somas = np.stack([x.sum(axis=1), y.sum(axis=1), (x * x).sum(axis=1),
+                                (y * y).sum(axis=1), (x * y).sum(axis=1)])
+
+    @staticmethod
+    def _ajustar_postos(valores, postos, valor, sinal, ocupadas):
+        # Cada valor da janela sobe (entrada) ou desce (saída) meio posto por empate e um posto
+        # por valor menor que ele; posições ainda vazias não são tocadas
+        ajuste = (valores > valor[:, None]) + 0.5 * (valores == valor[:, None])
+        postos += sinal * ajuste * ocupadas
+
+    @staticmethod
+    def _pearson(n, sx, sy, sxx, syy, sxy):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / np.sqrt(var_x * var_y)
+        # Janelas constantes não têm correlação definida, como no `rolling().corr()` do pandas
+        corr = np.asarray(corr, dtype="float64")
+        corr[(var_x <= 1e-12 * np.abs(sxx)) | (var_y <= 1e-12 * np.abs(syy))] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def atualizar(self, x, y):
+        """
+        Acrescenta um pregão de cada série e atualiza as correlações.
+
+        Parâmetros:
+        - x (float | array-like): Novo valor de x de cada série (ex.: volume).
+        - y (float | array-like): Novo valor de y de cada série (ex.: preço).
+
+        Retorna:
+        - numpy.ndarray: Correlação de Pearson de cada série (NaN enquanto a janela não estiver
+          completa ou se ela contiver algum valor ausente).
+        - numpy.ndarray: Correlação de Spearman de cada série (idem).
+        """
+        x = np.broadcast_to(np.asarray(x, dtype="float64"), (self.series,))
+        y = np.broadcast_to(np.asarray(y, dtype="float64"), (self.series,))
+        # Um par incompleto entra como zero e é marcado: as janelas que o contêm não são usadas,
+        # e as demais nunca o incluem nas somas nem nos postos
+        faltando = np.isnan(x) | np.isnan(y)
+        x, y = np.where(faltando, 0.0, x), np.where(faltando, 0.0, y)
+
+        p = self._posicao
+        cheia = self._contagem >= self.janela
+        ocupadas = np.arange(self.janela) < self._contagem if not cheia else np.ones(self.janela, dtype=bool)
+
+        if cheia:
+            # Sai o valor mais antigo, que ocupa a posição onde o novo será gravado
+            saindo_x, saindo_y = self._x[:, p].copy(), self._y[:, p].copy()
+            self._somas -= np.stack([saindo_x, saindo_y, saindo_x * saindo_x, saindo_y * saindo_y, saindo_x * saindo_y])
+            ocupadas = ocupadas.copy()
+            ocupadas[p] = False
+            self._ajustar_postos(self._x, self._postos_x, saindo_x, -1, ocupadas)
+            self._ajustar_postos(self._y, self._postos_y, saindo_y, -1, ocupadas)
+
+        # Posto do valor que entra: valores menores + metade dos empates + ele mesmo
+        for valores, postos, novo in ((self._x, self._postos_x, x), (self._y, self._postos_y, y)):
+            menores = ((valores < novo[:, None]) & ocupadas).sum(axis=1)
+            empates = ((valores == novo[:, None]) & ocupadas).sum(axis=1)
+            self._ajustar_postos(valores, postos, novo, 1, ocupadas)
+            postos[:, p] = menores + 0.5 * empates + 1
+
+        self._x[:, p], self._y[:, p] = x, y
+        self._faltas[:, p] = faltando
+        self._somas += np.stack([x, y, x * x, y * y, x * y])
+        self._posicao = (p + 1) % self.janela
+        self._contagem += 1
+        if self._posicao == 0:
+            self._recalcular_somas()
+
+        if self._contagem < self.janela:
+            vazio = np.full(self.series, np.nan)
+            return vazio, vazio.copy()
+
+        n = self.janela
+        pearson = self._pearson(n, *self._somas)
+        # Soma dos postos é sempre n(n+1)/2; só as somas de quadrados e produtos variam
+        soma_postos = n * (n + 1) / 2
+        spearman = self._pearson(
+            n, soma_postos, soma_postos,
+            (self._postos_x ** 2).sum(axis=1), (self._postos_y ** 2).sum(axis=1),
+            (self._postos_x * self._postos_y).sum(axis=1),
+        )
+        incompletas = self._faltas.any(axis=1)
+        pearson[incompletas] = np.nan
+        spearman[incompletas] = np.nan
+        return pearson, spearman
+
+
+def pearson_movel(x, y, janela, min_periodos=None):
+    """
+    Correlação de Pearson numa janela móvel, por somas acumuladas (O(1) por pregão).
+
+    Os dados são centrados na média global antes das somas, o que reduz o cancelamento
+    numérico em séries de grande magnitude como o volume. Pregões em que x ou y falta (NaN)
+    ficam fora das somas, e a janela considera apenas os pares válidos, como o
+    `rolling().corr()` do pandas: uma falha isolada só afeta as janelas que a contêm.
+
+    Parâmetros:
+    - x (array-like): Primeira série (1-D) ou matriz (pregões x séries).
+    - y (array-like): Segunda série, com a mesma forma de `x`.
+    - janela (int): Tamanho da janela.
+    - min_periodos (int, opcional): Mínimo de pares válidos na janela. Se None, a janela inteira.
+
+    Retorna:
+    - numpy.ndarray: Correlação de cada pregão, com a forma de `x` (NaN nas janelas com pares
+      válidos insuficientes).
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    if x.shape != y.shape:
+        raise ValueError("As séries devem ter a mesma forma.")
+    uma_serie = x.ndim == 1
+    x, y = x.reshape(len(x), -1), y.reshape(len(y), -1)
+    min_periodos = janela if min_periodos is None else min_periodos
+
+    # Faltas viram zero nas somas e saem da contagem de pares válidos
+    validos = ~np.isnan(x) & ~np.isnan(y)
+    quantidade = validos.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media_x = np.where(validos, x, 0.0).sum(axis=0) / quantidade
+        media_y = np.where(validos, y, 0.0).sum(axis=0) / quantidade
+    x = np.where(validos, x - media_x, 0.0)
+    y = np.where(validos, y - media_y, 0.0)
+
+    def somas(valores):
+        acumulado = np.concatenate([np.zeros((1, valores.shape[1])), np.cumsum(valores, axis=0)])
+        return acumulado[janela:] - acumulado[:-janela]
+
+    resultado = np.full(x.shape, np.nan)
+    if len(x) >= janela:
+        n = somas(validos.astype("float64"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlacao = MotorCorrelacao._pearson(n, somas(x), somas(y), somas(x * x), somas(y * y), somas(x * y))
+        correlacao[n < max(min_periodos, 2)] = np.nan
+        resultado[janela - 1:] = correlacao
+    return resultado[:, 0] if uma_serie else resultado
+
+
+def correlacao_movel(x, y, janela, metodo="pearson"):
+    """
+    Correlação móvel de Pearson ou Spearman entre duas séries (ou pares de colunas).
+
+    Parâmetros:
+    - x (array-like): Primeira série (1-D) ou matriz (pregões x séries).
+    - y (array-like): Segunda série, com a mesma forma de `x`.
+    - janela (int): Tamanho da janela.
+    - metodo (str): 'pearson' ou 'spearman'.
+
+    Retorna:
+    - numpy.ndarray: Correlação de cada pregão, com a forma de `x` (NaN nas janelas incompletas
+      ou com valores ausentes).
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método inválido: '{metodo}'. Use um de {METODOS}.")
+    if metodo == "pearson":
+        return pearson_movel(x, y, janela)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    if x.shape != y.shape:
+        raise ValueError("As séries devem ter a mesma forma.")
+    uma_serie = x.ndim == 1
+    x, y = x.reshape(len(x), -1), y.reshape(len(y), -1)
+
+    # Um passo por pregão, vetorizado sobre todas as séries
+    motor = MotorCorrelacao(janela, x.shape[1])
+    resultado = np.empty(x.shape)
+    for i in range(len(x)):
+        _, resultado[i] = motor.atualizar(x[i], y[i])
+    return resultado[:, 0] if uma_serie else resultado
@@ -0,0 +1,274 @@
+"""
+Matrizes de correlação e de beta dos retornos entre vários ativos, calculadas em blocos.
+
+Substitui a comparação par a par com `pearsonr` (para 500 tickers, um quarto de milhão de
+chamadas ao SciPy): os calendários de pregões são alinhados uma única vez numa matriz
+(pregões x ativos), e a matriz N x N é montada em blocos de colunas, cada um resolvido com
+produtos de matrizes sobre as mesmas somas usadas pelo motor de `uber_stocks.correlacao`
+(n, Σx, Σy, Σx², Σy², Σxy). Pregões ausentes de um ativo entram como máscara, de modo que
+cada par usa todos os pregões em comum, como no `DataFrame.corr()` do pandas.
+
+No modo móvel, as matrizes de cada janela são geradas uma a uma, e a correlação e o beta de
+todos os ativos contra uma referência (ex.: um índice) saem de somas acumuladas, em O(1) por
+pregão.
+
+Uso:
+    python -m uber_stocks.correlacao_ativos --tickers UBER LYFT TSLA SPY --referencia SPY
+    python -m uber_stocks.correlacao_ativos --referencia SPY --janela 60 --saida correlacoes.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento, multiplos_tickers
+
+COLUNA_PRECO = "Adj Close"
+BLOCO_PADRAO = 256
+FOCO_PADRAO = "UBER"
+
+
+def alinhar_precos(dados_por_ticker, coluna_preco=COLUNA_PRECO, coluna_data=carregamento.COLUNA_DATA):
+    """
+    Alinha os preços de todos os ativos num único calendário (a união dos pregões).
+
+    Parâmetros:
+    - dados_por_ticker (dict): Ticker -> DataFrame com as colunas de data e de preço.
+    - coluna_preco (str): Coluna de preço usada nos retornos.
+    - coluna_data (str): Nome da coluna de datas.
+
+    Retorna:
+    - pandas.DatetimeIndex: Pregões do calendário comum.
+    - list: Tickers, na ordem das colunas.
+    - numpy.ndarray: Matriz (pregões x ativos), com NaN onde o ativo não negociou.
+    """
+    tickers = list(dados_por_ticker)
+    datas_por_ticker = [
+        pd.to_datetime(dados_por_ticker[ticker][coluna_data]).to_numpy(dtype="datetime64[ns]") for ticker in tickers
+    ]
+    calendario = np.unique(np.concatenate(datas_por_ticker)) if tickers else np.array([], dtype="datetime64[ns]")
+
+    precos = np.full((len(calendario), len(tickers)), np.nan, order="F")
+    for coluna, (ticker, datas) in enumerate(zip(tickers, datas_por_ticker)):
+        valores = dados_por_ticker[ticker][coluna_preco].to_numpy(dtype="float64", na_value=np.nan)
+        precos[np.searchsorted(calendario, datas), coluna] = valores
+    return pd.DatetimeIndex(calendario), tickers, precos
+
+
+def calcular_retornos(precos):
+    """
+    Retornos simples de cada pregão em relação ao anterior do calendário comum.
+
+    O retorno fica ausente quando falta o preço do pregão ou do pregão anterior.
+
+    Parâmetros:
+    - precos (numpy.ndarray): Matriz (pregões x ativos).
+
+    Retorna:
+    - numpy.ndarray: Matriz (pregões - 1) x ativos.
+    """
+    precos = np.asarray(precos, dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.asfortranarray(precos[1:] / precos[:-1] - 1)
+
+
+def _media_valida(valores, mascara):
+    # Média de cada coluna só sobre as posições válidas; colunas vazias ficam com média 0
+    return np.where(mascara, valores, 0.0).sum(axis=0) / np.maximum(mascara.sum(axis=0), 1)
+
+
+def _preparar(retornos):
+    # Centraliza pela média de cada coluna (reduz o cancelamento nas somas) e separa a máscara
+    retornos = np.asarray(retornos, dtype="float64")
+    mascara = ~np.isnan(retornos)
+    valores = np.asfortranarray(np.where(mascara, retornos - _media_valida(retornos, mascara), 0.0))
+    return valores, np.asfortranarray(mascara.astype("float64"))
+
+
+def _bloco(valores_a, mascara_a, valores_b, mascara_b, min_periodos):
+    # Somas de todos os pares (a, b) do bloco em seis produtos de matrizes
+    n = mascara_a.T @ mascara_b
+    sx = valores_a.T @ mascara_b
+    sy = mascara_a.T @ valores_b
+    sxx = (valores_a * valores_a).T @ mascara_b
+    syy = mascara_a.T @ (valores_b * valores_b)
+    sxy = valores_a.T @ valores_b
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        correlacao = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+        # beta[a, b]: sensibilidade do ativo a ao ativo b, no período em comum
+        beta_ab = cov / var_y
+        beta_ba = cov / var_x
+
+    insuficientes = n < max(min_periodos, 2)
+    constantes = (var_x <= 1e-12 * np.abs(sxx)) | (var_y <= 1e-12 * np.abs(syy))
+    correlacao[insuficientes | constantes] = np.nan
+    beta_ab[insuficientes | (var_y <= 1e-12 * np.abs(syy))] = np.nan
+    beta_ba[insuficientes | (var_x <= 1e-12 * np.abs(sxx))] = np.nan
+    return correlacao, beta_ab, beta_ba
+
+
+def _matrizes(valores, mascara, min_periodos, bloco):
+    # Só os blocos da diagonal para cima são calculados; os de baixo são espelhados
+    ativos = valores.shape[1]
+    correlacao = np.empty((ativos, ativos))
+    beta = np.empty((ativos, ativos))
+    for i in range(0, ativos, bloco):
+        fatia_i = slice(i, min(i + bloco, ativos))
+        for j in range(i, ativos, bloco):
+            fatia_j = slice(j, min(j + bloco, ativos))
+            corr, beta_ij, beta_ji = _bloco(valores[:, fatia_i], mascara[:, fatia_i],
+                                            valores[:, fatia_j], mascara[:, fatia_j], min_periodos)
+            correlacao[fatia_i, fatia_j] = corr
+            correlacao[fatia_j, fatia_i] = corr.T
+            beta[fatia_i, fatia_j] = beta_ij
+            beta[fatia_j, fatia_i] = beta_ji.T
+    return correlacao, beta
+
+
+def matriz_correlacao(retornos, tickers=None, min_periodos=1, bloco=BLOCO_PADRAO):
+    """
+    Matrizes N x N de correlação de Pearson e de beta entre os retornos de todos os ativos.
+
+    Parâmetros:
+    - retornos (numpy.ndarray | pandas.DataFrame): Matriz (pregões x ativos); NaN onde não há retorno.
+    - tickers (list, opcional): Nomes das colunas. Se None, as colunas do DataFrame ou 0..N-1.
+    - min_periodos (int): Mínimo de pregões em comum para que o par tenha valor.
+    - bloco (int): Quantidade de ativos por bloco.
+
+    Retorna:
+    - pandas.DataFrame: Correlação entre cada par de ativos.
+    - pandas.DataFrame: Beta da linha em relação à coluna (cov(linha, coluna) / var(coluna)).
+    """
+    if isinstance(retornos, pd.DataFrame):
+        tickers = list(retornos.columns) if tickers is None else tickers
+        retornos = retornos.to_numpy(dtype="float64", na_value=np.nan)
+    if bloco < 1:
+        raise ValueError("O bloco deve ter pelo menos 1 ativo.")
+    valores, mascara = _preparar(retornos)
+    tickers = list(range(valores.shape[1])) if tickers is None else list(tickers)
+
+    correlacao, beta = _matrizes(valores, mascara, min_periodos, bloco)
+    return pd.DataFrame(correlacao, index=tickers, columns=tickers), pd.DataFrame(beta, index=tickers, columns=tickers)
+
+
+def matrizes_moveis(retornos, janela, passo=1, min_periodos=None, bloco=BLOCO_PADRAO):
+    """
+    Gera as matrizes de correlação e de beta de cada janela móvel, uma de cada vez.
+
+    As matrizes não são acumuladas: quem consome decide o que guardar (ex.: só a média dos
+    pares ou a linha de um ticker), evitando manter (pregões x N x N) valores em memória.
+
+    Parâmetros:
+    - retornos (numpy.ndarray): Matriz (pregões x ativos).
+    - janela (int): Tamanho da janela, em pregões.
+    - passo (int): Intervalo, em pregões, entre duas janelas geradas.
+    - min_periodos (int, opcional): Mínimo de pregões em comum na janela. Se None, a janela inteira.
+    - bloco (int): Quantidade de ativos por bloco.
+
+    Retorna:
+    - generator: Tuplas (posição do último pregão da janela, correlação, beta), em numpy.ndarray.
+    """
+    if janela < 2:
+        raise ValueError("A janela deve ter pelo menos 2 pregões.")
+    retornos = np.asarray(retornos, dtype="float64")
+    min_periodos = janela if min_periodos is None else min_periodos
+    for fim in range(janela, len(retornos) + 1, max(1, int(passo))):
+        valores, mascara = _preparar(retornos[fim - janela:fim])
+        correlacao, beta = _matrizes(valores, mascara, min_periodos, bloco)
+        yield fim - 1, correlacao, beta
+
+
+def correlacao_beta_movel(retornos, referencia, janela, min_periodos=None):
+    """
+    Correlação e beta móveis de todos os ativos contra uma série de referência.
+
+    As somas de cada janela saem de somas acumuladas, em O(1) por pregão e ativo; a janela
+    considera apenas os pregões em que o ativo e a referência têm retorno.
+
+    Parâmetros:
+    - retornos (numpy.ndarray): Matriz (pregões x ativos).
+    - referencia (numpy.ndarray): Retornos da referência (ex.: o índice), um por pregão.
+    - janela (int): Tamanho da janela, em pregões.
+    - min_periodos (int, opcional): Mínimo de pregões válidos na janela. Se None, a janela inteira.
+
+    Retorna:
+    - numpy.ndarray: Correlação de cada pregão e ativo (NaN nas janelas incompletas).
+    - numpy.ndarray: Beta de cada pregão e ativo em relação à referência.
+    """
+    if janela < 2:
+        raise ValueError("A janela deve ter pelo menos 2 pregões.")
+    retornos = np.asarray(retornos, dtype="float64")
+    retornos = retornos.reshape(len(retornos), -1)
+    referencia = np.asarray(referencia, dtype="float64").reshape(-1, 1)
+    if len(referencia) != len(retornos):
+        raise ValueError("A referência deve ter um retorno por pregão.")
+    min_periodos = janela if min_periodos is None else min_periodos
+
+    validos = ~np.isnan(retornos) & ~np.isnan(referencia)
+    x = np.where(validos, retornos - _media_valida(retornos, validos), 0.0)
+    y = np.where(validos, referencia - _media_valida(referencia, ~np.isnan(referencia)), 0.0)
+
+    def somas(valores):
+        acumulado = np.concatenate([np.zeros((1, valores.shape[1])), np.cumsum(valores, axis=0)])
+        return acumulado[janela:] - acumulado[:-janela]
+
+    correlacao = np.full(retornos.shape, np.nan)
+    beta = np.full(retornos.shape, np.nan)
+    if len(retornos) >= janela:
+        n = somas(validos.astype("float64"))
+        sx, sy, sxx, syy, sxy = somas(x), somas(y), somas(x * x), somas(y * y), somas(x * y)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy - sx * sy / n
+            var_x = sxx - sx * sx / n
+            var_y = syy - sy * sy / n
+            corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+            b = cov / var_y
+        insuficientes = n < max(min_periodos, 2)
+        corr[insuficientes | (var_x <= 1e-12 * np.abs(sxx)) | (var_y <= 1e-12 * np.abs(syy))] = np.nan
+        b[insuficientes | (var_y <= 1e-12 * np.abs(syy))] = np.nan
+        correlacao[janela - 1:], beta[janela - 1:] = corr, b
+    return correlacao, beta
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Correlação e beta dos retornos entre vários ativos.")
+    parser.add_argument("--tickers", nargs="*", help="Tickers lidos do conjunto particionado (padrão: todos).")
+    parser.add_argument("--destino", default=str(multiplos_tickers.particoes.DIRETORIO_PARTICOES),
+                        help="Pasta raiz das partições.")
+    parser.add_argument("--foco", default=FOCO_PADRAO, help="Ticker cuja linha da matriz é exibida.")
+    parser.add_argument("--referencia", default=None, help="Ticker usado como índice de referência do beta.")
+    parser.add_argument("--janela", type=int, default=None, help="Janela móvel, em pregões (opcional).")
+    parser.add_argument("--saida", default=None, help="CSV onde gravar a matriz de correlação.")
+    args = parser.parse_args(argumentos)
+
+    dados_por_ticker = multiplos_tickers.carregar_tickers(args.tickers, args.destino)
+    if len(dados_por_ticker) < 2:
+        print(f"⚠️ São necessários pelo menos dois tickers em '{args.destino}'")
+        return
+    datas, tickers, precos = alinhar_precos(dados_por_ticker)
+    retornos = calcular_retornos(precos)
+
+    if args.janela:
+        # Apenas a janela mais recente, calculada sobre os últimos pregões
+        retornos = retornos[-args.janela:]
+    correlacao, beta = matriz_correlacao(retornos, tickers)
+    print(f"✅ Matriz {len(tickers)} x {len(tickers)} de {len(retornos)} pregões "
+          f"({datas[-len(retornos)].date()} a {datas[-1].date()})")
+
+    if args.foco in tickers:
+        linha = pd.DataFrame({"Correlação": correlacao.loc[args.foco], f"Beta de {args.foco}": beta.loc[args.foco]})
+        print(linha.drop(index=args.foco).sort_values("Correlação", ascending=False).to_string())
+    if args.referencia in tickers:
+        print(f"\nBeta de cada ativo em relação a {args.referencia}:")
+        print(beta[args.referencia].drop(index=args.referencia).sort_values(ascending=False).to_string())
+    if args.saida:
+        correlacao.to_csv(args.saida)
+        print(f"✅ Matriz de correlação salva em '{args.saida}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Índice de cruzamentos entre duas médias móveis.
+
+Em vez de contar `(MM7 > MM30).diff() == True` sobre todo o histórico a cada renderização,
+os cruzamentos de cada par de janelas são calculados uma vez por versão dos dados e
+guardados como arrays compactos (data, direção e preço no cruzamento). Consultas como
+"últimos N cruzamentos de alta" ou "cruzamentos no período" são respondidas por busca binária.
+
+Uso:
+    python -m uber_stocks.cruzamentos --curta 7 --longa 30 --ultimos 5 --direcao alta
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento
+from uber_stocks.medias_moveis import banco_medias_moveis
+
+ALTA = 1
+BAIXA = -1
+DIRECOES = {"alta": ALTA, "baixa": BAIXA}
+
+
+class IndiceCruzamentos:
+    """
+    Cruzamentos de uma média curta com uma média longa, ordenados por data.
+
+    Parâmetros:
+    - datas (numpy.ndarray): Datas dos cruzamentos (datetime64[ns]).
+    - direcoes (numpy.ndarray): 1 quando a curta passa para cima da longa, -1 quando passa para baixo.
+    - precos (numpy.ndarray): Preço no pregão do cruzamento.
+    - curta (int): Janela da média curta.
+    - longa (int): Janela da média longa.
+    - versao (str, opcional): Versão dos dados de origem.
+    """
+
+    def __init__(self, datas, direcoes, precos, curta, longa, versao=None):
+        self.datas = np.asarray(datas, dtype="datetime64[ns]")
+        self.direcoes = np.asarray(direcoes, dtype="int8")
+        self.precos = np.asarray(precos, dtype="float64")
+        self.curta = int(curta)
+        self.longa = int(longa)
+        self.versao = versao
+        # Posições de cada direção, para responder "últimos N de alta" sem filtrar o índice todo
+        self._posicoes = {direcao: np.flatnonzero(self.direcoes == direcao) for direcao in (ALTA, BAIXA)}
+
+    def __len__(self):
+        return len(self.datas)
+
+    def _selecionar(self, posicoes):
+        return pd.DataFrame({
+            'Date': self.datas[posicoes],
+            'Direção': np.where(self.direcoes[posicoes] == ALTA, 'alta', 'baixa'),
+            'Preço': self.precos[posicoes],
+        })
+
+    def _todas_posicoes(self, direcao):
+        if direcao is None:
+            return np.arange(len(self))
+        return self._posicoes[DIRECOES.get(direcao, direcao)]
+
+    def ultimos(self, n, direcao=None):
+        """
+        Retorna os N cruzamentos mais recentes.
+
+        Parâmetros:
+        - n (int): Quantidade de cruzamentos.
+        - direcao (str, opcional): 'alta' ou 'baixa'. Se None, ambas.
+
+        Retorna:
+        - pandas.DataFrame: Cruzamentos com 'Date', 'Direção' e 'Preço', do mais antigo ao mais recente.
+        """
+        posicoes = self._todas_posicoes(direcao)
+        return self._selecionar(posicoes[max(len(posicoes) - n, 0):])
+
+    def _limites(self, inicio, fim):
+        primeira = 0 if inicio is None else np.searchsorted(self.datas, np.datetime64(pd.Timestamp(inicio)), side="left")
+        ultima = len(self) if fim is None else np.searchsorted(self.datas, np.datetime64(pd.Timestamp(fim)), side="right")
+        return int(primeira), int(ultima)
+
+    def no_periodo(self, inicio=None, fim=None, direcao=None):
+        """
+        Retorna os cruzamentos de um intervalo de datas, localizado por busca binária.
+
+        Parâmetros:
+        - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+        - fim (str | Timestamp, opcional): Data final (inclusiva).
+        - direcao (str, opcional): 'alta' ou 'baixa'. Se None, ambas.
+
+        Retorna:
+        - pandas.DataFrame: Cruzamentos com 'Date', 'Direção' e 'Preço'.
+        """
+        primeira, ultima = self._limites(inicio, fim)
+        posicoes = self._todas_posicoes(direcao)
+        return self._selecionar(posicoes[np.searchsorted(posicoes, primeira):np.searchsorted(posicoes, ultima)])
+
+    def contar(self, inicio=None, fim=None, direcao=None):
+        """
+        Conta os cruzamentos de um intervalo sem materializar as linhas.
+
+        Parâmetros:
+        - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+        - fim (str | Timestamp, opcional): Data final (inclusiva).
+        - direcao (str, opcional): 'alta' ou 'baixa'. Se None, ambas.
+
+        Retorna:
+        - int: Quantidade de cruzamentos.
+        """
+        primeira, ultima = self._limites(inicio, fim)
+        posicoes = self._todas_posicoes(direcao)
+        return int(np.searchsorted(posicoes, ultima) - np.searchsorted(posicoes, primeira))
+
+    def salvar(self, caminho):
+        """
+        Grava o índice (.npz) com troca atômica do arquivo.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo.
+        """
+        caminho = Path(caminho)
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        with open(temporario, "wb") as arquivo:
+            np.savez(
+                arquivo,
+                datas=self.datas.view("int64"),
+                direcoes=self.direcoes,
+                precos=self.precos,
+                janelas=np.array([self.curta, self.longa]),
+                versao=np.array(self.versao or "", dtype=str),
+            )
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """
+        Lê um índice gravado por `salvar`.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo.
+
+        Retorna:
+        - IndiceCruzamentos | None: Índice lido, ou None se o arquivo não existe ou é inválido.
+        """
+        try:
+            with np.load(caminho, allow_pickle=False) as arquivo:
+                curta, longa = arquivo["janelas"].tolist()
+                return cls(arquivo["datas"].view("datetime64[ns]"), arquivo["direcoes"], arquivo["precos"],
+                           curta, longa, str(arquivo["versao"]) or None)
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def detectar_cruzamentos(datas, precos, curta=7, longa=30, versao=None):
+    """
+    Localiza os cruzamentos entre as médias móveis simples de duas janelas.
+
+    Só há cruzamento entre dois pregões seguidos em que ambas as médias estão definidas;
+    o primeiro pregão com a média longa completa não conta como cruzamento.
+
+    Parâmetros:
+    - datas (array-like): Datas em ordem cronológica.
+    - precos (array-like): Preços de fechamento.
+    - curta (int): Janela da média curta.
+    - longa (int): Janela da média longa.
+    - versao (str, opcional): Versão dos dados de origem.
+
+    Retorna:
+    - IndiceCruzamentos: Índice com todos os cruzamentos.
+    """
+    precos = np.asarray(precos, dtype="float64")
+    medias = banco_medias_moveis(precos, [curta, longa], "simples")
+    validas = ~np.isnan(medias).any(axis=1)
+    acima = medias[:, 0] > medias[:, 1]
+
+    mudou = (acima[1:] != acima[:-1]) & validas[1:] & validas[:-1]
+    posicoes = np.flatnonzero(mudou) + 1
+    return IndiceCruzamentos(
+        pd.to_datetime(np.asarray(datas)[posicoes]).to_numpy(dtype="datetime64[ns]"),
+        np.where(acima[posicoes], ALTA, BAIXA),
+        precos[posicoes],
+        curta,
+        longa,
+        versao,
+    )
+
+
+def caminho_indice(curta, longa, caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho do índice de um par de janelas, guardado ao lado do CSV processado.
+
+    Parâmetros:
+    - curta (int): Janela da média curta.
+    - longa (int): Janela da média longa.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo .npz do índice.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(f"{caminho_processado.stem}.cruzamentos_{curta}_{longa}.npz")
+
+
+def obter_indice(curta=7, longa=30, caminho_processado=carregamento.CAMINHO_PROCESSADO,
+                 coluna_preco="Close", coluna_data=carregamento.COLUNA_DATA):
+    """
+    Lê o índice de cruzamentos salvo, recalculando-o apenas se os dados mudaram.
+
+    Parâmetros:
+    - curta (int): Janela da média curta.
+    - longa (int): Janela da média longa.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    - coluna_preco (str): Coluna de preço.
+    - coluna_data (str): Coluna de datas.
+
+    Retorna:
+    - IndiceCruzamentos: Índice da versão atual dos dados.
+    """
+    # Garante o snapshot do carregamento, que guarda o hash usado como versão
+    if carregamento.validar_snapshot(caminho_processado) is None:
+        carregamento.carregar_dados(caminho_processado)
+    versao = carregamento.versao_dados(caminho_processado)
+
+    caminho = caminho_indice(curta, longa, caminho_processado)
+    indice = IndiceCruzamentos.carregar(caminho)
+    if indice is not None and indice.versao == versao:
+        return indice
+
+    dados = carregamento.carregar_dados(caminho_processado)
+    indice = detectar_cruzamentos(dados[coluna_data], dados[coluna_preco], curta, longa, versao)
+    try:
+        indice.salvar(caminho)
+    except OSError:
+        # Sem permissão de escrita o índice continua disponível, apenas sem ser salvo
+        pass
+    return indice
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Consulta os cruzamentos de médias móveis.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--curta", type=int, default=7, help="Janela da média curta.")
+    parser.add_argument("--longa", type=int, default=30, help="Janela da média longa.")
+    parser.add_argument("--ultimos", type=int, default=10, help="Quantidade de cruzamentos exibidos.")
+    parser.add_argument("--direcao", choices=sorted(DIRECOES), help="Filtra pela direção do cruzamento.")
+    parser.add_argument("--inicio", help="Data inicial (AAAA-MM-DD).")
+    parser.add_argument("--fim", help="Data final (AAAA-MM-DD).")
+    args = parser.parse_args(argumentos)
+
+    indice = obter_indice(args.curta, args.longa, args.processado)
+    if args.inicio or args.fim:
+        cruzamentos = indice.no_periodo(args.inicio, args.fim, args.direcao).tail(args.ultimos)
+    else:
+        cruzamentos = indice.ultimos(args.ultimos, args.direcao)
+
+    print(f"✅ {len(indice)} cruzamentos entre MM{args.curta} e MM{args.longa}")
+    if cruzamentos.empty:
+        print("⚠️ Nenhum cruzamento encontrado para os filtros informados.")
+    else:
+        print(cruzamentos.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+Estatísticas descritivas acumuladas de forma incremental e combináveis entre partições.
+
+As páginas chamavam `.describe()` sobre colunas recém-derivadas (`Diferenca`,
+`Volatilidade`, `Volume`, `Close`) a cada execução, ordenando a coluna inteira para obter
+os quantis. O `AcumuladorEstatisticas` mantém contagem, média e variância (Welford), mínimo,
+máximo, contagens acima de limiares fixos e um t-digest para os quantis: cada novo pregão
+atualiza o acumulador em tempo constante (amortizado) e acumuladores de partições ou
+tickers diferentes podem ser combinados com `mesclar`.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento
+
+COMPRESSAO_PADRAO = 200
+VERSAO_ESTADO = 2
+
+# Métricas acompanhadas pelas páginas: como derivar cada uma e quais limiares contar
+METRICAS = {
+    "Diferenca": {"calculo": lambda dados: dados["Close"] - dados["Open"], "limiares": (0.0,)},
+    "Volatilidade": {"calculo": lambda dados: dados["High"] - dados["Low"], "limiares": (5.0,)},
+    "Volume": {"calculo": lambda dados: dados["Volume"], "limiares": ()},
+    "Close": {"calculo": lambda dados: dados["Close"], "limiares": ()},
+}
+
+
+class TDigest:
+    """
+    Esboço de quantis (t-digest de fusão) combinável entre partições.
+
+    Os valores ficam num buffer até que ele passe de `10 * compressao`; só então são
+    fundidos em até ~δ centróides, com a função de escala k1, que mantém os centróides das
+    caudas pequenos. Enquanto o total não ultrapassa o buffer os quantis são exatos.
+
+    Parâmetros:
+    - compressao (int): Parâmetro δ; mais centróides significam quantis mais precisos.
+    """
+
+    def __init__(self, compressao=COMPRESSAO_PADRAO):
+        self.compressao = int(compressao)
+        self._medias = np.empty(0)
+        self._pesos = np.empty(0)
+        self._pendentes_medias = []
+        self._pendentes_pesos = []
+        self._qtd_pendentes = 0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    @property
+    def total(self):
+        return float(self._pesos.sum() + sum(pesos.sum() for pesos in self._pendentes_pesos))
+
+    def adicionar(self, valores, pesos=None):
+        """
+        Acrescenta valores (e, opcionalmente, seus pesos) ao esboço.
+
+        Parâmetros:
+        - valores (array-like): Valores observados; ausentes são ignorados.
+        - pesos (array-like, opcional): Peso de cada valor. Se None, todos pesam 1.
+        """
+        valores = np.atleast_1d(np.asarray(valores, dtype="float64")).ravel()
+        pesos = np.ones(len(valores)) if pesos is None else np.atleast_1d(np.asarray(pesos, dtype="float64")).ravel()
+        validos = ~np.isnan(valores)
+        valores, pesos = valores[validos], pesos[validos]
+        if len(valores) == 0:
+            return
+
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+        self._pendentes_medias.append(valores)
+        self._pendentes_pesos.append(pesos)
+        self._qtd_pendentes += len(valores)
+        if self._qtd_pendentes > 10 * self.compressao:
+            self._comprimir()
+
+    def _juntar(self):
+        # Centróides e pendentes num único par de arrays ordenados
+        medias = np.concatenate([self._medias, *self._pendentes_medias])
+        pesos = np.concatenate([self._pesos, *self._pendentes_pesos])
+        ordem = np.argsort(medias, kind="stable")
+        return medias[ordem], pesos[ordem]
+
+    def _comprimir(self):
+        medias, pesos = self._juntar()
+        self._pendentes_medias, self._pendentes_pesos, self._qtd_pendentes = [], [], 0
+        if len(medias) == 0:
+            return
+
+        # Cada ponto vai para o grupo da faixa inteira de k(q) em que começa: como k1 cresce
+        # devagar no meio e rápido nas pontas, os centróides das caudas ficam com poucos pontos
+        acumulado = np.cumsum(pesos)
+        q_inicio = (acumulado - pesos) / acumulado[-1]
+        k = self.compressao / np.pi * np.arcsin(2 * q_inicio - 1)
+        grupos = np.floor(k - k[0]).astype("int64")
+        inicios = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+
+        self._pesos = np.add.reduceat(pesos, inicios)
+        self._medias = np.add.reduceat(medias * pesos, inicios) / self._pesos
+
+    def mesclar(self, outro):
+        """
+        Incorpora os centróides e os valores pendentes de outro esboço.
+
+        Parâmetros:
+        - outro (TDigest): Esboço de outra partição ou ticker.
+        """
+        self.adicionar(outro._medias, outro._pesos)
+        for medias, pesos in zip(outro._pendentes_medias, outro._pendentes_pesos):
+            self.adicionar(medias, pesos)
+        # As médias dos centróides não guardam os extremos: eles vêm do outro esboço
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+
+    def quantil(self, q):
+        """
+        Estima quantis, interpolando linearmente entre os centros dos centróides.
+
+        Com centróides unitários o resultado coincide com `Series.quantile` (interpolação linear).
+
+        Parâmetros:
+        - q (float | array-like): Quantis entre 0 e 1.
+
+        Retorna:
+        - float | numpy.ndarray: Valores estimados (NaN se o esboço estiver vazio).
+        """
+        medias, pesos = self._juntar()
+        if len(medias) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+        total = pesos.sum()
+        centros = np.cumsum(pesos) - pesos / 2
+        # Posição 0.5 corresponde ao mínimo e total - 0.5 ao máximo, como nos ranks do pandas
+        posicoes = np.r_[0.5, centros, total - 0.5]
+        valores = np.r_[self.minimo, medias, self.maximo]
+        alvo = np.asarray(q, dtype="float64") * (total - 1) + 0.5
+        return np.interp(alvo, posicoes, valores)
+
+    def media_cauda(self, q):
+        """
+        Estima a média da fração `q` de menores valores (a cauda inferior).
+
+        O centróide que contém o limite entra apenas com o peso que cabe na cauda. Com
+        centróides unitários o resultado é a média exata dos `q * total` menores valores.
+
+        Parâmetros:
+        - q (float): Fração da cauda, entre 0 e 1.
+
+        Retorna:
+        - float: Média estimada (NaN se o esboço estiver vazio).
+        """
+        medias, pesos = self._juntar()
+        if len(medias) == 0 or q <= 0:
+            return np.nan
+
+        alvo = q * pesos.sum()
+        anteriores = np.cumsum(pesos) - pesos
+        parcial = np.clip(alvo - anteriores, 0.0, pesos)
+        return float((medias * parcial).sum() / parcial.sum())
+
+    def para_dict(self):
+        medias, pesos = self._juntar() if self._qtd_pendentes else (self._medias, self._pesos)
+        return {
+            "compressao": self.compressao,
+            "medias": medias.tolist(),
+            "pesos": pesos.tolist(),
+            "pendentes": self._qtd_pendentes > 0,
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+        }
+
+    @classmethod
+    def de_dict(cls, estado):
+        digest = cls(estado["compressao"])
+        medias = np.asarray(estado["medias"], dtype="float64")
+        pesos = np.asarray(estado["pesos"], dtype="float64")
+        if estado.get("pendentes"):
+            # Valores ainda não fundidos voltam ao buffer, preservando a exatidão
+            digest._pendentes_medias, digest._pendentes_pesos = [medias], [pesos]
+            digest._qtd_pendentes = len(medias)
+        else:
+            digest._medias, digest._pesos = medias, pesos
+        digest.minimo, digest.maximo = estado["minimo"], estado["maximo"]
+        return digest
+
+
+class AcumuladorEstatisticas:
+    """
+    Contagem, média, variância, mínimo, máximo, contagens por limiar e quantis de uma métrica.
+
+    Parâmetros:
+    - limiares (iterable): Valores para os quais se conta, de forma exata, quantos valores são maiores.
+    - compressao (int): Compressão do t-digest usado nos quantis.
+    """
+
+    def __init__(self, limiares=(), compressao=COMPRESSAO_PADRAO):
+        self.contagem = 0
+        self.media = 0.0
+        self._m2 = 0.0
+        self.limiares = tuple(float(limiar) for limiar in limiares)
+        self._acima = {limiar: 0 for limiar in self.limiares}
+        self.digest = TDigest(compressao)
+
+    @property
+    def minimo(self):
+        return self.digest.minimo if self.contagem else np.nan
+
+    @property
+    def maximo(self):
+        return self.digest.maximo if self.contagem else np.nan
+
+    @property
+    def variancia(self):
+        # Variância amostral (ddof=1), como no `describe` do pandas
+        return self._m2 / (self.contagem - 1) if self.contagem > 1 else np.nan
+
+    def _combinar(self, contagem, media, m2):
+        # Fórmula de Chan para juntar dois conjuntos de (n, média, M2); com n=1 é o passo de Welford
+        total = self.contagem + contagem
+        if total == 0:
+            return
+        delta = media - self.media
+        self.media += delta * contagem / total
+        self._m2 += m2 + delta * delta * self.contagem * contagem / total
+        self.contagem = total
+
+    def atualizar(self, valores):
+        """
+        Acrescenta um valor ou um lote de valores; ausentes são ignorados, como no `describe`.
+
+        Parâmetros:
+        - valores (float | array-like): Novos valores da métrica.
+        """
+        valores = np.atleast_1d(np.asarray(valores, dtype="float64")).ravel()
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return
+
+        media_lote = valores.mean()
+        self._combinar(len(valores), media_lote, float(((valores - media_lote) ** 2).sum()))
+        for limiar in self.limiares:
+            self._acima[limiar] += int(np.count_nonzero(valores > limiar))
+        self.digest.adicionar(valores)
+
+    def mesclar(self, outro):
+        """
+        Incorpora o acumulador de outra partição ou ticker.
+
+        Parâmetros:
+        - outro (AcumuladorEstatisticas): Acumulador a ser incorporado.
+        """
+        self._combinar(outro.contagem, outro.media, outro._m2)
+        for limiar, quantidade in outro._acima.items():
+            if limiar in self._acima:
+                self._acima[limiar] += quantidade
+        self.digest.mesclar(outro.digest)
+
+    def acima(self, limiar):
+        """
+        Quantidade de valores maiores que o limiar.
+
+        A contagem é exata para os limiares acompanhados; para os demais, é estimada pelo t-digest.
+
+        Parâmetros:
+        - limiar (float): Valor de corte.
+
+        Retorna:
+        - int: Quantidade de valores acima do limiar.
+        """
+        limiar = float(limiar)
+        if limiar in self._acima:
+            return self._acima[limiar]
+        medias, pesos = self.digest._juntar()
+        return int(round(pesos[medias > limiar].sum()))
+
+    def descrever(self):
+        """
+        Resumo no formato do `Series.describe()`.
+
+        Retorna:
+        - pandas.Series: count, mean, std, min, 25%, 50%, 75% e max.
+        """
+        quartis = self.digest.quantil([0.25, 0.5, 0.75]) if self.contagem else [np.nan] * 3
+        return pd.Series({
+            'count': float(self.contagem),
+            'mean': self.media if self.contagem else np.nan,
+            'std': np.sqrt(self.variancia),
+            'min': self.minimo,
+            '25%': quartis[0],
+            '50%': quartis[1],
+            '75%': quartis[2],
+            'max': self.maximo,
+        })
+
+    def para_dict(self):
+        return {
+            "contagem": self.contagem,
+            "media": self.media,
+            "m2": self._m2,
+            "acima": [[limiar, quantidade] for limiar, quantidade in self._acima.items()],
+            "digest": self.digest.para_dict(),
+        }
+
+    @classmethod
+    def de_dict(cls, estado):
+        acumulador = cls([limiar for limiar, _ in estado["acima"]], estado["digest"]["compressao"])
+        acumulador.contagem = estado["contagem"]
+        acumulador.media = estado["media"]
+        acumulador._m2 = estado["m2"]
+        acumulador._acima = {float(limiar): quantidade for limiar, quantidade in estado["acima"]}
+        acumulador.digest = TDigest.de_dict(estado["digest"])
+        return acumulador
+
+
+def caminho_estado(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho dos acumuladores salvos ao lado do CSV processado.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo JSON com os acumuladores.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(caminho_processado.stem + ".estatisticas.json")
+
+
+def _ler_estado(caminho):
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            estado = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return estado if estado.get("versao") == VERSAO_ESTADO else None
+
+
+def _gravar_estado(caminho, estado):
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(estado, arquivo)
+    os.replace(temporario, caminho)
+
+
+class _Colunas:
+    # Colunas como arrays NumPy, do DataFrame ou da `VisaoOHLCV`, para derivar as métricas
+    def __init__(self, dados):
+        self._dados = dados
+
+    def __getitem__(self, coluna):
+        return np.asarray(self._dados[coluna])
+
+
+def _calcular(metricas, dados):
+    colunas = _Colunas(dados)
+    return {nome: np.asarray(especificacao["calculo"](colunas), dtype="float64") for nome, especificacao in metricas.items()}
+
+
+def sincronizar_estatisticas(dados, caminho_processado=carregamento.CAMINHO_PROCESSADO, metricas=None,
+                             coluna_data=carregamento.COLUNA_DATA):
+    """
+    Atualiza os acumuladores salvos com os pregões novos e devolve um por métrica.
+
+    Cada métrica guarda no estado as linhas já acumuladas e a assinatura
+    (`carregamento.assinatura_prefixo`) dos seus valores e datas nessas linhas. Só as linhas
+    posteriores entram no acumulador; se qualquer linha já processada mudou, o acumulador da
+    métrica é refeito do zero. Métricas salvas que não foram pedidas são mantidas no estado.
+
+    Parâmetros:
+    - dados (pandas.DataFrame | VisaoOHLCV): Dados ordenados por data.
+    - caminho_processado (str | Path): CSV processado ao lado do qual o estado é salvo.
+    - metricas (dict, opcional): Métricas no formato de `METRICAS`. Se None, usa `METRICAS`.
+    - coluna_data (str): Coluna de datas.
+
+    Retorna:
+    - dict: Nome da métrica e seu `AcumuladorEstatisticas`.
+    """
+    metricas = METRICAS if metricas is None else metricas
+    caminho = caminho_estado(caminho_processado)
+    estado = _ler_estado(caminho)
+    salvas = {} if estado is None else estado["metricas"]
+    n = len(dados)
+    datas = np.asarray(dados[coluna_data])
+    valores = _calcular(metricas, dados)
+
+    acumuladores = {}
+    alteradas = False
+    for nome, especificacao in metricas.items():
+        salva = salvas.get(nome)
+        linhas = 0
+        # O acumulador salvo continua valendo se nenhuma das linhas que ele já viu mudou
+        if salva is not None and 0 < salva["linhas"] <= n and \
+                carregamento.assinatura_prefixo((valores[nome], datas), salva["linhas"]) == salva["assinatura"]:
+            linhas = salva["linhas"]
+            acumuladores[nome] = AcumuladorEstatisticas.de_dict(salva["acumulador"])
+        else:
+            acumuladores[nome] = AcumuladorEstatisticas(especificacao["limiares"])
+        if linhas == n:
+            continue
+
+        acumuladores[nome].atualizar(valores[nome][linhas:])
+        salvas[nome] = {
+            "linhas": n,
+            "assinatura": carregamento.assinatura_prefixo((valores[nome], datas), n),
+            "acumulador": acumuladores[nome].para_dict(),
+        }
+        alteradas = True
+
+    if not alteradas:
+        return acumuladores
+    try:
+        _gravar_estado(caminho, {"versao": VERSAO_ESTADO, "metricas": salvas})
+    except OSError:
+        # Sem permissão de escrita os acumuladores continuam disponíveis, apenas sem estado salvo
+        pass
+    return acumuladores
@@ -0,0 +1,301 @@
+"""
+Ingestão incremental do arquivo bruto para o CSV processado.
+
+Em vez de refazer todo o tratamento do notebook `data_cleaning.ipynb` a cada atualização,
+este comando valida e acrescenta ao CSV processado apenas os pregões posteriores à marca
+d'água (`Date` do último registro ingerido). Quando o arquivo bruto só cresce, a leitura
+começa no byte onde a ingestão anterior parou, e o custo passa a ser proporcional às
+linhas novas.
+
+Uso:
+    python -m uber_stocks.ingestao --bruto data/raw/uber_stock_data.csv
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from uber_stocks import anomalias, carregamento, particoes, ranking
+
+CAMINHO_BRUTO = carregamento.RAIZ_PROJETO / "data" / "raw" / "uber_stock_data.csv"
+COLUNAS_NUMERICAS = ["Adj Close", "Close", "High", "Low", "Open", "Volume"]
+TAMANHO_ASSINATURA = 4096
+TAMANHO_BLOCO = 100_000
+
+
+def caminho_marca_dagua(caminho_processado):
+    """
+    Retorna o caminho do arquivo de estado da ingestão, guardado ao lado do CSV processado.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo JSON com a marca d'água.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(caminho_processado.stem + ".marca_dagua.json")
+
+
+def ler_marca_dagua(caminho_processado):
+    """
+    Lê o estado da última ingestão.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - dict | None: Estado salvo, ou None se ainda não houve ingestão.
+    """
+    try:
+        with open(caminho_marca_dagua(caminho_processado), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_marca_dagua(caminho_processado, estado):
+    destino = caminho_marca_dagua(caminho_processado)
+    temporario = destino.with_name(destino.name + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(estado, arquivo, indent=2)
+    os.replace(temporario, destino)
+
+
+def _assinatura(caminho_arquivo, posicao):
+    # Hash dos últimos bytes antes da posição: detecta se o arquivo bruto foi reescrito
+    inicio = max(0, posicao - TAMANHO_ASSINATURA)
+    with open(caminho_arquivo, "rb") as arquivo:
+        arquivo.seek(inicio)
+        return hashlib.sha256(arquivo.read(posicao - inicio)).hexdigest()
+
+
+def _ultima_data_processada(caminho_processado, coluna_data):
+    # Lê apenas o final do CSV processado para descobrir o último pregão gravado
+    with open(caminho_processado, "rb") as arquivo:
+        cabecalho = arquivo.readline().decode("utf-8").strip().split(",")
+        arquivo.seek(0, os.SEEK_END)
+        tamanho = arquivo.tell()
+        arquivo.seek(max(0, tamanho - TAMANHO_ASSINATURA))
+        linhas = arquivo.read().decode("utf-8", errors="ignore").strip().splitlines()
+
+    if len(linhas) < 2 and tamanho <= TAMANHO_ASSINATURA:
+        return cabecalho, None
+    ultima = pd.read_csv(io.StringIO(linhas[-1]), header=None, names=cabecalho)
+    return cabecalho, pd.to_datetime(ultima[coluna_data]).iloc[0]
+
+
+def validar_novas_linhas(df, marca_dagua=None, coluna_data="Date", colunas_numericas=COLUNAS_NUMERICAS):
+    """
+    Aplica às linhas novas as mesmas verificações do notebook de tratamento.
+
+    Linhas com data até a marca d'água já foram ingeridas e são descartadas sem entrar no
+    relatório. Das demais, são rejeitadas as que têm valores ausentes, valores não numéricos,
+    datas inválidas ou datas repetidas dentro do lote.
+
+    Parâmetros:
+    - df (pandas.DataFrame): Linhas lidas do arquivo bruto.
+    - marca_dagua (pandas.Timestamp, opcional): Data do último pregão já ingerido.
+    - coluna_data (str): Nome da coluna de datas.
+    - colunas_numericas (list): Colunas que devem conter apenas números.
+
+    Retorna:
+    - pandas.DataFrame: Linhas válidas, com os tipos convertidos e ordenadas por data.
+    - pandas.DataFrame: Linhas rejeitadas, com a coluna 'Motivo'.
+    """
+    colunas_invalidas = [col for col in [coluna_data, *colunas_numericas] if col not in df.columns]
+    if colunas_invalidas:
+        raise ValueError(f"Colunas inválidas: {colunas_invalidas}")
+
+    # Descarta o que já foi ingerido antes de qualquer verificação
+    datas = pd.to_datetime(df[coluna_data], errors="coerce")
+    if marca_dagua is not None:
+        pendentes = ~(datas <= marca_dagua)
+        df, datas = df[pendentes], datas[pendentes]
+
+    dados = df.copy()
+    motivo = pd.Series(pd.NA, index=dados.index, dtype=object)
+
+    # Valores ausentes
+    ausentes = dados[[coluna_data, *colunas_numericas]].isnull().any(axis=1)
+    motivo[ausentes] = "valor ausente"
+
+    # Coerção numérica e de datas
+    for coluna in colunas_numericas:
+        convertida = pd.to_numeric(dados[coluna], errors="coerce")
+        motivo[convertida.isnull() & motivo.isnull()] = f"valor não numérico em '{coluna}'"
+        dados[coluna] = convertida
+    motivo[datas.isnull() & motivo.isnull()] = "data inválida"
+    dados[coluna_data] = datas
+
+    # Datas repetidas dentro do lote
+    motivo[datas.duplicated(keep="first") & motivo.isnull()] = "data duplicada"
+
+    rejeitadas = df[motivo.notnull()].assign(Motivo=motivo[motivo.notnull()])
+    validas = dados[motivo.isnull()].sort_values(coluna_data, kind="stable")
+    return validas, rejeitadas
+
+
+def _ler_incremento(caminho_bruto, posicao, cabecalho):
+    # Consome somente linhas completas: uma linha em gravação fica para a próxima execução
+    with open(caminho_bruto, "rb") as arquivo:
+        arquivo.seek(posicao)
+        conteudo = arquivo.read()
+    fim = conteudo.rfind(b"\n") + 1
+    if fim == 0:
+        return pd.DataFrame(columns=cabecalho), posicao
+    texto = conteudo[:fim].decode("utf-8")
+    return pd.read_csv(io.StringIO(texto), header=None, names=cabecalho, dtype=str), posicao + fim
+
+
+def _ler_completo(caminho_bruto, tamanho_bloco):
+    # Varredura completa em blocos, usada na primeira carga ou se o bruto foi reescrito
+    yield from pd.read_csv(caminho_bruto, dtype=str, chunksize=tamanho_bloco)
+
+
+def ingerir(caminho_bruto=CAMINHO_BRUTO, caminho_processado=carregamento.CAMINHO_PROCESSADO,
+            coluna_data="Date", colunas_numericas=COLUNAS_NUMERICAS, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Acrescenta ao CSV processado os pregões novos do arquivo bruto.
+
+    Parâmetros:
+    - caminho_bruto (str | Path): Caminho do CSV bruto.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    - coluna_data (str): Nome da coluna de datas.
+    - colunas_numericas (list): Colunas que devem conter apenas números.
+    - tamanho_bloco (int): Linhas por bloco quando é preciso varrer o arquivo bruto inteiro.
+
+    Retorna:
+    - dict: Resumo da ingestão (linhas lidas, acrescentadas, rejeitadas, nova marca d'água e alertas de volume anômalo).
+    """
+    caminho_bruto = Path(caminho_bruto)
+    caminho_processado = Path(caminho_processado)
+    estado = ler_marca_dagua(caminho_processado)
+
+    with open(caminho_bruto, "rb") as arquivo:
+        cabecalho_bruto = arquivo.readline().decode("utf-8").strip().split(",")
+    tamanho_bruto = os.path.getsize(caminho_bruto)
+
+    # O último pregão gravado no processado prevalece sobre o estado salvo:
+    # se a execução anterior caiu entre a gravação e o estado, nada é duplicado
+    if caminho_processado.exists():
+        cabecalho_saida, ultima_data = _ultima_data_processada(caminho_processado, coluna_data)
+    else:
+        cabecalho_saida, ultima_data = cabecalho_bruto, None
+    if estado is not None and estado.get("ultima_data"):
+        marca = pd.Timestamp(estado["ultima_data"])
+        ultima_data = marca if ultima_data is None else max(ultima_data, marca)
+
+    incremental = (
+        estado is not None
+        and caminho_processado.exists()
+        and estado.get("bruto") == str(caminho_bruto.resolve())
+        and estado.get("cabecalho") == cabecalho_bruto
+        and estado.get("posicao", 0) <= tamanho_bruto
+        and estado.get("assinatura") == _assinatura(caminho_bruto, estado["posicao"])
+    )
+    if incremental:
+        lote, posicao = _ler_incremento(caminho_bruto, estado["posicao"], cabecalho_bruto)
+        blocos = [lote]
+    else:
+        posicao = tamanho_bruto
+        blocos = _ler_completo(caminho_bruto, tamanho_bloco)
+
+    linhas_lidas = 0
+    rejeitadas = []
+    novas = []
+    for bloco in blocos:
+        linhas_lidas += len(bloco)
+        validas, invalidas = validar_novas_linhas(bloco, ultima_data, coluna_data, colunas_numericas)
+        rejeitadas.append(invalidas)
+        novas.append(validas[cabecalho_saida])
+
+    novas = pd.concat(novas, ignore_index=True) if novas else pd.DataFrame(columns=cabecalho_saida)
+    rejeitadas = pd.concat(rejeitadas, ignore_index=True) if rejeitadas else pd.DataFrame()
+
+    # Datas repetidas entre blocos diferentes da varredura completa
+    repetidas = novas[coluna_data].duplicated(keep="first")
+    if repetidas.any():
+        duplicadas = novas[repetidas].assign(Motivo="data duplicada")
+        rejeitadas = pd.concat([rejeitadas, duplicadas], ignore_index=True)
+        novas = novas[~repetidas]
+    novas = novas.sort_values(coluna_data, kind="stable")
+    if not novas.empty:
+        ultima_data = novas[coluna_data].max()
+
+    # Acrescenta apenas as linhas novas; o arquivo existente não é reescrito
+    alertas = []
+    if not novas.empty:
+        existe = caminho_processado.exists()
+        caminho_processado.parent.mkdir(parents=True, exist_ok=True)
+        novas.to_csv(caminho_processado, mode="a", header=not existe, index=False)
+
+        # O ranking dos dias de maior variação, se já existe, incorpora só as linhas novas;
+        # se ficou para trás, `ranking.sincronizar_ranking` o refaz na próxima leitura
+        ranking_dias = ranking.ler_ranking(caminho_processado)
+        if ranking_dias is not None and ranking_dias.atualizar(novas, coluna_data):
+            try:
+                ranking.salvar_ranking(ranking_dias, caminho_processado)
+            except OSError:
+                # Sem permissão de escrita o ranking é refeito na próxima leitura
+                pass
+
+        # O detector de volume anômalo, se já existe, recebe os pregões novos um a um;
+        # os já vistos (execução anterior interrompida antes da marca d'água) são pulados
+        detector = anomalias.ler_detector(caminho_processado)
+        if detector is not None:
+            for _, linha in novas.iterrows():
+                data = pd.Timestamp(linha[coluna_data])
+                if detector.ultima_data is None or data > detector.ultima_data:
+                    alertas.extend(detector.atualizar(data, {particoes.TICKER_PADRAO: float(linha["Volume"])}))
+            try:
+                anomalias.salvar_detector(detector, caminho_processado)
+            except OSError:
+                # Sem permissão de escrita o detector continua disponível, apenas sem ser salvo
+                pass
+
+    _gravar_marca_dagua(caminho_processado, {
+        "bruto": str(caminho_bruto.resolve()),
+        "cabecalho": cabecalho_bruto,
+        "posicao": posicao,
+        "assinatura": _assinatura(caminho_bruto, posicao),
+        "ultima_data": None if ultima_data is None else ultima_data.isoformat(),
+    })
+
+    return {
+        "modo": "incremental" if incremental else "completo",
+        "linhas_lidas": linhas_lidas,
+        "linhas_acrescentadas": len(novas),
+        "rejeitadas": rejeitadas,
+        "ultima_data": ultima_data,
+        "anomalias": pd.DataFrame(alertas, columns=anomalias.COLUNAS_EVENTO),
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Ingestão incremental dos dados brutos da Uber.")
+    parser.add_argument("--bruto", default=str(CAMINHO_BRUTO), help="CSV bruto de origem.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado de destino.")
+    parser.add_argument("--coluna-data", default="Date", help="Nome da coluna de datas.")
+    args = parser.parse_args(argumentos)
+
+    resumo = ingerir(args.bruto, args.processado, coluna_data=args.coluna_data)
+
+    print(f"✅ Ingestão {resumo['modo']} concluída em '{args.processado}'")
+    print(f"Linhas lidas: {resumo['linhas_lidas']}")
+    print(f"Linhas acrescentadas: {resumo['linhas_acrescentadas']}")
+    print(f"Marca d'água: {resumo['ultima_data']}")
+    if not resumo["rejeitadas"].empty:
+        print(f"\n⚠️ {len(resumo['rejeitadas'])} linhas rejeitadas:")
+        print(resumo["rejeitadas"].to_string(index=False))
+    if not resumo["anomalias"].empty:
+        print(f"\n⚠️ {len(resumo['anomalias'])} pregões com volume anômalo:")
+        print(resumo["anomalias"].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
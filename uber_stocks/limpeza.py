@@ -0,0 +1,397 @@
+"""
+Pipeline de tratamento em blocos para arquivos brutos maiores que a memória.
+
+Reproduz as verificações do notebook `data_cleaning.ipynb` (tamanho da base, valores
+ausentes, duplicados, colunas numéricas, tipos e valores máximos/mínimos), mas lendo o
+arquivo em blocos de tamanho fixo e calculando todas as verificações numa única passada.
+Cada bloco tratado é gravado em seguida no CSV de saída e descartado.
+
+Uso:
+    python -m uber_stocks.limpeza --bruto data/raw/uber_stock_data.csv --saida data/processed/uber_stock_data_atualizado.csv
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento
+
+COLUNAS_NUMERICAS = ["Adj Close", "Close", "High", "Low", "Open", "Volume"]
+TAMANHO_BLOCO = 100_000
+# Inconsistências guardadas com posição e valor; as demais são apenas contadas
+LIMITE_INCONSISTENCIAS = 1_000
+
+
+def ler_em_blocos(caminho_arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê um CSV em blocos de tamanho fixo.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): Caminho do CSV.
+    - tamanho_bloco (int): Quantidade de linhas por bloco.
+
+    Retorna:
+    - generator: Gerador de pandas.DataFrame, um por bloco.
+    """
+    with pd.read_csv(caminho_arquivo, sep=",", chunksize=tamanho_bloco) as leitor:
+        yield from leitor
+
+
+class AcumuladorLimpeza:
+    """
+    Acumula, bloco a bloco, as verificações de qualidade do notebook de tratamento.
+
+    A memória usada não cresce com o número de linhas: guarda-se apenas contagens,
+    mínimos/máximos e as primeiras `limite_inconsistencias` inconsistências (as demais só
+    são contadas). Os duplicados da chave são detectados por vizinhança, o que é exato
+    quando o arquivo está ordenado pela chave; a ordem é conferida durante a leitura e, se
+    não se confirmar, o relatório marca a verificação como incompleta. Com
+    `duplicados_em_memoria=True` todas as chaves são guardadas (8 bytes por linha e coluna
+    de chave) e ordenadas no fim, o que dá a contagem exata em qualquer ordem.
+
+    Parâmetros:
+    - colunas_chave (list): Colunas que identificam um registro (ex.: ['Date'] ou ['Ticker', 'Date']).
+    - colunas_numericas (list): Colunas que devem conter apenas números.
+    - duplicados_em_memoria (bool): Guarda todas as chaves para contar duplicados em arquivos não ordenados.
+    - limite_inconsistencias (int): Quantidade máxima de inconsistências guardadas com posição e valor.
+    """
+
+    def __init__(self, colunas_chave=("Date",), colunas_numericas=COLUNAS_NUMERICAS, duplicados_em_memoria=False,
+                 limite_inconsistencias=LIMITE_INCONSISTENCIAS):
+        self.colunas_chave = list(colunas_chave)
+        self.colunas_numericas = list(colunas_numericas)
+        self.duplicados_em_memoria = duplicados_em_memoria
+        self.limite_inconsistencias = int(limite_inconsistencias)
+
+        self.linhas = 0
+        self.colunas = None
+        self.tipos = None
+        self.ausentes = None
+        self.minimos = {}
+        self.maximos = {}
+        self.nao_numericos = {coluna: 0 for coluna in self.colunas_numericas}
+        self.inconsistencias = []
+        self.total_inconsistencias = 0
+        self.chaves_em_ordem = True
+
+        # Chaves codificadas como inteiros: datas em nanossegundos, demais colunas por dicionário
+        self._dicionarios = {coluna: {} for coluna in self.colunas_chave}
+        self._chaves = []
+        self._ultima_chave = None
+        self._contagem_ordenada = {}
+
+    def atualizar(self, bloco):
+        """
+        Incorpora um bloco bruto às verificações.
+
+        Parâmetros:
+        - bloco (pandas.DataFrame): Bloco lido do arquivo bruto.
+
+        Retorna:
+        - dict: Colunas numéricas convertidas do bloco (valores inválidos viram NaN).
+        """
+        if self.colunas is None:
+            self.colunas = list(bloco.columns)
+            self.ausentes = pd.Series(0, index=bloco.columns, dtype="int64")
+        self.linhas += len(bloco)
+
+        # Valores ausentes
+        self.ausentes = self.ausentes.add(bloco.isnull().sum(), fill_value=0).astype("int64")
+
+        # Coerção numérica, inconsistências e máximos/mínimos na mesma passada
+        convertidas = {}
+        for coluna in self.colunas_numericas:
+            if coluna not in bloco.columns:
+                continue
+            # Como no notebook, ausentes também contam como valores não numéricos
+            convertida = pd.to_numeric(bloco[coluna], errors="coerce")
+            invalidas = convertida.isnull()
+            if invalidas.any():
+                quantidade = int(invalidas.sum())
+                self.nao_numericos[coluna] += quantidade
+                self.total_inconsistencias += quantidade
+                restantes = self.limite_inconsistencias - len(self.inconsistencias)
+                if restantes > 0:
+                    for posicao, valor in bloco.loc[invalidas, coluna].iloc[:restantes].items():
+                        self.inconsistencias.append({"Coluna": coluna, "Posição": posicao, "Valor": valor})
+            if convertida.notnull().any():
+                minimo, maximo = convertida.min(), convertida.max()
+                self.minimos[coluna] = minimo if coluna not in self.minimos else min(self.minimos[coluna], minimo)
+                self.maximos[coluna] = maximo if coluna not in self.maximos else max(self.maximos[coluna], maximo)
+            convertidas[coluna] = convertida
+
+        self._registrar_chaves(bloco)
+        return convertidas
+
+    def _codificar_chave(self, bloco, coluna):
+        if coluna == carregamento.COLUNA_DATA:
+            datas = pd.to_datetime(bloco[coluna], errors="coerce")
+            return datas.to_numpy(dtype="datetime64[ns]").view("int64")
+        dicionario = self._dicionarios[coluna]
+        return np.fromiter(
+            (dicionario.setdefault(valor, len(dicionario)) for valor in bloco[coluna].tolist()),
+            dtype="int64",
+            count=len(bloco),
+        )
+
+    def _registrar_chaves(self, bloco):
+        if not all(coluna in bloco.columns for coluna in self.colunas_chave):
+            return
+        codigos = np.column_stack([self._codificar_chave(bloco, coluna) for coluna in self.colunas_chave])
+
+        if self.duplicados_em_memoria:
+            self._chaves.append(codigos)
+            return
+
+        # Arquivo ordenado: cada chave só pode se repetir logo em seguida
+        anteriores = np.vstack([self._ultima_chave, codigos[:-1]]) if self._ultima_chave is not None else codigos[:-1]
+        atuais = codigos if self._ultima_chave is not None else codigos[1:]
+        repetidas = (anteriores == atuais).all(axis=1)
+        for chave in map(tuple, atuais[repetidas]):
+            self._contagem_ordenada[chave] = self._contagem_ordenada.get(chave, 1) + 1
+
+        # Ordem lexicográfica: a primeira coluna em que as chaves diferem decide
+        if self.chaves_em_ordem and len(atuais):
+            diferentes = atuais != anteriores
+            primeira = diferentes.argmax(axis=1)
+            linhas = np.arange(len(atuais))
+            decrescentes = diferentes.any(axis=1) & (atuais[linhas, primeira] < anteriores[linhas, primeira])
+            self.chaves_em_ordem = not decrescentes.any()
+        if len(codigos):
+            self._ultima_chave = codigos[-1:]
+
+    def _duplicados_por_chave(self):
+        if not self.duplicados_em_memoria:
+            return self._contagem_ordenada
+        if not self._chaves:
+            return {}
+
+        chaves = np.concatenate(self._chaves)
+        ordem = np.lexsort(chaves.T[::-1])
+        ordenadas = chaves[ordem]
+        inicio_grupo = np.ones(len(ordenadas), dtype=bool)
+        inicio_grupo[1:] = (ordenadas[1:] != ordenadas[:-1]).any(axis=1)
+        indices_inicio = np.flatnonzero(inicio_grupo)
+        tamanhos = np.diff(np.append(indices_inicio, len(ordenadas)))
+        repetidos = tamanhos > 1
+        return {tuple(ordenadas[i]): int(n) for i, n in zip(indices_inicio[repetidos], tamanhos[repetidos])}
+
+    def _decodificar_chave(self, chave, inversos):
+        valores = []
+        for coluna, codigo in zip(self.colunas_chave, chave):
+            if coluna == carregamento.COLUNA_DATA:
+                valores.append(pd.Timestamp(np.int64(codigo)))
+            else:
+                valores.append(inversos[coluna][codigo])
+        return valores[0] if len(valores) == 1 else tuple(valores)
+
+    def relatorio(self):
+        """
+        Monta as mesmas tabelas que o notebook de tratamento exibe.
+
+        Retorna:
+        - dict: Tabelas 'tamanho', 'ausentes', 'duplicados', 'colunas_numericas',
+          'inconsistencias' (as primeiras `limite_inconsistencias`), 'total_inconsistencias',
+          'tipos' e 'max_min'.
+        """
+        # Tamanho da base
+        tamanho = {
+            'Número de Linhas': self.linhas,
+            'Número de Colunas': len(self.colunas or []),
+        }
+
+        # Valores ausentes
+        ausentes = self.ausentes if self.ausentes is not None else pd.Series(dtype="int64")
+        tabela_ausentes = pd.DataFrame({
+            'Quantidade de Valores Ausentes': ausentes,
+            'Percentual de Valores Ausentes (%)': (ausentes / max(self.linhas, 1)) * 100
+        })
+        tabela_ausentes = tabela_ausentes[tabela_ausentes['Quantidade de Valores Ausentes'] > 0]
+        tabela_ausentes = tabela_ausentes.sort_values(by='Percentual de Valores Ausentes (%)', ascending=False)
+
+        # Duplicados da chave
+        contagens = self._duplicados_por_chave()
+        inversos = {coluna: {v: k for k, v in dicionario.items()} for coluna, dicionario in self._dicionarios.items()}
+        nome_chave = ", ".join(self.colunas_chave)
+        duplicados = {
+            nome_chave: {
+                'possui_duplicados': bool(contagens),
+                'quantidade_duplicados': int(sum(n - 1 for n in contagens.values())),
+                'valores_e_contagem': {self._decodificar_chave(chave, inversos): n for chave, n in contagens.items()},
+                # Por vizinhança, a contagem só é exata se o arquivo estava ordenado pela chave
+                'verificacao_completa': self.duplicados_em_memoria or self.chaves_em_ordem,
+            }
+        }
+
+        # Colunas numéricas
+        resultado_numerico = {
+            coluna: (self.colunas is not None and coluna in self.colunas and self.nao_numericos[coluna] == 0)
+            for coluna in self.colunas_numericas
+        }
+
+        # Valores máx/min
+        colunas_max_min = [coluna for coluna in self.colunas_numericas if coluna in self.minimos]
+        tabela_max_min = pd.DataFrame({
+            'Coluna': colunas_max_min,
+            'Valor Mínimo': [self.minimos[coluna] for coluna in colunas_max_min],
+            'Valor Máximo': [self.maximos[coluna] for coluna in colunas_max_min],
+        })
+
+        return {
+            'tamanho': tamanho,
+            'ausentes': tabela_ausentes,
+            'duplicados': duplicados,
+            'colunas_numericas': resultado_numerico,
+            'inconsistencias': pd.DataFrame(self.inconsistencias, columns=['Coluna', 'Posição', 'Valor']),
+            'total_inconsistencias': self.total_inconsistencias,
+            'tipos': self.tipos,
+            'max_min': tabela_max_min,
+        }
+
+
+def limpar_blocos(blocos, acumulador, colunas_tipos=None):
+    """
+    Gera os blocos tratados enquanto alimenta o acumulador de verificações.
+
+    Parâmetros:
+    - blocos (iterable): Blocos brutos, como os gerados por `ler_em_blocos`.
+    - acumulador (AcumuladorLimpeza): Acumulador das verificações.
+    - colunas_tipos (dict, opcional): Conversões de tipo, como em `modificar_tipo_colunas`.
+      Por padrão converte a coluna 'Date' para datetime64[ns].
+
+    Retorna:
+    - generator: Gerador de pandas.DataFrame tratados.
+    """
+    if colunas_tipos is None:
+        colunas_tipos = {carregamento.COLUNA_DATA: 'datetime64[ns]'}
+
+    for bloco in blocos:
+        convertidas = acumulador.atualizar(bloco)
+
+        # Tipos consistentes entre blocos: numéricas convertidas e conversões pedidas
+        tratado = bloco.assign(**convertidas)
+        for coluna, tipo in colunas_tipos.items():
+            if coluna in tratado.columns:
+                if str(tipo).startswith("datetime64"):
+                    tratado[coluna] = pd.to_datetime(tratado[coluna], errors="coerce").astype(tipo)
+                else:
+                    tratado[coluna] = tratado[coluna].astype(tipo)
+
+        if acumulador.tipos is None:
+            acumulador.tipos = pd.DataFrame({
+                'Coluna': tratado.dtypes.index,
+                'Tipo de Dado': tratado.dtypes.values
+            })
+        yield tratado
+
+
+def executar_limpeza(caminho_bruto, caminho_saida=None, colunas_chave=("Date",),
+                     colunas_numericas=COLUNAS_NUMERICAS, colunas_tipos=None,
+                     tamanho_bloco=TAMANHO_BLOCO, duplicados_em_memoria=False):
+    """
+    Executa o tratamento completo em uma passada, com memória limitada ao tamanho do bloco
+    (exceto com `duplicados_em_memoria=True`, que guarda as chaves de todas as linhas).
+
+    Parâmetros:
+    - caminho_bruto (str | Path): Caminho do CSV bruto.
+    - caminho_saida (str | Path, opcional): CSV tratado de saída. Se None, apenas verifica.
+    - colunas_chave (tuple): Colunas que identificam um registro.
+    - colunas_numericas (list): Colunas que devem conter apenas números.
+    - colunas_tipos (dict, opcional): Conversões de tipo aplicadas a cada bloco.
+    - tamanho_bloco (int): Quantidade de linhas por bloco.
+    - duplicados_em_memoria (bool): Guarda todas as chaves para contar duplicados em arquivos não ordenados.
+
+    Retorna:
+    - dict: Relatório com as tabelas de `AcumuladorLimpeza.relatorio`.
+    """
+    acumulador = AcumuladorLimpeza(colunas_chave, colunas_numericas, duplicados_em_memoria)
+    blocos_tratados = limpar_blocos(ler_em_blocos(caminho_bruto, tamanho_bloco), acumulador, colunas_tipos)
+
+    if caminho_saida is None:
+        for _ in blocos_tratados:
+            pass
+        return acumulador.relatorio()
+
+    # Grava num arquivo temporário e só substitui a saída ao final da passada
+    caminho_saida = Path(caminho_saida)
+    caminho_saida.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho_saida.with_name(caminho_saida.name + ".tmp")
+    primeiro = True
+    for bloco in blocos_tratados:
+        bloco.to_csv(temporario, mode="w" if primeiro else "a", header=primeiro, index=False)
+        primeiro = False
+    if primeiro:
+        temporario.write_text("", encoding="utf-8")
+    temporario.replace(caminho_saida)
+    print(f"✅ Dados salvos com sucesso em '{caminho_saida}'")
+
+    return acumulador.relatorio()
+
+
+def imprimir_relatorio(relatorio):
+    """
+    Exibe o relatório no mesmo formato das células do notebook de tratamento.
+
+    Parâmetros:
+    - relatorio (dict): Relatório retornado por `executar_limpeza`.
+    """
+    print("=== Tamanho da Base ===")
+    print(relatorio['tamanho'])
+
+    print("\n=== Valores Ausentes ===")
+    print(relatorio['ausentes'] if not relatorio['ausentes'].empty else "Nenhum valor ausente encontrado.")
+
+    print("\n=== Análise de Valores Duplicados ===\n")
+    for coluna, info in relatorio['duplicados'].items():
+        print(f"\nColuna: {coluna}")
+        if info['possui_duplicados']:
+            print(f"Status: Possui {info['quantidade_duplicados']} valores duplicados")
+            print("Valores duplicados e suas ocorrências:")
+            for valor, contagem in info['valores_e_contagem'].items():
+                print(f"  - Valor: {valor} | Ocorrências: {contagem}")
+        else:
+            print("Status: Não possui valores duplicados")
+        if not info.get('verificacao_completa', True):
+            print("⚠️ O arquivo não está ordenado pela chave: só repetições consecutivas foram contadas. "
+                  "Use --duplicados-em-memoria para a contagem completa.")
+
+    print("\n=== Verificação de Dados Numéricos ===")
+    for coluna, is_numerica in relatorio['colunas_numericas'].items():
+        status = "contém apenas números" if is_numerica else "não contém apenas números"
+        print(f"Coluna '{coluna}': {status}")
+    if not relatorio['inconsistencias'].empty:
+        total = relatorio.get('total_inconsistencias', len(relatorio['inconsistencias']))
+        print(f"\nInconsistências encontradas: {total}")
+        if total > len(relatorio['inconsistencias']):
+            print(f"Exibindo as primeiras {len(relatorio['inconsistencias'])}:")
+        print(relatorio['inconsistencias'].to_string(index=False))
+    else:
+        print("\nNenhuma inconsistência encontrada nas colunas verificadas.")
+
+    print("\n=== Tipos dos Dados ===")
+    print(relatorio['tipos'])
+
+    print("\n=== Valores Máx/Mín ===")
+    print(relatorio['max_min'])
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Tratamento em blocos do arquivo bruto da Uber.")
+    parser.add_argument("--bruto", required=True, help="CSV bruto de origem.")
+    parser.add_argument("--saida", help="CSV tratado de destino (opcional).")
+    parser.add_argument("--chave", nargs="+", default=["Date"], help="Colunas que identificam um registro.")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO, help="Linhas por bloco.")
+    parser.add_argument("--duplicados-em-memoria", action="store_true",
+                        help="Guarda todas as chaves para contar duplicados mesmo em arquivo fora de ordem.")
+    args = parser.parse_args(argumentos)
+
+    relatorio = executar_limpeza(
+        args.bruto, args.saida, colunas_chave=args.chave,
+        tamanho_bloco=args.tamanho_bloco, duplicados_em_memoria=args.duplicados_em_memoria,
+    )
+    imprimir_relatorio(relatorio)
+
+
+if __name__ == "__main__":
+    main()
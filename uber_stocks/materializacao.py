@@ -0,0 +1,310 @@
+"""
+Materialização dos resultados das páginas dos dashboards.
+
+Os números, tabelas e séries das páginas de `dashboard_uber.py` (abertura x fechamento,
+volatilidade, médias móveis, volume x preço e sazonalidade) e do relatório
+`dashboard_vol_diaria.py` dependem apenas dos dados. Este comando os calcula uma vez por
+versão dos dados, reaproveitando os estados incrementais dos demais módulos, e grava um
+único artefato versionado ao lado do CSV processado; os dashboards apenas o leem.
+
+Uso:
+    python -m uber_stocks.materializacao
+    python -m uber_stocks.materializacao --forcar
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import pearsonr, spearmanr
+
+from uber_stocks import (calendario, carregamento, correlacao, cruzamentos, estatisticas, medias_moveis,
+                         ranking, tendencia)
+
+VERSAO_ARTEFATO = 1
+FAIXAS_HISTOGRAMA = 50
+JANELA_CORRELACAO = 30
+# Pontos guardados para o gráfico de dispersão: acima disso, uma amostra espaçada da série
+PONTOS_DISPERSAO = 20_000
+
+
+class ArtefatoPaginas:
+    """
+    Resultados materializados das páginas: métricas escalares e tabelas por nome.
+
+    Parâmetros:
+    - metricas (dict): Página e dicionário com as métricas escalares da página.
+    - tabelas (dict): Nome ('pagina.tabela') e DataFrame com a tabela ou série do gráfico.
+    - versao (str, opcional): Versão dos dados de origem.
+    - gerado_em (str, opcional): Data e hora da materialização (ISO).
+    """
+
+    def __init__(self, metricas, tabelas, versao=None, gerado_em=None):
+        self.metricas = metricas
+        self.tabelas = tabelas
+        self.versao = versao
+        self.gerado_em = gerado_em
+
+    def metrica(self, pagina, nome):
+        return self.metricas[pagina][nome]
+
+    def tabela(self, nome):
+        return self.tabelas[nome]
+
+    def salvar(self, caminho):
+        """
+        Grava o artefato (.npz) com troca atômica do arquivo.
+
+        Cada coluna de tabela vira um array do .npz; métricas e nomes das colunas ficam num
+        cabeçalho JSON dentro do mesmo arquivo.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo.
+        """
+        caminho = Path(caminho)
+        cabecalho = {
+            "versao_artefato": VERSAO_ARTEFATO,
+            "versao": self.versao,
+            "gerado_em": self.gerado_em,
+            "metricas": self.metricas,
+            "tabelas": {nome: list(tabela.columns) for nome, tabela in self.tabelas.items()},
+        }
+        arrays = {}
+        for nome, tabela in self.tabelas.items():
+            for coluna in tabela.columns:
+                valores = tabela[coluna].to_numpy()
+                # Colunas de texto viram unicode de tamanho fixo, que o .npz lê sem pickle
+                arrays[f"{nome}|{coluna}"] = valores.astype(str) if valores.dtype == object else valores
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        with open(temporario, "wb") as arquivo:
+            np.savez(arquivo, cabecalho=np.array(json.dumps(cabecalho)), **arrays)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """
+        Lê um artefato gravado por `salvar`.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo.
+
+        Retorna:
+        - ArtefatoPaginas | None: Artefato lido, ou None se o arquivo não existe, é inválido ou de outro formato.
+        """
+        try:
+            with np.load(caminho, allow_pickle=False) as arquivo:
+                cabecalho = json.loads(str(arquivo["cabecalho"]))
+                if cabecalho.get("versao_artefato") != VERSAO_ARTEFATO:
+                    return None
+                tabelas = {
+                    nome: pd.DataFrame({coluna: arquivo[f"{nome}|{coluna}"] for coluna in colunas}, columns=colunas)
+                    for nome, colunas in cabecalho["tabelas"].items()
+                }
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(cabecalho["metricas"], tabelas, cabecalho["versao"], cabecalho["gerado_em"])
+
+
+def caminho_artefato(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho do artefato guardado ao lado do CSV processado.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo .npz do artefato.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(caminho_processado.stem + ".paginas.npz")
+
+
+def _numero(valor):
+    # Escalares do numpy viram tipos nativos, para o cabeçalho JSON
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _resumo(acumulador):
+    return {chave: _numero(valor) for chave, valor in acumulador.descrever().items()}
+
+
+def _pagina_abertura_fechamento(dados, acumulador):
+    diferenca = np.asarray(dados["Close"], dtype="float64") - np.asarray(dados["Open"], dtype="float64")
+    validos = ~np.isnan(diferenca)
+    contagens, limites = np.histogram(diferenca[validos], bins=FAIXAS_HISTOGRAMA)
+    posicao_maxima = int(np.nanargmax(diferenca)) if validos.any() else None
+
+    metricas = {
+        **_resumo(acumulador),
+        "dias_positivos": acumulador.acima(0),
+        "data_maxima": None if posicao_maxima is None
+        else pd.Timestamp(np.asarray(dados[carregamento.COLUNA_DATA])[posicao_maxima]).strftime("%Y-%m-%d"),
+    }
+    histograma = pd.DataFrame({'inicio': limites[:-1], 'fim': limites[1:], 'contagem': contagens})
+    return metricas, {"abertura_fechamento.histograma": histograma}
+
+
+def _pagina_volatilidade(dados, acumulador, caminho_processado):
+    metricas = {**_resumo(acumulador), "dias_acima_5": acumulador.acima(5)}
+    top5 = ranking.top_dias("amplitude", 5, dados=dados, caminho_processado=caminho_processado)
+    return metricas, {"volatilidade.top5": top5.rename(columns={'Valor': 'Volatilidade'})}
+
+
+def _pagina_medias_moveis(dados, caminho_processado):
+    medias = medias_moveis.sincronizar_medias(dados, (7, 30), caminho_processado)
+    indice = cruzamentos.obter_indice(7, 30, caminho_processado)
+    series = pd.DataFrame({
+        'Date': np.asarray(dados[carregamento.COLUNA_DATA]),
+        'Close': np.asarray(dados["Close"], dtype="float64"),
+        'MM7': medias[7],
+        'MM30': medias[30],
+    })
+    metricas = {
+        "mm7": _numero(medias[7][-1]) if len(series) else None,
+        "mm30": _numero(medias[30][-1]) if len(series) else None,
+        "cruzamentos": len(indice),
+        "cruzamentos_alta": indice.contar(direcao="alta"),
+        "cruzamentos_baixa": indice.contar(direcao="baixa"),
+    }
+    return metricas, {"medias_moveis.series": series}
+
+
+def _pagina_volume_preco(dados, caminho_processado):
+    volume = np.asarray(dados["Volume"], dtype="float64")
+    fechamento = np.asarray(dados["Close"], dtype="float64")
+    validos = ~(np.isnan(volume) | np.isnan(fechamento))
+    corr_pearson, p_pearson = pearsonr(volume[validos], fechamento[validos])
+    corr_spearman, p_spearman = spearmanr(volume[validos], fechamento[validos])
+
+    curva_x, curva_y, motor = tendencia.obter_tendencia("Volume", "Close", "auto", caminho_processado)
+    amostra = np.flatnonzero(validos)
+    if len(amostra) > PONTOS_DISPERSAO:
+        amostra = amostra[np.linspace(0, len(amostra) - 1, PONTOS_DISPERSAO).round().astype("int64")]
+
+    metricas = {
+        "pearson": _numero(corr_pearson), "p_pearson": _numero(p_pearson),
+        "spearman": _numero(corr_spearman), "p_spearman": _numero(p_spearman),
+        "motor_tendencia": motor,
+    }
+    # Mesmo tratamento de falhas do pearsonr/spearmanr: pares incompletos ficam fora, e a janela
+    # móvel conta JANELA_CORRELACAO pregões com volume e fechamento
+    datas_validas = np.asarray(dados[carregamento.COLUNA_DATA])[validos]
+    tabelas = {
+        "volume_preco.dispersao": pd.DataFrame({'Volume': volume[amostra], 'Close': fechamento[amostra]}),
+        "volume_preco.tendencia": pd.DataFrame({'Volume': curva_x, 'Close': curva_y}),
+        "volume_preco.correlacao_movel": pd.DataFrame({
+            'Date': datas_validas,
+            'pearson': correlacao.correlacao_movel(volume[validos], fechamento[validos], JANELA_CORRELACAO, "pearson"),
+            'spearman': correlacao.correlacao_movel(volume[validos], fechamento[validos], JANELA_CORRELACAO,
+                                                    "spearman"),
+        }),
+    }
+    return metricas, tabelas
+
+
+def _pagina_sazonalidade(caminho_processado):
+    media_mensal = calendario.obter_cubo(caminho_processado).agregar(('mes',), 'Close')
+    tabela = pd.DataFrame({
+        'Mês': [pd.Timestamp(2000, mes, 1).month_name() for mes in media_mensal['mes']],
+        'Close': media_mensal['media'].to_numpy(),
+    })
+    melhor, pior = tabela['Close'].idxmax(), tabela['Close'].idxmin()
+    metricas = {
+        "melhor_mes": tabela['Mês'][melhor], "media_melhor_mes": _numero(tabela['Close'][melhor]),
+        "pior_mes": tabela['Mês'][pior], "media_pior_mes": _numero(tabela['Close'][pior]),
+    }
+    return metricas, {"sazonalidade.media_mensal": tabela}
+
+
+def materializar(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Calcula os resultados de todas as páginas para a versão atual dos dados.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - ArtefatoPaginas: Artefato com as métricas e tabelas de cada página.
+    """
+    dados = carregamento.carregar_dados(caminho_processado)
+    versao = carregamento.versao_dados(caminho_processado)
+    acumuladores = estatisticas.sincronizar_estatisticas(dados, caminho_processado)
+    datas = pd.to_datetime(np.asarray(dados[carregamento.COLUNA_DATA]))
+
+    metricas = {"geral": {
+        "linhas": len(dados),
+        "inicio": datas.min().strftime("%Y-%m-%d") if len(datas) else None,
+        "fim": datas.max().strftime("%Y-%m-%d") if len(datas) else None,
+    }}
+    tabelas = {}
+    paginas = {
+        "abertura_fechamento": lambda: _pagina_abertura_fechamento(dados, acumuladores["Diferenca"]),
+        "volatilidade": lambda: _pagina_volatilidade(dados, acumuladores["Volatilidade"], caminho_processado),
+        "medias_moveis": lambda: _pagina_medias_moveis(dados, caminho_processado),
+        "volume_preco": lambda: _pagina_volume_preco(dados, caminho_processado),
+        "sazonalidade": lambda: _pagina_sazonalidade(caminho_processado),
+    }
+    for pagina, calcular in paginas.items():
+        metricas[pagina], tabelas_pagina = calcular()
+        tabelas.update(tabelas_pagina)
+
+    return ArtefatoPaginas(metricas, tabelas, versao, datetime.now().isoformat(timespec="seconds"))
+
+
+def versao_desatualizada(versao, caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Indica se um artefato da versão `versao` ficou para trás em relação ao CSV processado.
+
+    Parâmetros:
+    - versao (str | None): Versão registrada no artefato.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - bool: True se os dados mudaram desde a materialização (ex.: depois de uma ingestão).
+    """
+    try:
+        return versao != carregamento.versao_dados(caminho_processado)
+    except OSError:
+        # Sem o CSV não há com o que comparar; o artefato é o único resultado disponível
+        return False
+
+
+def ler_artefato(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Lê o artefato materializado, sem recalcular nada.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - ArtefatoPaginas | None: Artefato salvo, ou None se ainda não foi gerado.
+    """
+    return ArtefatoPaginas.carregar(caminho_artefato(caminho_processado))
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Materializa os resultados das páginas dos dashboards.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--forcar", action="store_true", help="Recalcula mesmo que o artefato já seja da versão atual.")
+    args = parser.parse_args(argumentos)
+
+    if carregamento.validar_snapshot(args.processado) is None:
+        carregamento.carregar_dados(args.processado)
+    versao = carregamento.versao_dados(args.processado)
+    caminho = caminho_artefato(args.processado)
+
+    atual = ArtefatoPaginas.carregar(caminho)
+    if atual is not None and atual.versao == versao and not args.forcar:
+        print(f"✅ Artefato já está na versão atual dos dados: '{caminho}'")
+        return
+
+    artefato = materializar(args.processado)
+    artefato.salvar(caminho)
+    print(f"✅ {len(artefato.metricas) - 1} páginas e {len(artefato.tabelas)} tabelas materializadas em '{caminho}'")
+
+
+if __name__ == "__main__":
+    main()
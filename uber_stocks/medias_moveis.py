@@ -0,0 +1,377 @@
+"""
+Médias móveis simples atualizadas de forma incremental.
+
+As páginas de médias móveis recalculavam `Close.rolling(7).mean()` e `rolling(30).mean()`
+sobre todo o histórico a cada execução. O `MotorMediasMoveis` guarda um buffer circular com
+os últimos preços e uma soma corrente por janela: cada novo pregão atualiza todas as médias
+em O(1) por janela. O estado é salvo ao lado do CSV processado e só é refeito do zero quando
+o histórico já processado muda.
+
+`banco_medias_moveis` atende aos estudos de parâmetros: calcula de uma vez as médias
+simples, exponenciais ou ponderadas de dezenas de janelas, numa única matriz.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from uber_stocks import carregamento
+
+JANELAS_PADRAO = (7, 30)
+VERSAO_ESTADO = 2
+TIPOS_MEDIA = ("simples", "exponencial", "ponderada")
+
+
+class MotorMediasMoveis:
+    """
+    Médias móveis simples de várias janelas mantidas por somas correntes.
+
+    Um único buffer circular, do tamanho da maior janela, guarda os últimos valores; a soma
+    de cada janela recebe o valor que entra e perde o que sai. A cada volta completa do
+    buffer as somas são refeitas a partir dele, o que evita o acúmulo de erro de arredondamento.
+    Como no `rolling(janela).mean()`, a média é NaN enquanto houver valor ausente na janela.
+
+    Parâmetros:
+    - janelas (iterable): Tamanhos das janelas, em pregões.
+    """
+
+    def __init__(self, janelas=JANELAS_PADRAO):
+        self.janelas = np.array(sorted(set(int(janela) for janela in janelas)), dtype="int64")
+        if len(self.janelas) == 0 or self.janelas[0] < 1:
+            raise ValueError("As janelas devem ser inteiros positivos.")
+
+        self._buffer = np.zeros(int(self.janelas[-1]))
+        self._ausentes = np.zeros(int(self.janelas[-1]), dtype=bool)
+        self._posicao = 0
+        self._contagem = 0
+        self._somas = np.zeros(len(self.janelas))
+        self._qtd_ausentes = np.zeros(len(self.janelas), dtype="int64")
+        self._historico = np.empty((0, len(self.janelas)))
+        self._datas = np.empty(0, dtype="datetime64[ns]")
+        # Assinatura (`carregamento.assinatura_prefixo`) dos preços e datas já processados
+        self.assinatura = None
+
+    def __len__(self):
+        return self._contagem
+
+    @property
+    def ultima_data(self):
+        return pd.Timestamp(self._datas[self._contagem - 1]) if self._contagem else None
+
+    def _recalcular_somas(self):
+        # Soma exata de cada janela a partir do buffer, com os valores mais recentes primeiro
+        if self._contagem == 0:
+            self._somas = np.zeros(len(self.janelas))
+            self._qtd_ausentes = np.zeros(len(self.janelas), dtype="int64")
+            return
+        limites = np.minimum(self.janelas, self._contagem) - 1
+        self._somas = np.cumsum(np.roll(self._buffer, -self._posicao)[::-1])[limites]
+        self._qtd_ausentes = np.cumsum(np.roll(self._ausentes, -self._posicao)[::-1])[limites]
+
+    def _medias_atuais(self):
+        completas = (self._contagem >= self.janelas) & (self._qtd_ausentes == 0)
+        return np.where(completas, self._somas / self.janelas, np.nan)
+
+    def atualizar(self, valor, data=None):
+        """
+        Acrescenta um novo pregão e atualiza as médias de todas as janelas em O(1) por janela.
+
+        Parâmetros:
+        - valor (float): Preço do novo pregão.
+        - data (Timestamp, opcional): Data do pregão.
+
+        Retorna:
+        - numpy.ndarray: Média de cada janela (NaN enquanto a janela não estiver completa).
+        """
+        valor = float(valor)
+        ausente = np.isnan(valor)
+        if ausente:
+            valor = 0.0
+
+        tamanho = len(self._buffer)
+        # Valor que sai de cada janela: o de `janela` posições atrás no buffer
+        cheias = self._contagem >= self.janelas
+        saindo = (self._posicao - self.janelas) % tamanho
+        self._somas = self._somas + valor - np.where(cheias, self._buffer[saindo], 0.0)
+        self._qtd_ausentes = self._qtd_ausentes + ausente - (cheias & self._ausentes[saindo])
+        self._buffer[self._posicao] = valor
+        self._ausentes[self._posicao] = ausente
+        self._posicao = (self._posicao + 1) % tamanho
+        self._contagem += 1
+        if self._posicao == 0:
+            self._recalcular_somas()
+
+        medias = self._medias_atuais()
+        self._acrescentar_historico(medias, data)
+        return medias
+
+    def _acrescentar_historico(self, medias, data):
+        # Crescimento geométrico da capacidade: acrescentar continua O(1) amortizado
+        linha = self._contagem - 1
+        capacidade = len(self._historico)
+        if self._contagem > capacidade:
+            nova = max(2 * capacidade, 64)
+            historico = np.empty((nova, len(self.janelas)))
+            historico[:linha] = self._historico[:linha]
+            datas = np.full(nova, np.datetime64("NaT"), dtype="datetime64[ns]")
+            datas[:linha] = self._datas[:linha]
+            self._historico, self._datas = historico, datas
+        self._historico[linha] = medias
+        self._datas[linha] = np.datetime64("NaT") if data is None else pd.Timestamp(data).to_datetime64()
+
+    def recalcular(self, valores, datas=None):
+        """
+        Refaz todo o estado a partir de uma série completa, com somas acumuladas vetorizadas.
+
+        Parâmetros:
+        - valores (array-like): Preços do histórico inteiro, em ordem cronológica.
+        - datas (array-like, opcional): Datas correspondentes.
+        """
+        valores = np.asarray(valores, dtype="float64")
+        ausentes = np.isnan(valores)
+        valores = np.where(ausentes, 0.0, valores)
+        n = len(valores)
+
+        acumulado = np.concatenate([[0.0], np.cumsum(valores)])
+        acumulado_ausentes = np.concatenate([[0], np.cumsum(ausentes)])
+        historico = np.full((n, len(self.janelas)), np.nan)
+        for j, janela in enumerate(self.janelas):
+            if n >= janela:
+                medias = (acumulado[janela:] - acumulado[:-janela]) / janela
+                sem_ausentes = acumulado_ausentes[janela:] == acumulado_ausentes[:-janela]
+                historico[janela - 1:, j] = np.where(sem_ausentes, medias, np.nan)
+
+        self._historico = historico
+        self._datas = (np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]") if datas is None
+                       else pd.to_datetime(np.asarray(datas)).to_numpy(dtype="datetime64[ns]"))
+        self._contagem = n
+
+        # O buffer recebe os últimos valores na posição em que a atualização contínua os deixaria
+        tamanho = len(self._buffer)
+        self._buffer[:] = 0.0
+        self._ausentes[:] = False
+        posicoes = np.arange(max(n - tamanho, 0), n)
+        self._posicao = n % tamanho
+        self._buffer[posicoes % tamanho] = valores[posicoes]
+        self._ausentes[posicoes % tamanho] = ausentes[posicoes]
+        self._recalcular_somas()
+
+    def ultimos_valores(self):
+        """
+        Retorna os valores guardados no buffer, do mais antigo para o mais recente.
+
+        Retorna:
+        - numpy.ndarray: Até `max(janelas)` valores.
+        """
+        ordenado = np.where(self._ausentes, np.nan, self._buffer)
+        ordenado = np.roll(ordenado, -self._posicao)
+        return ordenado[len(ordenado) - min(self._contagem, len(ordenado)):]
+
+    def medias(self):
+        """
+        Retorna o histórico das médias de cada janela.
+
+        Retorna:
+        - dict: Janela e array com a média de cada pregão processado.
+        """
+        return {int(janela): self._historico[:self._contagem, j] for j, janela in enumerate(self.janelas)}
+
+    def salvar(self, caminho):
+        """
+        Grava o estado do motor (.npz) com troca atômica do arquivo.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo de estado.
+        """
+        caminho = Path(caminho)
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        with open(temporario, "wb") as arquivo:
+            np.savez(
+                arquivo,
+                versao=VERSAO_ESTADO,
+                janelas=self.janelas,
+                buffer=self._buffer,
+                ausentes=self._ausentes,
+                posicao=self._posicao,
+                contagem=self._contagem,
+                somas=self._somas,
+                qtd_ausentes=self._qtd_ausentes,
+                historico=self._historico[:self._contagem],
+                datas=self._datas[:self._contagem].view("int64"),
+                assinatura="" if self.assinatura is None else self.assinatura,
+            )
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """
+        Lê um estado gravado por `salvar`.
+
+        Parâmetros:
+        - caminho (str | Path): Caminho do arquivo de estado.
+
+        Retorna:
+        - MotorMediasMoveis | None: Motor restaurado, ou None se o arquivo não existe ou é de outra versão.
+        """
+        try:
+            with np.load(caminho, allow_pickle=False) as arquivo:
+                if int(arquivo["versao"]) != VERSAO_ESTADO:
+                    return None
+                motor = cls(arquivo["janelas"])
+                motor._buffer = arquivo["buffer"].copy()
+                motor._ausentes = arquivo["ausentes"].copy()
+                motor._posicao = int(arquivo["posicao"])
+                motor._contagem = int(arquivo["contagem"])
+                motor._somas = arquivo["somas"].copy()
+                motor._qtd_ausentes = arquivo["qtd_ausentes"].copy()
+                motor._historico = arquivo["historico"].copy()
+                motor._datas = arquivo["datas"].view("datetime64[ns]").copy()
+                motor.assinatura = str(arquivo["assinatura"]) or None
+        except (OSError, ValueError, KeyError):
+            return None
+        return motor
+
+
+def caminho_estado(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho do estado das médias móveis, guardado ao lado do CSV processado.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo .npz com o estado do motor.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(caminho_processado.stem + ".medias_moveis.npz")
+
+
+def _historico_preservado(motor, valores, datas):
+    # O histórico já processado continua igual se o total de linhas não diminuiu e o prefixo
+    # inteiro (preços e datas) tem a assinatura salva: revisar qualquer pregão antigo o invalida
+    n = len(motor)
+    if n == 0 or len(valores) < n or motor.assinatura is None:
+        return False
+    return carregamento.assinatura_prefixo((valores, datas), n) == motor.assinatura
+
+
+def sincronizar_medias(dados, janelas=JANELAS_PADRAO, caminho_processado=carregamento.CAMINHO_PROCESSADO,
+                       coluna_preco="Close", coluna_data=carregamento.COLUNA_DATA):
+    """
+    Atualiza as médias móveis com os pregões novos e devolve o histórico de cada janela.
+
+    Apenas as linhas posteriores ao estado salvo são processadas, em O(1) por janela; o
+    cálculo completo só é refeito quando o histórico já processado foi revisto ou quando
+    são pedidas janelas que o estado não contém.
+
+    Parâmetros:
+    - dados (pandas.DataFrame | VisaoOHLCV): Dados ordenados por data.
+    - janelas (iterable): Tamanhos das janelas.
+    - caminho_processado (str | Path): CSV processado ao lado do qual o estado é salvo.
+    - coluna_preco (str): Coluna de preço.
+    - coluna_data (str): Coluna de datas.
+
+    Retorna:
+    - dict: Janela e array com a média móvel de cada linha de `dados`.
+    """
+    valores = np.asarray(dados[coluna_preco], dtype="float64")
+    datas = np.asarray(dados[coluna_data]) if coluna_data in dados else None
+    caminho = caminho_estado(caminho_processado)
+
+    motor = MotorMediasMoveis.carregar(caminho)
+    if motor is None or not set(janelas) <= set(motor.janelas.tolist()) or not _historico_preservado(motor, valores, datas):
+        motor = MotorMediasMoveis(janelas if motor is None else set(janelas) | set(motor.janelas.tolist()))
+        motor.recalcular(valores, datas)
+    elif len(valores) > len(motor):
+        for i in range(len(motor), len(valores)):
+            motor.atualizar(valores[i], None if datas is None else datas[i])
+    else:
+        return {janela: motor.medias()[janela] for janela in janelas}
+
+    motor.assinatura = carregamento.assinatura_prefixo((valores, datas), len(valores))
+    try:
+        motor.salvar(caminho)
+    except OSError:
+        # Sem permissão de escrita as médias continuam disponíveis, apenas sem estado salvo
+        pass
+    todas = motor.medias()
+    return {janela: todas[janela] for janela in janelas}
+
+
+
+def _somas_janela(acumulado, janela, saida):
+    # Soma da janela terminada em cada posição, a partir das somas acumuladas (com 0 inicial);
+    # nas primeiras posições a janela é truncada no início da série
+    n = len(acumulado) - 1
+    corte = min(janela, n)
+    saida[:corte] = acumulado[1:corte + 1]
+    saida[corte:] = acumulado[corte + 1:] - acumulado[1:n - corte + 1]
+    return saida
+
+
+def banco_medias_moveis(valores, janelas, tipo="simples"):
+    """
+    Calcula as médias móveis de várias janelas numa única matriz.
+
+    - simples: somas acumuladas, O(n) por janela independentemente do tamanho da janela.
+    - ponderada: pesos 1..janela (o mais recente pesa mais); o numerador é atualizado de um
+      pregão para o outro somando `janela * x` e subtraindo a soma da janela anterior.
+    - exponencial: `ewm(span=janela, adjust=False).mean()`, com um filtro recursivo
+      (`scipy.signal.lfilter`) por janela.
+
+    Nas médias simples e ponderadas o resultado é NaN enquanto a janela não estiver completa
+    ou contiver valores ausentes, como em `rolling(janela)`.
+
+    Parâmetros:
+    - valores (array-like): Série de preços em ordem cronológica.
+    - janelas (iterable): Tamanhos das janelas.
+    - tipo (str): 'simples', 'exponencial' ou 'ponderada'.
+
+    Retorna:
+    - numpy.ndarray: Matriz (linhas x janelas), com a coluna j correspondente a `janelas[j]`.
+    """
+    if tipo not in TIPOS_MEDIA:
+        raise ValueError(f"Tipo de média inválido: '{tipo}'. Use um de {TIPOS_MEDIA}.")
+    janelas = np.asarray(list(janelas), dtype="int64")
+    if len(janelas) and janelas.min() < 1:
+        raise ValueError("As janelas devem ser inteiros positivos.")
+
+    valores = np.asarray(valores, dtype="float64")
+    n = len(valores)
+    # Uma linha contígua por janela; a transposta devolvida tem uma coluna por janela, sem cópia
+    saida = np.empty((len(janelas), n))
+
+    if tipo == "exponencial":
+        if np.isnan(valores).any():
+            raise ValueError("A média exponencial não aceita valores ausentes.")
+        for j, janela in enumerate(janelas):
+            alfa = 2.0 / (janela + 1.0)
+            if n:
+                saida[j], _ = lfilter([alfa], [1.0, alfa - 1.0], valores, zi=[(1.0 - alfa) * valores[0]])
+        return saida.T
+
+    ausentes = np.isnan(valores)
+    limpos = np.where(ausentes, 0.0, valores) if ausentes.any() else valores
+    acumulado = np.concatenate([[0.0], np.cumsum(limpos)])
+    acumulado_ausentes = np.concatenate([[0], np.cumsum(ausentes)]) if ausentes.any() else None
+    somas = np.empty(n)
+    contagem_ausentes = np.empty(n, dtype="int64")
+
+    for j, janela in enumerate(janelas):
+        linha = saida[j]
+        _somas_janela(acumulado, janela, somas)
+        if tipo == "simples":
+            np.divide(somas, janela, out=linha)
+        else:
+            # Numerador ponderado: N_t = N_{t-1} + janela * x_t - (soma da janela que termina em t-1)
+            np.multiply(limpos, janela, out=linha)
+            linha[1:] -= somas[:-1]
+            np.cumsum(linha, out=linha)
+            linha /= janela * (janela + 1) / 2
+
+        linha[:janela - 1] = np.nan
+        if acumulado_ausentes is not None:
+            linha[_somas_janela(acumulado_ausentes, janela, contagem_ausentes) > 0] = np.nan
+    return saida.T
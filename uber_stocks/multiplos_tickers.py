@@ -0,0 +1,259 @@
+"""
+Análise de vários tickers em paralelo, com os dados compartilhados entre processos.
+
+Substitui a execução ticker a ticker das funções `analisar_volatilidade_diaria`,
+`analisar_relacao_volume_preco` e `analisar_diferenca_abertura_fechamento`, presas a um único
+CSV: as colunas numéricas de todos os tickers são copiadas uma vez para um bloco de memória
+compartilhada, e cada processo do `ProcessPoolExecutor` recebe apenas o nome do bloco e as
+posições dos seus tickers, em vez de DataFrames serializados. O resultado é uma tabela com uma
+linha por ticker.
+
+Uso:
+    python -m uber_stocks.multiplos_tickers --tickers UBER LYFT TSLA
+    python -m uber_stocks.multiplos_tickers --arquivo UBER=data/processed/uber_stock_data_atualizado.csv --saida resultados.csv
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from scipy.stats import pearsonr, spearmanr
+
+from uber_stocks import carregamento, cruzamentos, medias_moveis, particoes
+
+# Ordem das linhas da matriz compartilhada; a data vai como int64 (nanossegundos) na mesma matriz
+COLUNAS = ("Open", "High", "Low", "Close", "Volume")
+LOTES_POR_PROCESSO = 4
+TOP_N = 5
+
+
+def _resumo(prefixo, valores):
+    # Mesmos campos do `describe`, com quartis exatos (interpolação linear)
+    valores = valores[~np.isnan(valores)]
+    if len(valores) == 0:
+        return {f"{prefixo}_{campo}": np.nan for campo in ("media", "desvio", "minimo", "q1", "mediana", "q3", "maximo")}
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    return {
+        f"{prefixo}_media": valores.mean(),
+        f"{prefixo}_desvio": valores.std(ddof=1) if len(valores) > 1 else np.nan,
+        f"{prefixo}_minimo": valores.min(),
+        f"{prefixo}_q1": q1,
+        f"{prefixo}_mediana": mediana,
+        f"{prefixo}_q3": q3,
+        f"{prefixo}_maximo": valores.max(),
+    }
+
+
+def analisar_serie(datas, abertura, maxima, minima, fechamento, volume, top_n=TOP_N):
+    """
+    Aplica o conjunto de análises a um único ticker.
+
+    Parâmetros:
+    - datas (numpy.ndarray): Datas em ordem cronológica (datetime64).
+    - abertura, maxima, minima, fechamento, volume (numpy.ndarray): Colunas do ticker.
+    - top_n (int): Quantidade de dias de maior volatilidade listados.
+
+    Retorna:
+    - dict: Métricas do ticker, uma chave por coluna da tabela final.
+    """
+    resultado = {
+        "linhas": len(datas),
+        "inicio": datas[0] if len(datas) else pd.NaT,
+        "fim": datas[-1] if len(datas) else pd.NaT,
+    }
+
+    # Volatilidade diária (máxima - mínima) e os dias mais voláteis
+    volatilidade = maxima - minima
+    resultado.update(_resumo("volatilidade", volatilidade))
+    validos = np.flatnonzero(~np.isnan(volatilidade))
+    maiores = validos[np.argsort(-volatilidade[validos], kind="stable")[:top_n]]
+    resultado["dias_maior_volatilidade"] = ", ".join(
+        pd.Timestamp(datas[i]).strftime("%Y-%m-%d") for i in maiores
+    )
+
+    # Relação volume x preço de fechamento
+    pares = ~(np.isnan(volume) | np.isnan(fechamento))
+    if pares.sum() > 2 and np.ptp(volume[pares]) > 0 and np.ptp(fechamento[pares]) > 0:
+        resultado["pearson"], resultado["p_valor_pearson"] = pearsonr(volume[pares], fechamento[pares])
+        resultado["spearman"], resultado["p_valor_spearman"] = spearmanr(volume[pares], fechamento[pares])
+    else:
+        resultado.update(pearson=np.nan, p_valor_pearson=np.nan, spearman=np.nan, p_valor_spearman=np.nan)
+
+    # Diferença entre abertura e fechamento
+    diferenca = fechamento - abertura
+    resultado.update(_resumo("diferenca", diferenca))
+    resultado["dias_fechamento_maior"] = int(np.count_nonzero(diferenca > 0))
+
+    # Médias móveis de 7 e 30 pregões e cruzamentos entre elas
+    medias = medias_moveis.banco_medias_moveis(fechamento, [7, 30], "simples")
+    resultado["preco_atual"] = fechamento[-1] if len(fechamento) else np.nan
+    resultado["media_movel_7"] = medias[-1, 0] if len(medias) else np.nan
+    resultado["media_movel_30"] = medias[-1, 1] if len(medias) else np.nan
+    indice = cruzamentos.detectar_cruzamentos(datas, fechamento, 7, 30)
+    resultado["cruzamentos_alta"] = indice.contar(direcao=cruzamentos.ALTA)
+    resultado["cruzamentos_baixa"] = indice.contar(direcao=cruzamentos.BAIXA)
+    return resultado
+
+
+def _anexar(nome, formato):
+    # Abre o bloco criado pelo processo principal; só o processo principal o apaga (unlink)
+    memoria = shared_memory.SharedMemory(name=nome)
+    return memoria, np.ndarray(formato, dtype="float64", buffer=memoria.buf)
+
+
+def _analisar_lote(nome, formato, lote, top_n=TOP_N):
+    """
+    Analisa um lote de tickers lendo a matriz compartilhada, sem cópia dos dados.
+
+    Parâmetros:
+    - nome (str): Nome do bloco de memória compartilhada.
+    - formato (tuple): Forma da matriz (1 + colunas, linhas).
+    - lote (list): Tuplas (ticker, posição inicial, posição final).
+    - top_n (int): Quantidade de dias de maior volatilidade listados.
+
+    Retorna:
+    - list: Tuplas (ticker, métricas).
+    """
+    memoria, matriz = _anexar(nome, formato)
+    try:
+        datas = matriz[0].view("int64").view("datetime64[ns]")
+        resultados = []
+        for ticker, inicio, fim in lote:
+            colunas = matriz[1:, inicio:fim]
+            resultados.append((ticker, analisar_serie(datas[inicio:fim], *colunas, top_n=top_n)))
+        return resultados
+    finally:
+        del matriz
+        memoria.close()
+
+
+def _dividir_lotes(posicoes, quantidade):
+    # Lotes de tamanho parecido em linhas: o ticker maior vai para o lote mais leve
+    lotes = [[] for _ in range(max(1, min(quantidade, len(posicoes))))]
+    cargas = np.zeros(len(lotes))
+    for item in sorted(posicoes, key=lambda item: item[2] - item[1], reverse=True):
+        destino = int(np.argmin(cargas))
+        lotes[destino].append(item)
+        cargas[destino] += item[2] - item[1]
+    return [lote for lote in lotes if lote]
+
+
+def analisar_tickers(dados_por_ticker, processos=None, coluna_data=carregamento.COLUNA_DATA, top_n=TOP_N):
+    """
+    Aplica o conjunto de análises a vários tickers em paralelo.
+
+    Parâmetros:
+    - dados_por_ticker (dict): Ticker -> DataFrame com a coluna de datas e as colunas OHLCV.
+    - processos (int, opcional): Quantidade de processos. Se None, um por núcleo.
+    - coluna_data (str): Nome da coluna de datas.
+    - top_n (int): Quantidade de dias de maior volatilidade listados.
+
+    Retorna:
+    - pandas.DataFrame: Uma linha por ticker (índice 'Ticker'), na ordem recebida.
+
+    Lança:
+    - ValueError: Se faltar alguma coluna em algum ticker.
+    """
+    for ticker, dados in dados_por_ticker.items():
+        faltantes = [coluna for coluna in (coluna_data, *COLUNAS) if coluna not in dados.columns]
+        if faltantes:
+            raise ValueError(f"Colunas ausentes no ticker '{ticker}': {faltantes}")
+
+    tickers = list(dados_por_ticker)
+    if not tickers:
+        return pd.DataFrame(index=pd.Index([], name=particoes.COLUNA_TICKER))
+    processos = processos or os.cpu_count() or 1
+
+    # Posições de cada ticker na matriz compartilhada
+    posicoes, total = [], 0
+    for ticker in tickers:
+        tamanho = len(dados_por_ticker[ticker])
+        posicoes.append((ticker, total, total + tamanho))
+        total += tamanho
+
+    formato = (1 + len(COLUNAS), total)
+    memoria = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(formato)) * 8))
+    try:
+        matriz = np.ndarray(formato, dtype="float64", buffer=memoria.buf)
+        datas = matriz[0].view("int64")
+        for ticker, inicio, fim in posicoes:
+            dados = dados_por_ticker[ticker].sort_values(coluna_data)
+            datas[inicio:fim] = pd.to_datetime(dados[coluna_data]).to_numpy(dtype="datetime64[ns]").view("int64")
+            for linha, coluna in enumerate(COLUNAS, start=1):
+                matriz[linha, inicio:fim] = dados[coluna].to_numpy(dtype="float64", na_value=np.nan)
+        del datas, matriz
+
+        lotes = _dividir_lotes(posicoes, processos * LOTES_POR_PROCESSO)
+        if processos == 1:
+            partes = [_analisar_lote(memoria.name, formato, lote, top_n) for lote in lotes]
+        else:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                futuros = [executor.submit(_analisar_lote, memoria.name, formato, lote, top_n) for lote in lotes]
+                partes = [futuro.result() for futuro in futuros]
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+    resultados = dict(item for parte in partes for item in parte)
+    tabela = pd.DataFrame.from_dict({ticker: resultados[ticker] for ticker in tickers}, orient="index")
+    tabela.index.name = particoes.COLUNA_TICKER
+    return tabela
+
+
+def carregar_tickers(tickers=None, destino=particoes.DIRETORIO_PARTICOES, inicio=None, fim=None):
+    """
+    Lê do conjunto particionado os dados de cada ticker.
+
+    Parâmetros:
+    - tickers (list, opcional): Tickers desejados. Se None, todos os particionados.
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+    - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+    - fim (str | Timestamp, opcional): Data final (inclusiva).
+
+    Retorna:
+    - dict: Ticker -> DataFrame, em ordem alfabética de ticker.
+    """
+    dados = particoes.ler_particoes(destino, tickers, inicio, fim, incluir_ticker=True)
+    if dados.empty:
+        return {}
+    return {
+        str(ticker): parte.drop(columns=particoes.COLUNA_TICKER).reset_index(drop=True)
+        for ticker, parte in dados.groupby(particoes.COLUNA_TICKER, observed=True, sort=True)
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Analisa vários tickers em paralelo.")
+    parser.add_argument("--tickers", nargs="*", help="Tickers lidos do conjunto particionado (padrão: todos).")
+    parser.add_argument("--arquivo", action="append", default=[], metavar="TICKER=CSV",
+                        help="CSV processado de um ticker; pode ser repetido.")
+    parser.add_argument("--destino", default=str(particoes.DIRETORIO_PARTICOES), help="Pasta raiz das partições.")
+    parser.add_argument("--processos", type=int, default=None, help="Quantidade de processos (padrão: um por núcleo).")
+    parser.add_argument("--saida", default=None, help="CSV onde gravar a tabela de resultados.")
+    args = parser.parse_args(argumentos)
+
+    if args.arquivo:
+        dados_por_ticker = {}
+        for item in args.arquivo:
+            ticker, separador, caminho = item.partition("=")
+            if not separador:
+                parser.error(f"Use TICKER=CSV em --arquivo: '{item}'")
+            dados_por_ticker[ticker] = carregamento.carregar_dados(caminho)
+    else:
+        dados_por_ticker = carregar_tickers(args.tickers, args.destino)
+    if not dados_por_ticker:
+        print(f"⚠️ Nenhum ticker encontrado em '{args.destino}'")
+        return
+
+    tabela = analisar_tickers(dados_por_ticker, args.processos)
+    if args.saida:
+        tabela.to_csv(args.saida)
+        print(f"✅ Resultados de {len(tabela)} tickers salvos em '{args.saida}'")
+    else:
+        print(tabela.to_string())
+
+
+if __name__ == "__main__":
+    main()
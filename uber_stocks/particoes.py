@@ -0,0 +1,289 @@
+"""
+Dados processados particionados no estilo Hive: `ticker=<TICKER>/year=<ANO>/`.
+
+Substitui o particionamento simulado por VIEW de `sql/optimization_examples/dados_ano.sql`:
+cada ano de cada ticker é gravado num arquivo colunar próprio (via
+`carregamento.salvar_colunas`), e a leitura com filtros de ticker e de período abre apenas
+as partições que podem conter linhas do intervalo pedido.
+
+Uso:
+    python -m uber_stocks.particoes --processado data/processed/uber_stock_data_atualizado.csv --ticker UBER
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from uber_stocks import carregamento
+
+DIRETORIO_PARTICOES = carregamento.DIRETORIO_CACHE / "particoes"
+TICKER_PADRAO = "UBER"
+COLUNA_TICKER = "Ticker"
+NOME_ARQUIVO = "dados"
+
+
+def _valor_chave(nome_pasta, chave):
+    # 'year=2023' -> '2023'; pastas fora do padrão retornam None
+    prefixo = f"{chave}="
+    return nome_pasta[len(prefixo):] if nome_pasta.startswith(prefixo) else None
+
+
+def _arquivo_particao(pasta):
+    for sufixo in (".parquet", ".npz"):
+        caminho = pasta / (NOME_ARQUIVO + sufixo)
+        if caminho.exists():
+            return caminho
+    return None
+
+
+def _assinatura_particao(particao):
+    # Hash do conteúdo de um ano (valores e nomes das colunas), para regravar só os anos alterados
+    sha = hashlib.sha256(",".join(map(str, particao.columns)).encode("utf-8"))
+    sha.update(pd.util.hash_pandas_object(particao, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def _ler_versao(pasta_ticker):
+    try:
+        with open(pasta_ticker / "_versao.json", encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def escrever_particoes(dados, ticker=TICKER_PADRAO, destino=DIRETORIO_PARTICOES, coluna_data=carregamento.COLUNA_DATA,
+                       versao=None):
+    """
+    Grava os dados de um ticker como uma partição por ano, regravando só os anos alterados.
+
+    Cada ano é trocado pelo `os.replace` atômico de `carregamento.salvar_colunas`: a pasta
+    do ticker nunca deixa de existir, e um leitor concorrente vê, em cada ano, a partição
+    antiga ou a nova, nunca um arquivo pela metade. Anos que deixaram de existir nos dados
+    são removidos.
+
+    Parâmetros:
+    - dados (pandas.DataFrame): Dados do ticker, com a coluna de datas em datetime.
+    - ticker (str): Código do ticker.
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+    - coluna_data (str): Nome da coluna de datas.
+    - versao (str, opcional): Identificador da versão dos dados de origem.
+
+    Retorna:
+    - list: Anos regravados.
+    """
+    pasta_ticker = Path(destino) / f"ticker={ticker}"
+    pasta_ticker.mkdir(parents=True, exist_ok=True)
+    anteriores = _ler_versao(pasta_ticker).get("anos", {})
+
+    dados = dados.drop(columns=[COLUNA_TICKER], errors="ignore").sort_values(coluna_data, kind="stable")
+    assinaturas = {}
+    regravados = []
+    for ano, particao in dados.groupby(dados[coluna_data].dt.year, sort=True):
+        particao = particao.reset_index(drop=True)
+        ano = str(int(ano))
+        assinaturas[ano] = _assinatura_particao(particao)
+        pasta_ano = pasta_ticker / f"year={ano}"
+        if anteriores.get(ano) == assinaturas[ano] and _arquivo_particao(pasta_ano) is not None:
+            continue
+        gravado = carregamento.salvar_colunas(particao, pasta_ano / NOME_ARQUIVO)
+        # Sem o pyarrow (ou com ele instalado depois), o arquivo do outro formato ficaria para trás
+        for sufixo in (".parquet", ".npz"):
+            outro = pasta_ano / (NOME_ARQUIVO + sufixo)
+            if outro != gravado and outro.exists():
+                outro.unlink()
+        regravados.append(int(ano))
+
+    # Anos que sumiram dos dados
+    for pasta_ano in pasta_ticker.iterdir():
+        ano = _valor_chave(pasta_ano.name, "year")
+        if ano is not None and pasta_ano.is_dir() and ano not in assinaturas:
+            shutil.rmtree(pasta_ano, ignore_errors=True)
+
+    # A versão só é registrada depois que todos os anos foram gravados
+    temporario = pasta_ticker / f"_versao.json.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump({"versao": versao, "coluna_data": coluna_data, "linhas": len(dados), "anos": assinaturas},
+                  arquivo, indent=2)
+    os.replace(temporario, pasta_ticker / "_versao.json")
+
+    return regravados
+
+
+def versao_particoes(ticker=TICKER_PADRAO, destino=DIRETORIO_PARTICOES):
+    """
+    Retorna a versão dos dados de origem registrada nas partições de um ticker.
+
+    Parâmetros:
+    - ticker (str): Código do ticker.
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+
+    Retorna:
+    - str | None: Versão registrada, ou None se o ticker ainda não foi particionado.
+    """
+    return _ler_versao(Path(destino) / f"ticker={ticker}").get("versao")
+
+
+def listar_particoes(destino=DIRETORIO_PARTICOES, tickers=None, inicio=None, fim=None):
+    """
+    Lista as partições que podem conter linhas dos tickers e do período pedidos.
+
+    Apenas os nomes das pastas são consultados: nenhum arquivo de dados é aberto.
+
+    Parâmetros:
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+    - tickers (str | list, opcional): Ticker ou lista de tickers. Se None, todos.
+    - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+    - fim (str | Timestamp, opcional): Data final (inclusiva).
+
+    Retorna:
+    - list: Tuplas (ticker, ano, caminho do arquivo), ordenadas por ticker e ano.
+    """
+    destino = Path(destino)
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    ano_inicio = pd.Timestamp(inicio).year if inicio is not None else None
+    ano_fim = pd.Timestamp(fim).year if fim is not None else None
+
+    particoes = []
+    if not destino.exists():
+        return particoes
+    for pasta_ticker in destino.iterdir():
+        ticker = _valor_chave(pasta_ticker.name, "ticker")
+        # Pastas temporárias de uma gravação em andamento são ignoradas
+        if ticker is None or not pasta_ticker.is_dir() or ".tmp-" in ticker or ".antigo-" in ticker:
+            continue
+        if tickers is not None and ticker not in tickers:
+            continue
+        for pasta_ano in pasta_ticker.iterdir():
+            ano = _valor_chave(pasta_ano.name, "year")
+            if ano is None or not ano.isdigit():
+                continue
+            ano = int(ano)
+            if (ano_inicio is not None and ano < ano_inicio) or (ano_fim is not None and ano > ano_fim):
+                continue
+            arquivo = _arquivo_particao(pasta_ano)
+            if arquivo is not None:
+                particoes.append((ticker, ano, arquivo))
+
+    return sorted(particoes)
+
+
+def ler_particoes(destino=DIRETORIO_PARTICOES, tickers=None, inicio=None, fim=None,
+                  coluna_data=carregamento.COLUNA_DATA, incluir_ticker=False):
+    """
+    Lê apenas as partições correspondentes aos filtros e recorta o período exato.
+
+    Parâmetros:
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+    - tickers (str | list, opcional): Ticker ou lista de tickers. Se None, todos.
+    - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+    - fim (str | Timestamp, opcional): Data final (inclusiva: entram todos os horários do dia).
+    - coluna_data (str): Nome da coluna de datas.
+    - incluir_ticker (bool): Se True, acrescenta a coluna 'Ticker' (categoria).
+
+    Retorna:
+    - pandas.DataFrame: Linhas do período, ordenadas por ticker e data.
+    """
+    # Faixa semiaberta, como em `consultas.intervalo_periodo`: o fim vira o início do dia seguinte
+    limite = None if fim is None else pd.Timestamp(fim).normalize() + pd.Timedelta(days=1)
+    partes = []
+    for ticker, _, arquivo in listar_particoes(destino, tickers, inicio, fim):
+        parte = carregamento.ler_colunas(arquivo)
+        # Só as partições das pontas do intervalo precisam de recorte por linha
+        if inicio is not None:
+            parte = parte[parte[coluna_data] >= pd.Timestamp(inicio)]
+        if limite is not None:
+            parte = parte[parte[coluna_data] < limite]
+        if incluir_ticker:
+            parte = parte.assign(**{COLUNA_TICKER: ticker})
+        partes.append(parte)
+
+    if not partes:
+        return pd.DataFrame()
+    dados = pd.concat(partes, ignore_index=True)
+    if incluir_ticker:
+        dados[COLUNA_TICKER] = dados[COLUNA_TICKER].astype("category")
+    return dados
+
+
+def anos_disponiveis(ticker=TICKER_PADRAO, destino=DIRETORIO_PARTICOES):
+    """
+    Lista os anos particionados de um ticker.
+
+    Parâmetros:
+    - ticker (str): Código do ticker.
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+
+    Retorna:
+    - list: Anos disponíveis, em ordem crescente.
+    """
+    return [ano for _, ano, _ in listar_particoes(destino, ticker)]
+
+
+def atualizar_particoes(caminho_arquivo=carregamento.CAMINHO_PROCESSADO, ticker=TICKER_PADRAO,
+                        destino=DIRETORIO_PARTICOES):
+    """
+    Particiona o CSV processado de um ticker, se as partições não refletirem a versão atual.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): Caminho do CSV processado do ticker.
+    - ticker (str): Código do ticker.
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+
+    Retorna:
+    - bool: True se as partições foram regravadas.
+    """
+    # Garante o snapshot do carregamento, que guarda o hash usado como versão
+    if carregamento.validar_snapshot(caminho_arquivo) is None:
+        carregamento.carregar_dados(caminho_arquivo)
+    versao = carregamento.versao_dados(caminho_arquivo)
+    if versao_particoes(ticker, destino) == versao:
+        return False
+
+    escrever_particoes(carregamento.carregar_dados(caminho_arquivo), ticker, destino, versao=versao)
+    return True
+
+
+def carregar_dados(caminho_arquivo=carregamento.CAMINHO_PROCESSADO, ticker=TICKER_PADRAO, inicio=None, fim=None,
+                   destino=DIRETORIO_PARTICOES):
+    """
+    Carrega os dados de um ticker no período pedido, lendo somente as partições necessárias.
+
+    Parâmetros:
+    - caminho_arquivo (str | Path): CSV processado de origem do ticker.
+    - ticker (str): Código do ticker.
+    - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+    - fim (str | Timestamp, opcional): Data final (inclusiva).
+    - destino (str | Path): Pasta raiz do conjunto particionado.
+
+    Retorna:
+    - pandas.DataFrame: Dados do período, ordenados por data.
+    """
+    atualizar_particoes(caminho_arquivo, ticker, destino)
+    return ler_particoes(destino, ticker, inicio, fim)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Particiona os dados processados por ticker e ano.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado de origem.")
+    parser.add_argument("--ticker", default=TICKER_PADRAO, help="Código do ticker.")
+    parser.add_argument("--destino", default=str(DIRETORIO_PARTICOES), help="Pasta raiz das partições.")
+    args = parser.parse_args(argumentos)
+
+    regravado = atualizar_particoes(args.processado, args.ticker, args.destino)
+    anos = anos_disponiveis(args.ticker, args.destino)
+
+    if regravado:
+        print(f"✅ Partições de '{args.ticker}' gravadas em '{args.destino}'")
+    else:
+        print(f"✅ Partições de '{args.ticker}' já estão atualizadas")
+    print(f"Anos: {', '.join(map(str, anos))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Avaliação walk-forward de modelos de previsão do retorno diário, com cache por dobra.
+
+O projeto não tinha código de previsão. Aqui, modelos de base do scikit-learn (regressão
+linear, ridge e gradient boosting sobre atributos defasados) são avaliados em dobras
+walk-forward: cada dobra treina com o histórico anterior ao seu período de teste e prevê o
+retorno do pregão seguinte em cada dia do teste.
+
+As dobras são ancoradas no início da série (a primeira começa após `treino_minimo` pregões),
+de modo que novos pregões só acrescentam dobras. Cada dobra tem uma chave (hash) formada
+pelo ticker, pela configuração e pelo conteúdo dos atributos que ela usa; o modelo ajustado
+e as previsões ficam em cache com essa chave (via joblib, o formato de persistência do
+scikit-learn), e as matrizes de atributos, por ticker e configuração de atributos. Ao
+reavaliar após ajustar a configuração, só as dobras cuja chave mudou são reajustadas, em
+paralelo num `ProcessPoolExecutor`.
+
+Uso:
+    python -m uber_stocks.previsao --modelo ridge
+    python -m uber_stocks.previsao --modelo gradient_boosting --defasagens 10 --tickers UBER LYFT
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from uber_stocks import armazenamento, carregamento, multiplos_tickers, particoes
+
+DIRETORIO_PREVISAO = carregamento.DIRETORIO_CACHE / "previsao"
+MODELOS = ("linear", "ridge", "gradient_boosting")
+# Chaves que definem os atributos; as demais só afetam o modelo ou as dobras
+CHAVES_ATRIBUTOS = ("defasagens", "janelas")
+CONFIG_PADRAO = {
+    "modelo": "ridge",
+    "parametros": {},
+    "defasagens": 5,
+    "janelas": [5, 20],
+    "treino_minimo": 504,
+    "tamanho_teste": 63,
+    "janela_treino": None,
+}
+
+
+def configuracao(**alteracoes):
+    """
+    Configuração padrão com as alterações pedidas.
+
+    Parâmetros:
+    - **alteracoes: Chaves de `CONFIG_PADRAO` a substituir.
+
+    Retorna:
+    - dict: Configuração completa.
+
+    Lança:
+    - ValueError: Se houver chave desconhecida ou modelo inválido.
+    """
+    desconhecidas = set(alteracoes) - set(CONFIG_PADRAO)
+    if desconhecidas:
+        raise ValueError(f"Chaves de configuração desconhecidas: {sorted(desconhecidas)}")
+    config = {**CONFIG_PADRAO, **alteracoes}
+    if config["modelo"] not in MODELOS:
+        raise ValueError(f"Modelo inválido: '{config['modelo']}'. Use um de {MODELOS}.")
+    return config
+
+
+def _hash(*partes):
+    # Partes em JSON (ordenado) ou bytes de arrays, na ordem recebida
+    sha = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, np.ndarray):
+            sha.update(np.ascontiguousarray(parte).tobytes())
+        else:
+            sha.update(json.dumps(parte, sort_keys=True, default=str).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def montar_atributos(dados, defasagens=5, janelas=(5, 20), coluna_data=carregamento.COLUNA_DATA):
+    """
+    Atributos defasados de cada pregão e o retorno do pregão seguinte (alvo).
+
+    Todos os atributos de um pregão usam apenas informação disponível no seu fechamento.
+
+    Parâmetros:
+    - dados (pandas.DataFrame | armazenamento.VisaoOHLCV): Dados OHLCV em ordem cronológica.
+    - defasagens (int): Quantidade de retornos passados usados como atributos.
+    - janelas (iterable): Janelas da média e do desvio móveis dos retornos.
+    - coluna_data (str): Nome da coluna de datas.
+
+    Retorna:
+    - pandas.DataFrame: Atributos, indexados pela data, só com pregões completos.
+    - pandas.Series: Retorno logarítmico do pregão seguinte, no mesmo índice.
+    """
+    fechamento = pd.Series(np.asarray(dados["Close"], dtype="float64"))
+    volume = pd.Series(np.asarray(dados["Volume"], dtype="float64"))
+    amplitude = np.asarray(dados["High"], dtype="float64") - np.asarray(dados["Low"], dtype="float64")
+    retorno = np.log(fechamento).diff()
+
+    atributos = {f"retorno_{k}": retorno.shift(k) for k in range(defasagens)}
+    atributos["volume_log_variacao"] = np.log(volume.where(volume > 0)).diff()
+    atributos["amplitude"] = amplitude / fechamento
+    for janela in janelas:
+        atributos[f"media_{janela}"] = retorno.rolling(janela).mean()
+        atributos[f"desvio_{janela}"] = retorno.rolling(janela).std()
+
+    atributos = pd.DataFrame(atributos)
+    atributos.index = pd.DatetimeIndex(np.asarray(dados[coluna_data]), name=coluna_data)
+    alvo = pd.Series(retorno.shift(-1).to_numpy(), index=atributos.index, name="alvo")
+
+    completos = atributos.notna().all(axis=1).to_numpy() & alvo.notna().to_numpy()
+    completos &= np.isfinite(atributos.to_numpy()).all(axis=1)
+    return atributos[completos], alvo[completos]
+
+
+def definir_dobras(linhas, treino_minimo, tamanho_teste, janela_treino=None):
+    """
+    Dobras walk-forward ancoradas no início da série.
+
+    Parâmetros:
+    - linhas (int): Quantidade de pregões com atributos completos.
+    - treino_minimo (int): Pregões de treino da primeira dobra.
+    - tamanho_teste (int): Pregões de teste de cada dobra (a última pode ser menor).
+    - janela_treino (int, opcional): Se informado, o treino usa só os últimos pregões (janela
+      deslizante); se None, todo o histórico anterior (janela expansiva).
+
+    Retorna:
+    - list: Tuplas (início do treino, início do teste, fim do teste), em posições.
+    """
+    dobras = []
+    for inicio_teste in range(treino_minimo, linhas, tamanho_teste):
+        inicio_treino = 0 if janela_treino is None else max(0, inicio_teste - janela_treino)
+        dobras.append((inicio_treino, inicio_teste, min(inicio_teste + tamanho_teste, linhas)))
+    return dobras
+
+
+def criar_modelo(nome, parametros=None):
+    """
+    Instancia um dos modelos de base.
+
+    Parâmetros:
+    - nome (str): 'linear', 'ridge' ou 'gradient_boosting'.
+    - parametros (dict, opcional): Parâmetros repassados ao estimador.
+
+    Retorna:
+    - sklearn.base.RegressorMixin: Estimador ainda não ajustado.
+    """
+    parametros = parametros or {}
+    if nome == "linear":
+        return make_pipeline(StandardScaler(), LinearRegression(**parametros))
+    if nome == "ridge":
+        return make_pipeline(StandardScaler(), Ridge(**{"alpha": 10.0, **parametros}))
+    if nome == "gradient_boosting":
+        return HistGradientBoostingRegressor(**{"max_iter": 200, "learning_rate": 0.05, "random_state": 0,
+                                                **parametros})
+    raise ValueError(f"Modelo inválido: '{nome}'. Use um de {MODELOS}.")
+
+
+def _gravar(objeto, destino, gravar):
+    # Gravação atômica num arquivo temporário; sem permissão, o resultado só não fica em cache
+    destino = Path(destino)
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = destino.with_name(f"{destino.name}.tmp-{os.getpid()}")
+        gravar(objeto, temporario)
+        os.replace(temporario, destino)
+    except OSError:
+        # Sem permissão de escrita: o resultado continua disponível, apenas sem ser salvo
+        pass
+
+
+def _gravar_npz(arrays, caminho):
+    with open(caminho, "wb") as arquivo:
+        np.savez(arquivo, **arrays)
+
+
+def _atributos_em_cache(ticker, dados, config, diretorio):
+    # Matriz de atributos por (ticker, dados, configuração de atributos)
+    chave = _hash(ticker, {chave: config[chave] for chave in CHAVES_ATRIBUTOS},
+                  *(np.asarray(dados[coluna], dtype="float64") for coluna in armazenamento.COLUNAS_OHLCV[1:]),
+                  np.asarray(dados[carregamento.COLUNA_DATA]).astype("datetime64[ns]").view("int64"))
+    caminho = Path(diretorio) / "atributos" / f"{ticker}-{chave[:16]}.npz"
+    try:
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            indice = pd.DatetimeIndex(arquivo["datas"].view("datetime64[ns]"), name=carregamento.COLUNA_DATA)
+            atributos = pd.DataFrame(arquivo["matriz"], index=indice, columns=arquivo["colunas"].tolist())
+            return atributos, pd.Series(arquivo["alvo"], index=indice, name="alvo")
+    except (OSError, ValueError, KeyError):
+        pass
+
+    atributos, alvo = montar_atributos(dados, config["defasagens"], config["janelas"])
+    _gravar({
+        "matriz": atributos.to_numpy(),
+        "colunas": np.array(atributos.columns, dtype=str),
+        "alvo": alvo.to_numpy(),
+        "datas": atributos.index.to_numpy(dtype="datetime64[ns]").view("int64"),
+    }, caminho, _gravar_npz)
+    return atributos, alvo
+
+
+def _ajustar_dobra(tarefa):
+    # Executada nos processos: um único thread por processo, para não disputar os núcleos
+    with threadpool_limits(1):
+        modelo = criar_modelo(tarefa["modelo"], tarefa["parametros"])
+        modelo.fit(tarefa["x_treino"], tarefa["y_treino"])
+        previsoes = modelo.predict(tarefa["x_teste"])
+    _gravar({"modelo": modelo, "previsoes": previsoes}, tarefa["caminho"], joblib.dump)
+    return previsoes
+
+
+def avaliar(dados_por_ticker, config=None, processos=None, diretorio=DIRETORIO_PREVISAO):
+    """
+    Avalia a configuração em todas as dobras walk-forward de cada ticker.
+
+    Parâmetros:
+    - dados_por_ticker (dict): Ticker -> dados OHLCV em ordem cronológica.
+    - config (dict, opcional): Configuração (ver `configuracao`). Se None, a padrão.
+    - processos (int, opcional): Processos usados nos ajustes. Se None, um por núcleo.
+    - diretorio (str | Path): Pasta do cache de atributos e modelos.
+
+    Retorna:
+    - pandas.DataFrame: Uma linha por (ticker, dobra) com período, métricas e se veio do cache.
+    - pandas.DataFrame: Previsões de cada pregão de teste (Ticker, Date, dobra, real, previsto).
+    """
+    config = configuracao(**(config or {}))
+    # Os limites da dobra entram na chave pelo conteúdo dos atributos e pelo tamanho do treino
+    config_modelo = {"modelo": config["modelo"], "parametros": config["parametros"]}
+    diretorio = Path(diretorio)
+
+    dobras, pendentes = [], []
+    for ticker, dados in dados_por_ticker.items():
+        atributos, alvo = _atributos_em_cache(ticker, dados, config, diretorio)
+        matriz, valores = atributos.to_numpy(), alvo.to_numpy()
+        limites = definir_dobras(len(matriz), config["treino_minimo"], config["tamanho_teste"],
+                                 config["janela_treino"])
+        for numero, (inicio_treino, inicio_teste, fim_teste) in enumerate(limites):
+            chave = _hash(ticker, config_modelo, list(atributos.columns), inicio_teste - inicio_treino,
+                          matriz[inicio_treino:fim_teste], valores[inicio_treino:fim_teste])
+            dobra = {
+                "ticker": ticker,
+                "dobra": numero,
+                "datas": atributos.index[inicio_teste:fim_teste],
+                "real": valores[inicio_teste:fim_teste],
+                "treino": inicio_teste - inicio_treino,
+                "caminho": diretorio / "modelos" / f"{ticker}-{chave[:16]}.joblib",
+            }
+            try:
+                dobra["previsto"] = joblib.load(dobra["caminho"])["previsoes"]
+                dobra["cache"] = True
+            except (OSError, ValueError, KeyError, EOFError):
+                dobra["cache"] = False
+                pendentes.append((dobra, {
+                    "modelo": config["modelo"],
+                    "parametros": config["parametros"],
+                    "x_treino": matriz[inicio_treino:inicio_teste],
+                    "y_treino": valores[inicio_treino:inicio_teste],
+                    "x_teste": matriz[inicio_teste:fim_teste],
+                    "caminho": dobra["caminho"],
+                }))
+            dobras.append(dobra)
+
+    # Só as dobras sem modelo em cache são ajustadas
+    processos = processos or os.cpu_count() or 1
+    tarefas = [tarefa for _, tarefa in pendentes]
+    if processos == 1 or len(tarefas) <= 1:
+        resultados = [_ajustar_dobra(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(tarefas))) as executor:
+            resultados = list(executor.map(_ajustar_dobra, tarefas))
+    for (dobra, _), previsto in zip(pendentes, resultados):
+        dobra["previsto"] = previsto
+
+    return _resumir(dobras)
+
+
+def _resumir(dobras):
+    # Métricas por dobra: erros, acerto de direção e ganho sobre a previsão ingênua (retorno 0)
+    linhas, previsoes = [], []
+    for dobra in dobras:
+        real, previsto = dobra["real"], dobra["previsto"]
+        erro = previsto - real
+        mae_ingenuo = np.abs(real).mean()
+        linhas.append({
+            particoes.COLUNA_TICKER: dobra["ticker"],
+            "dobra": dobra["dobra"],
+            "inicio_teste": dobra["datas"][0],
+            "fim_teste": dobra["datas"][-1],
+            "pregoes_treino": dobra["treino"],
+            "pregoes_teste": len(real),
+            "mae": np.abs(erro).mean(),
+            "rmse": np.sqrt((erro ** 2).mean()),
+            "acerto_direcao": (np.sign(previsto) == np.sign(real)).mean(),
+            "ganho_mae": 1 - np.abs(erro).mean() / mae_ingenuo if mae_ingenuo > 0 else np.nan,
+            "cache": dobra["cache"],
+        })
+        previsoes.append(pd.DataFrame({
+            particoes.COLUNA_TICKER: dobra["ticker"],
+            carregamento.COLUNA_DATA: dobra["datas"],
+            "dobra": dobra["dobra"],
+            "real": real,
+            "previsto": previsto,
+        }))
+    resumo = pd.DataFrame(linhas)
+    previsoes = pd.concat(previsoes, ignore_index=True) if previsoes else pd.DataFrame()
+    return resumo, previsoes
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Avaliação walk-forward de modelos de previsão.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO),
+                        help="CSV processado do ticker padrão.")
+    parser.add_argument("--tickers", nargs="*", default=None,
+                        help="Tickers lidos do conjunto particionado, em vez do CSV processado.")
+    parser.add_argument("--modelo", choices=MODELOS, default=CONFIG_PADRAO["modelo"], help="Modelo de base.")
+    parser.add_argument("--parametros", default="{}", help="Parâmetros do modelo, em JSON.")
+    parser.add_argument("--defasagens", type=int, default=CONFIG_PADRAO["defasagens"], help="Retornos defasados.")
+    parser.add_argument("--janelas", type=int, nargs="*", default=CONFIG_PADRAO["janelas"],
+                        help="Janelas da média e do desvio móveis.")
+    parser.add_argument("--treino-minimo", type=int, default=CONFIG_PADRAO["treino_minimo"],
+                        help="Pregões de treino da primeira dobra.")
+    parser.add_argument("--tamanho-teste", type=int, default=CONFIG_PADRAO["tamanho_teste"],
+                        help="Pregões de teste por dobra.")
+    parser.add_argument("--janela-treino", type=int, default=None, help="Treino em janela deslizante (opcional).")
+    parser.add_argument("--processos", type=int, default=None, help="Quantidade de processos (padrão: um por núcleo).")
+    args = parser.parse_args(argumentos)
+
+    if args.tickers is not None:
+        dados_por_ticker = multiplos_tickers.carregar_tickers(args.tickers or None)
+    else:
+        # O armazém mapeado em memória evita copiar o OHLCV para montar os atributos
+        dados_por_ticker = {particoes.TICKER_PADRAO: armazenamento.abrir_armazem(args.processado).visao()}
+    if not dados_por_ticker:
+        print("⚠️ Nenhum ticker encontrado")
+        return
+
+    config = configuracao(
+        modelo=args.modelo, parametros=json.loads(args.parametros), defasagens=args.defasagens,
+        janelas=list(args.janelas), treino_minimo=args.treino_minimo, tamanho_teste=args.tamanho_teste,
+        janela_treino=args.janela_treino,
+    )
+    resumo, _ = avaliar(dados_por_ticker, config, args.processos)
+    if resumo.empty:
+        print("⚠️ Histórico insuficiente para formar uma dobra")
+        return
+
+    print(f"✅ {len(resumo)} dobras avaliadas ({int((~resumo['cache']).sum())} ajustadas, "
+          f"{int(resumo['cache'].sum())} do cache)")
+    print(resumo.to_string(index=False))
+    media = resumo.groupby(particoes.COLUNA_TICKER)[["mae", "rmse", "acerto_direcao", "ganho_mae"]].mean()
+    print("\nMédia das dobras:")
+    print(media.to_string())
+
+
+if __name__ == "__main__":
+    main()
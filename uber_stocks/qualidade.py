@@ -0,0 +1,215 @@
+"""
+Verificações de qualidade dos dados calculadas sobre o DataFrame inteiro.
+
+Substitui os laços coluna a coluna das funções do notebook `data_cleaning.ipynb`
+(`verificar_valores_ausentes`, `verificar_valores_duplicados`,
+`verificar_colunas_numericas`, `verificar_tipo_dados` e `valores_max_min`) por operações
+vetorizadas sobre matrizes NumPy: uma única ordenação por bloco de colunas responde a
+todos os duplicados, e uma única máscara 2-D localiza todas as inconsistências numéricas.
+O relatório tem as mesmas chaves do relatório de `uber_stocks.limpeza`.
+"""
+import numpy as np
+import pandas as pd
+
+
+SENTINELA_AUSENTE = np.iinfo("int64").max
+
+
+def _codificar_coluna(serie):
+    # Retorna o array ordenável da coluna, a máscara de ausentes e a função que decodifica valores
+    if pd.api.types.is_float_dtype(serie.dtype):
+        valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+        return valores, np.isnan(valores), lambda codigos: codigos.tolist()
+    if pd.api.types.is_integer_dtype(serie.dtype) and not serie.hasnans:
+        return serie.to_numpy(dtype="int64"), np.zeros(len(serie), dtype=bool), lambda codigos: codigos.tolist()
+
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        ausentes = serie.isnull().to_numpy()
+        valores = serie.to_numpy(dtype="datetime64[ns]").view("int64").copy()
+        decodificar = lambda codigos: [pd.Timestamp(np.int64(codigo)) for codigo in codigos]
+    else:
+        # Texto e tipos mistos: códigos de fatoração
+        codigos, categorias = pd.factorize(serie, use_na_sentinel=True)
+        ausentes = codigos == -1
+        valores = codigos.astype("int64")
+        decodificar = lambda codigos: categorias.take(codigos).tolist()
+
+    # Ausentes recebem o maior inteiro, para ficarem no fim da ordenação como o NaN
+    valores[ausentes] = SENTINELA_AUSENTE
+    return valores, ausentes, decodificar
+
+
+def verificar_duplicados(df, colunas=None):
+    """
+    Verifica valores duplicados em cada coluna com uma única ordenação por bloco de colunas.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser analisado.
+    - colunas (list, opcional): Colunas a verificar. Se None, verifica todas.
+
+    Retorna:
+    - dict: Para cada coluna, 'possui_duplicados', 'quantidade_duplicados' e
+      'valores_e_contagem' (valores repetidos e suas ocorrências), como no notebook.
+    """
+    if colunas is None:
+        colunas = list(df.columns)
+    n = len(df)
+
+    # Colunas agrupadas em blocos 2-D homogêneos: reais e inteiros
+    blocos = {"f": [], "i": []}
+    for coluna in colunas:
+        valores, ausentes, decodificar = _codificar_coluna(df[coluna])
+        blocos[valores.dtype.kind].append((coluna, valores, ausentes, decodificar))
+
+    resultado = {}
+    for membros in blocos.values():
+        if not membros:
+            continue
+        nomes, arrays, mascaras, decodificadores = zip(*membros)
+
+        # Uma linha por coluna, para ordenar e comparar sobre memória contígua;
+        # a ordenação do bloco é feita de uma vez e os ausentes ficam no fim de cada linha
+        ordenada = np.sort(np.vstack(arrays), axis=1)
+        qtd_ausentes = np.count_nonzero(np.vstack(mascaras), axis=1)
+        validos = np.arange(1, n)[None, :] < (n - qtd_ausentes)[:, None]
+        repetidos = np.count_nonzero((ordenada[:, 1:] == ordenada[:, :-1]) & validos, axis=1)
+
+        for j, coluna in enumerate(nomes):
+            # Como em `duplicated`, ausentes repetidos também contam como duplicados
+            quantidade = int(repetidos[j]) + max(int(qtd_ausentes[j]) - 1, 0)
+
+            contagem = {}
+            if repetidos[j] > 0:
+                coluna_ordenada = ordenada[j, :n - qtd_ausentes[j]]
+                inicio = np.flatnonzero(np.r_[True, coluna_ordenada[1:] != coluna_ordenada[:-1]])
+                tamanhos = np.diff(np.r_[inicio, len(coluna_ordenada)])
+                mais_de_um = tamanhos > 1
+                ordem = np.argsort(-tamanhos[mais_de_um], kind="stable")
+                valores = decodificadores[j](coluna_ordenada[inicio[mais_de_um]][ordem])
+                contagem = dict(zip(valores, tamanhos[mais_de_um][ordem].tolist()))
+
+            resultado[coluna] = {
+                'possui_duplicados': quantidade > 0,
+                'quantidade_duplicados': quantidade,
+                'valores_e_contagem': contagem,
+            }
+
+    return {coluna: resultado[coluna] for coluna in colunas}
+
+
+def verificar_numericos(df, colunas):
+    """
+    Verifica se as colunas contêm apenas números, com uma única máscara 2-D de inconsistências.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado.
+    - colunas (list): Colunas a serem verificadas.
+
+    Retorna:
+    - dict: Nome da coluna e um booleano indicando se contém apenas números.
+    - pandas.DataFrame: Inconsistências encontradas ('Coluna', 'Posição', 'Valor').
+    """
+    existentes = [coluna for coluna in colunas if coluna in df.columns]
+    for coluna in colunas:
+        if coluna not in df.columns:
+            print(f"⚠️ Coluna '{coluna}' não encontrada no DataFrame.")
+
+    # Colunas já numéricas só falham onde há ausentes; as demais passam por `to_numeric`
+    mascaras = []
+    for coluna in existentes:
+        serie = df[coluna]
+        if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+            mascaras.append(serie.isnull().to_numpy())
+        else:
+            mascaras.append(pd.to_numeric(serie, errors="coerce").isnull().to_numpy())
+    # Máscara com uma linha por coluna: `nonzero` já lista as inconsistências coluna a coluna
+    mascara = np.vstack(mascaras) if mascaras else np.zeros((0, len(df)), dtype=bool)
+
+    resultado = {coluna: False for coluna in colunas}
+    resultado.update(zip(existentes, (~mascara.any(axis=1)).tolist()))
+
+    indices_colunas, linhas = np.nonzero(mascara)
+    fronteiras = np.searchsorted(indices_colunas, np.arange(len(existentes) + 1))
+    valores = [
+        df[coluna].to_numpy()[linhas[fronteiras[j]:fronteiras[j + 1]]]
+        for j, coluna in enumerate(existentes)
+    ]
+    df_inconsistencias = pd.DataFrame({
+        'Coluna': np.asarray(existentes, dtype=object)[indices_colunas],
+        'Posição': df.index.to_numpy()[linhas],
+        'Valor': np.concatenate([v.astype(object) for v in valores]) if valores else [],
+    }).infer_objects()
+
+    return resultado, df_inconsistencias
+
+
+def verificar_ausentes(df):
+    """
+    Calcula a quantidade e o percentual de valores ausentes de todas as colunas de uma vez.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado.
+
+    Retorna:
+    - pandas.DataFrame: Colunas com ausentes, ordenadas pelo percentual em ordem decrescente.
+    """
+    valores_ausentes = pd.Series(
+        np.count_nonzero(df.isnull().to_numpy(), axis=0), index=df.columns, dtype="int64"
+    )
+    tabela_ausentes = pd.DataFrame({
+        'Quantidade de Valores Ausentes': valores_ausentes,
+        'Percentual de Valores Ausentes (%)': (valores_ausentes / max(df.shape[0], 1)) * 100
+    })
+    tabela_ausentes = tabela_ausentes[tabela_ausentes['Quantidade de Valores Ausentes'] > 0]
+    return tabela_ausentes.sort_values(by='Percentual de Valores Ausentes (%)', ascending=False)
+
+
+def valores_max_min(df):
+    """
+    Calcula os valores máximos e mínimos de todas as colunas numéricas de uma vez.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser analisado.
+
+    Retorna:
+    - pandas.DataFrame: Tabela com 'Coluna', 'Valor Mínimo' e 'Valor Máximo'.
+    """
+    # As reduções do pandas operam por bloco de colunas de mesmo tipo
+    numericas = df.select_dtypes(include=['int64', 'float64'])
+    return pd.DataFrame({
+        'Coluna': list(numericas.columns),
+        'Valor Mínimo': numericas.min().tolist(),
+        'Valor Máximo': numericas.max().tolist(),
+    })
+
+
+def verificar_qualidade(df, colunas_numericas=None, colunas_duplicados=None):
+    """
+    Executa todas as verificações de qualidade e devolve um único relatório estruturado.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado.
+    - colunas_numericas (list, opcional): Colunas que devem ser numéricas. Se None, usa as
+      colunas de tipo numérico e as de texto (que podem conter números gravados como texto).
+    - colunas_duplicados (list, opcional): Colunas verificadas quanto a duplicados. Se None, todas.
+
+    Retorna:
+    - dict: Relatório com 'tamanho', 'ausentes', 'duplicados', 'colunas_numericas',
+      'inconsistencias', 'tipos' e 'max_min'.
+    """
+    if colunas_numericas is None:
+        colunas_numericas = [
+            coluna for coluna in df.columns if not pd.api.types.is_datetime64_any_dtype(df[coluna].dtype)
+        ]
+
+    resultado_numerico, df_inconsistencias = verificar_numericos(df, colunas_numericas)
+
+    return {
+        'tamanho': {'Número de Linhas': df.shape[0], 'Número de Colunas': df.shape[1]},
+        'ausentes': verificar_ausentes(df),
+        'duplicados': verificar_duplicados(df, colunas_duplicados),
+        'colunas_numericas': resultado_numerico,
+        'inconsistencias': df_inconsistencias,
+        'tipos': pd.DataFrame({'Coluna': df.dtypes.index, 'Tipo de Dado': df.dtypes.values}),
+        'max_min': valores_max_min(df),
+    }
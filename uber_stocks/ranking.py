@@ -0,0 +1,375 @@
+"""
+Ranking persistente dos dias de maior variação (top-K por métrica e por ano).
+
+Em vez de ordenar todo o histórico para obter cinco linhas (`nlargest` em
+`pagina_volatilidade` e `ORDER BY ... LIMIT 5` em `dias_maior_variacao.sql`), cada métrica
+mantém um heap mínimo de tamanho K por ano. Os heaps são atualizados na ingestão com as
+linhas novas e respondem a consultas top-k, com filtro de período, lendo no máximo K linhas
+por ano. O ranking também pode ser exportado como tabela para a camada SQL.
+
+Uso:
+    python -m uber_stocks.ranking --banco data/uber_stocks.db
+"""
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento
+
+K_PADRAO = 50
+VERSAO_ESTADO = 1
+TABELA_SQL = "ranking_dias"
+
+# Métricas ranqueadas e suas descrições
+METRICAS = {
+    "amplitude": "Amplitude diária (High - Low)",
+    "variacao_abertura_fechamento": "Variação absoluta entre abertura e fechamento (|Close - Open|)",
+    "variacao_percentual": "Variação percentual absoluta do fechamento em relação ao pregão anterior",
+}
+
+
+def calcular_metricas(dados, close_anterior=None):
+    """
+    Calcula as métricas ranqueadas de cada linha.
+
+    Parâmetros:
+    - dados (pandas.DataFrame): Linhas com Open, High, Low e Close, em ordem cronológica.
+    - close_anterior (float, opcional): Fechamento do pregão anterior à primeira linha.
+
+    Retorna:
+    - dict: Nome da métrica e array com o valor de cada linha.
+    """
+    fechamento = np.asarray(dados["Close"], dtype="float64")
+    anteriores = np.r_[np.nan if close_anterior is None else close_anterior, fechamento[:-1]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentual = np.abs(fechamento / anteriores - 1) * 100
+    return {
+        "amplitude": np.asarray(dados["High"], dtype="float64") - np.asarray(dados["Low"], dtype="float64"),
+        "variacao_abertura_fechamento": np.abs(fechamento - np.asarray(dados["Open"], dtype="float64")),
+        "variacao_percentual": percentual,
+    }
+
+
+class RankingDias:
+    """
+    Heaps mínimos de tamanho K por métrica e por ano.
+
+    Cada heap guarda os K maiores valores do ano como pares (valor, data ISO); o menor deles
+    fica na raiz e é o único comparado com cada linha nova.
+
+    Parâmetros:
+    - k (int): Quantidade de dias guardados por métrica e por ano.
+    """
+
+    def __init__(self, k=K_PADRAO):
+        self.k = int(k)
+        self.heaps = {metrica: {} for metrica in METRICAS}
+        self.linhas = 0
+        self.ultima_data = None
+        self.ultimo_close = None
+
+    def atualizar(self, dados, coluna_data=carregamento.COLUNA_DATA):
+        """
+        Incorpora linhas novas, posteriores à última data já ranqueada.
+
+        Parâmetros:
+        - dados (pandas.DataFrame): Linhas novas com Date, Open, High, Low e Close.
+        - coluna_data (str): Coluna de datas.
+
+        Retorna:
+        - int: Quantidade de linhas incorporadas.
+        """
+        datas = pd.to_datetime(pd.Series(np.asarray(dados[coluna_data])))
+        novas = np.ones(len(datas), dtype=bool) if self.ultima_data is None else (datas > self.ultima_data).to_numpy()
+        if not novas.any():
+            return 0
+        datas = datas[novas]
+        linhas = {coluna: np.asarray(dados[coluna])[novas] for coluna in ("Open", "High", "Low", "Close")}
+        metricas = calcular_metricas(linhas, self.ultimo_close)
+        anos = datas.dt.year.to_numpy()
+        datas_iso = datas.dt.strftime("%Y-%m-%d").to_numpy()
+
+        for metrica, valores in metricas.items():
+            heaps = self.heaps[metrica]
+            validos = ~np.isnan(valores)
+            for valor, ano, data in zip(valores[validos].tolist(), anos[validos].tolist(), datas_iso[validos]):
+                heap = heaps.setdefault(str(ano), [])
+                if len(heap) < self.k:
+                    heapq.heappush(heap, (valor, data))
+                elif valor > heap[0][0]:
+                    heapq.heapreplace(heap, (valor, data))
+
+        self.linhas += int(novas.sum())
+        self.ultima_data = datas.iloc[-1]
+        self.ultimo_close = float(linhas["Close"][-1])
+        return int(novas.sum())
+
+    def _anos(self, metrica, inicio, fim):
+        # Anos com heap e, para cada um, se o período cobre o ano inteiro
+        ano_inicio = None if inicio is None else pd.Timestamp(inicio).year
+        ano_fim = None if fim is None else pd.Timestamp(fim).year
+        for ano in sorted(self.heaps[metrica], key=int):
+            numero = int(ano)
+            if (ano_inicio is not None and numero < ano_inicio) or (ano_fim is not None and numero > ano_fim):
+                continue
+            inteiro = (inicio is None or pd.Timestamp(inicio) <= pd.Timestamp(numero, 1, 1)) and \
+                      (fim is None or pd.Timestamp(fim) >= pd.Timestamp(numero, 12, 31))
+            yield ano, inteiro
+
+    def consultar(self, metrica, k=5, inicio=None, fim=None):
+        """
+        Retorna os k dias de maior valor da métrica no período, a partir dos heaps.
+
+        O resultado é exato quando k <= K e, para cada ano coberto só em parte pelo período,
+        o heap do ano contém todas as linhas ou o k-ésimo valor encontrado não é menor que o
+        menor valor guardado no heap (tudo o que ficou de fora do heap é menor ou igual a ele).
+
+        Parâmetros:
+        - metrica (str): Uma das chaves de `METRICAS`.
+        - k (int): Quantidade de dias.
+        - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+        - fim (str | Timestamp, opcional): Data final (inclusiva).
+
+        Retorna:
+        - pandas.DataFrame: Colunas 'Date' e 'Valor', em ordem decrescente de valor.
+        - bool: Se o resultado é comprovadamente exato.
+        """
+        if metrica not in METRICAS:
+            raise ValueError(f"Métrica inválida: '{metrica}'. Use uma de {list(METRICAS)}.")
+        inicio_iso = None if inicio is None else pd.Timestamp(inicio).strftime("%Y-%m-%d")
+        fim_iso = None if fim is None else pd.Timestamp(fim).strftime("%Y-%m-%d")
+
+        candidatos, limites_parciais = [], []
+        for ano, inteiro in self._anos(metrica, inicio, fim):
+            heap = self.heaps[metrica][ano]
+            candidatos.extend(
+                (valor, data) for valor, data in heap
+                if (inicio_iso is None or data >= inicio_iso) and (fim_iso is None or data <= fim_iso)
+            )
+            if not inteiro and len(heap) >= self.k:
+                limites_parciais.append(heap[0][0])
+
+        melhores = heapq.nlargest(k, candidatos)
+        exato = k <= self.k and (
+            not limites_parciais or (len(melhores) == k and melhores[-1][0] >= max(limites_parciais))
+        )
+        resultado = pd.DataFrame({
+            'Date': pd.to_datetime([data for _, data in melhores]),
+            'Valor': [valor for valor, _ in melhores],
+        })
+        return resultado, exato
+
+    def para_tabela(self):
+        """
+        Achata os heaps numa tabela, com a posição de cada dia no ranking do seu ano.
+
+        Retorna:
+        - pandas.DataFrame: Colunas 'metrica', 'ano', 'posicao', 'date' e 'valor'.
+        """
+        linhas = []
+        for metrica, heaps in self.heaps.items():
+            for ano, heap in heaps.items():
+                for posicao, (valor, data) in enumerate(sorted(heap, reverse=True), start=1):
+                    linhas.append({'metrica': metrica, 'ano': int(ano), 'posicao': posicao, 'date': data, 'valor': valor})
+        return pd.DataFrame(linhas, columns=['metrica', 'ano', 'posicao', 'date', 'valor'])
+
+    def para_dict(self):
+        return {
+            "versao": VERSAO_ESTADO,
+            "k": self.k,
+            "linhas": self.linhas,
+            "ultima_data": None if self.ultima_data is None else self.ultima_data.isoformat(),
+            "ultimo_close": self.ultimo_close,
+            "heaps": {metrica: {ano: [list(item) for item in heap] for ano, heap in heaps.items()}
+                      for metrica, heaps in self.heaps.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, estado):
+        ranking = cls(estado["k"])
+        ranking.linhas = estado["linhas"]
+        ranking.ultima_data = None if estado["ultima_data"] is None else pd.Timestamp(estado["ultima_data"])
+        ranking.ultimo_close = estado["ultimo_close"]
+        for metrica in METRICAS:
+            ranking.heaps[metrica] = {
+                ano: [tuple(item) for item in heap] for ano, heap in estado["heaps"].get(metrica, {}).items()
+            }
+        return ranking
+
+
+def caminho_estado(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho do ranking salvo ao lado do CSV processado.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo JSON com os heaps.
+    """
+    caminho_processado = Path(caminho_processado)
+    return caminho_processado.with_name(caminho_processado.stem + ".ranking.json")
+
+
+def ler_ranking(caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Lê o ranking salvo.
+
+    Parâmetros:
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - RankingDias | None: Ranking salvo, ou None se não existe ou é de outra versão.
+    """
+    try:
+        with open(caminho_estado(caminho_processado), encoding="utf-8") as arquivo:
+            estado = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return RankingDias.de_dict(estado) if estado.get("versao") == VERSAO_ESTADO else None
+
+
+def salvar_ranking(ranking, caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Grava o ranking com troca atômica do arquivo.
+
+    Parâmetros:
+    - ranking (RankingDias): Ranking a ser salvo.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    """
+    destino = caminho_estado(caminho_processado)
+    temporario = destino.with_name(destino.name + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(ranking.para_dict(), arquivo)
+    os.replace(temporario, destino)
+
+
+def sincronizar_ranking(dados, caminho_processado=carregamento.CAMINHO_PROCESSADO, k=K_PADRAO,
+                        coluna_data=carregamento.COLUNA_DATA):
+    """
+    Atualiza o ranking salvo com as linhas posteriores à última data ranqueada.
+
+    O ranking é refeito do zero se ainda não existe ou se o total de linhas não bate com o
+    histórico (por exemplo, quando o CSV processado foi regravado).
+
+    Parâmetros:
+    - dados (pandas.DataFrame | VisaoOHLCV): Histórico completo, em ordem cronológica.
+    - caminho_processado (str | Path): CSV processado ao lado do qual o ranking é salvo.
+    - k (int): Dias guardados por métrica e por ano, se o ranking precisar ser criado.
+    - coluna_data (str): Coluna de datas.
+
+    Retorna:
+    - RankingDias: Ranking atualizado.
+    """
+    ranking = ler_ranking(caminho_processado)
+    datas = np.asarray(dados[coluna_data])
+    if ranking is not None and ranking.ultima_data is not None:
+        # Linhas até a última data ranqueada devem ser exatamente as já incorporadas
+        ja_vistas = int(np.searchsorted(datas, np.datetime64(ranking.ultima_data), side="right"))
+        if ja_vistas != ranking.linhas:
+            ranking = None
+    if ranking is None:
+        ranking = RankingDias(k)
+
+    colunas = {coluna: np.asarray(dados[coluna]) for coluna in (coluna_data, "Open", "High", "Low", "Close")}
+    if ranking.atualizar(colunas, coluna_data) or not caminho_estado(caminho_processado).exists():
+        try:
+            salvar_ranking(ranking, caminho_processado)
+        except OSError:
+            # Sem permissão de escrita o ranking continua disponível, apenas sem ser salvo
+            pass
+    return ranking
+
+
+def top_dias(metrica, k=5, inicio=None, fim=None, caminho_processado=carregamento.CAMINHO_PROCESSADO, dados=None):
+    """
+    Retorna os k dias de maior valor da métrica, recorrendo aos dados só quando os heaps não bastam.
+
+    Parâmetros:
+    - metrica (str): Uma das chaves de `METRICAS`.
+    - k (int): Quantidade de dias.
+    - inicio (str | Timestamp, opcional): Data inicial (inclusiva).
+    - fim (str | Timestamp, opcional): Data final (inclusiva).
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    - dados (pandas.DataFrame | VisaoOHLCV, opcional): Histórico completo; se None, é carregado quando necessário.
+
+    Retorna:
+    - pandas.DataFrame: Colunas 'Date' e 'Valor', em ordem decrescente de valor.
+    """
+    if dados is None:
+        ranking = ler_ranking(caminho_processado)
+        if ranking is None:
+            dados = carregamento.carregar_dados(caminho_processado)
+    if dados is not None:
+        ranking = sincronizar_ranking(dados, caminho_processado)
+
+    resultado, exato = ranking.consultar(metrica, k, inicio, fim)
+    if exato:
+        return resultado
+
+    # Período que corta um ano cujo heap não garante o resultado: varredura do intervalo
+    if dados is None:
+        dados = carregamento.carregar_dados(caminho_processado)
+    datas = pd.to_datetime(pd.Series(np.asarray(dados[carregamento.COLUNA_DATA])))
+    valores = pd.Series(calcular_metricas({c: np.asarray(dados[c]) for c in ("Open", "High", "Low", "Close")})[metrica])
+    filtro = pd.Series(True, index=datas.index)
+    if inicio is not None:
+        filtro &= datas >= pd.Timestamp(inicio)
+    if fim is not None:
+        filtro &= datas <= pd.Timestamp(fim)
+    maiores = valores[filtro].nlargest(k)
+    return pd.DataFrame({'Date': datas[maiores.index].to_numpy(), 'Valor': maiores.to_numpy()})
+
+
+def exportar_sqlite(caminho_banco, caminho_processado=carregamento.CAMINHO_PROCESSADO, tabela=TABELA_SQL,
+                    ranking=None):
+    """
+    Grava o ranking como tabela SQLite, para consultas como `sql/advanced_queries/ranking_dias.sql`.
+
+    Parâmetros:
+    - caminho_banco (str | Path): Caminho do banco SQLite.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+    - tabela (str): Nome da tabela de destino (substituída a cada exportação).
+    - ranking (RankingDias, opcional): Ranking exportado. Se None, o ranking salvo é antes
+      sincronizado com o CSV processado.
+
+    Retorna:
+    - int: Quantidade de linhas exportadas.
+    """
+    if ranking is None:
+        ranking = sincronizar_ranking(carregamento.carregar_dados(caminho_processado), caminho_processado)
+    tabela_ranking = ranking.para_tabela()
+
+    # closing fecha a conexão; o `with conexao` só confirma a transação
+    with closing(sqlite3.connect(caminho_banco)) as conexao, conexao:
+        tabela_ranking.to_sql(tabela, conexao, if_exists="replace", index=False)
+        conexao.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_metrica ON {tabela}(metrica, valor DESC)")
+    return len(tabela_ranking)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Ranking dos dias de maior variação.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--metrica", default="amplitude", choices=list(METRICAS), help="Métrica do ranking.")
+    parser.add_argument("-k", type=int, default=5, help="Quantidade de dias.")
+    parser.add_argument("--inicio", help="Data inicial (AAAA-MM-DD).")
+    parser.add_argument("--fim", help="Data final (AAAA-MM-DD).")
+    parser.add_argument("--banco", help="Banco SQLite para exportar a tabela do ranking.")
+    args = parser.parse_args(argumentos)
+
+    print(f"✅ Top {args.k} - {METRICAS[args.metrica]}")
+    print(top_dias(args.metrica, args.k, args.inicio, args.fim, args.processado).to_string(index=False))
+    if args.banco:
+        linhas = exportar_sqlite(args.banco, args.processado)
+        print(f"✅ {linhas} linhas exportadas para a tabela '{TABELA_SQL}' em '{args.banco}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Simulação de Monte Carlo e bootstrap em blocos dos retornos, com memória limitada.
+
+Complementa as estatísticas descritivas de `analisar_volatilidade_diaria` com medidas de
+risco: caminhos de preço são sorteados a partir dos retornos logarítmicos diários históricos,
+
+- parametrico: retornos normais com a média e o desvio históricos;
+- bootstrap: blocos consecutivos de retornos históricos (preservam a dependência de curto
+  prazo, como aglomerados de volatilidade), com início sorteado e volta circular.
+
+Os caminhos são gerados em lotes de tamanho fixo, e cada lote é reduzido ao seu retorno
+final antes do próximo: só os acumuladores (`estatisticas.AcumuladorEstatisticas`, com
+t-digest) atravessam os lotes, então a memória não cresce com a quantidade de caminhos. Os
+lotes rodam em paralelo num `ProcessPoolExecutor`, cada um com um fluxo de números
+aleatórios independente (`SeedSequence.spawn`): o resultado depende só da semente, e não da
+quantidade de processos.
+
+Uso:
+    python -m uber_stocks.simulacao --caminhos 1000000 --horizonte 252 --metodo bootstrap
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from uber_stocks import carregamento, estatisticas
+
+METODOS = ("parametrico", "bootstrap")
+COLUNA_PRECO = "Adj Close"
+CAMINHOS_POR_LOTE = 10_000
+HORIZONTE_PADRAO = 252
+BLOCO_PADRAO = 20
+NIVEIS_CONFIANCA = (0.95, 0.99)
+QUANTIS_PRECO = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+# Caudas mais finas que o padrão das páginas: VaR e CVaR ficam nos extremos da distribuição
+COMPRESSAO = 1_000
+
+# Estado de cada processo da simulação, preenchido uma vez por `_iniciar_processo`
+_ESTADO = {}
+
+
+def retornos_logaritmicos(precos):
+    """
+    Retornos logarítmicos diários, ignorando pregões sem preço.
+
+    Parâmetros:
+    - precos (array-like): Preços em ordem cronológica.
+
+    Retorna:
+    - numpy.ndarray: Retornos log(p[t] / p[t-1]) válidos.
+    """
+    precos = np.asarray(precos, dtype="float64")
+    precos = precos[~np.isnan(precos) & (precos > 0)]
+    return np.diff(np.log(precos))
+
+
+def gerar_lote(rng, retornos, caminhos, horizonte, metodo="bootstrap", bloco=BLOCO_PADRAO):
+    """
+    Sorteia um lote de caminhos de retornos logarítmicos diários.
+
+    Parâmetros:
+    - rng (numpy.random.Generator): Gerador do lote.
+    - retornos (numpy.ndarray): Retornos logarítmicos históricos.
+    - caminhos (int): Quantidade de caminhos do lote.
+    - horizonte (int): Pregões de cada caminho.
+    - metodo (str): 'parametrico' ou 'bootstrap'.
+    - bloco (int): Tamanho dos blocos do bootstrap.
+
+    Retorna:
+    - numpy.ndarray: Matriz (caminhos x horizonte).
+    """
+    if metodo == "parametrico":
+        return rng.normal(retornos.mean(), retornos.std(ddof=1), (caminhos, horizonte))
+
+    # Blocos de `bloco` pregões seguidos, com início sorteado; o fim da série volta ao começo
+    blocos = -(-horizonte // bloco)
+    inicios = rng.integers(0, len(retornos), (caminhos, blocos, 1))
+    posicoes = (inicios + np.arange(bloco)).reshape(caminhos, blocos * bloco)[:, :horizonte]
+    return retornos[posicoes % len(retornos)]
+
+
+def _iniciar_processo(retornos, horizonte, metodo, bloco):
+    _ESTADO.update(retornos=retornos, horizonte=horizonte, metodo=metodo, bloco=bloco)
+
+
+def _simular_lote(semente, caminhos):
+    # Cada lote reduz seus caminhos ao retorno final e devolve apenas o acumulador
+    rng = np.random.default_rng(semente)
+    log_retornos = gerar_lote(rng, _ESTADO["retornos"], caminhos, _ESTADO["horizonte"], _ESTADO["metodo"],
+                              _ESTADO["bloco"])
+    acumulador = estatisticas.AcumuladorEstatisticas(limiares=(0.0,), compressao=COMPRESSAO)
+    acumulador.atualizar(np.expm1(log_retornos.sum(axis=1)))
+    return acumulador
+
+
+def simular(retornos, caminhos, horizonte=HORIZONTE_PADRAO, metodo="bootstrap", bloco=BLOCO_PADRAO, semente=42,
+            processos=None, caminhos_por_lote=CAMINHOS_POR_LOTE):
+    """
+    Simula caminhos de preço em lotes e acumula a distribuição do retorno no horizonte.
+
+    Parâmetros:
+    - retornos (array-like): Retornos logarítmicos diários históricos.
+    - caminhos (int): Quantidade total de caminhos.
+    - horizonte (int): Pregões de cada caminho.
+    - metodo (str): 'parametrico' ou 'bootstrap'.
+    - bloco (int): Tamanho dos blocos do bootstrap.
+    - semente (int): Semente da qual derivam os fluxos independentes de cada lote.
+    - processos (int, opcional): Quantidade de processos. Se None, um por núcleo.
+    - caminhos_por_lote (int): Caminhos gerados de uma vez (limita a memória a ~lote x horizonte).
+
+    Retorna:
+    - estatisticas.AcumuladorEstatisticas: Distribuição do retorno simples no horizonte.
+
+    Lança:
+    - ValueError: Se o método for inválido ou não houver retornos históricos suficientes.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método inválido: '{metodo}'. Use um de {METODOS}.")
+    retornos = np.asarray(retornos, dtype="float64")
+    retornos = retornos[~np.isnan(retornos)]
+    if len(retornos) < 2:
+        raise ValueError("São necessários pelo menos dois retornos históricos.")
+    bloco = max(1, min(int(bloco), len(retornos)))
+
+    tamanhos = [caminhos_por_lote] * (caminhos // caminhos_por_lote)
+    if caminhos % caminhos_por_lote:
+        tamanhos.append(caminhos % caminhos_por_lote)
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    processos = processos or os.cpu_count() or 1
+
+    argumentos_inicio = (retornos, horizonte, metodo, bloco)
+    total = estatisticas.AcumuladorEstatisticas(limiares=(0.0,), compressao=COMPRESSAO)
+    if processos == 1 or len(tamanhos) == 1:
+        _iniciar_processo(*argumentos_inicio)
+        try:
+            for acumulador in map(_simular_lote, sementes, tamanhos):
+                total.mesclar(acumulador)
+        finally:
+            _ESTADO.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(tamanhos)), initializer=_iniciar_processo,
+                                 initargs=argumentos_inicio) as executor:
+            # Os acumuladores são mesclados na ordem dos lotes, à medida que ficam prontos
+            for acumulador in executor.map(_simular_lote, sementes, tamanhos):
+                total.mesclar(acumulador)
+    return total
+
+
+def medidas_risco(acumulador, preco_inicial, niveis=NIVEIS_CONFIANCA, quantis=QUANTIS_PRECO):
+    """
+    VaR, CVaR e quantis do preço final a partir da distribuição simulada.
+
+    VaR e CVaR são expressos como perda positiva, em fração do preço inicial.
+
+    Parâmetros:
+    - acumulador (estatisticas.AcumuladorEstatisticas): Resultado de `simular`.
+    - preco_inicial (float): Preço do último pregão.
+    - niveis (iterable): Níveis de confiança do VaR/CVaR.
+    - quantis (iterable): Quantis do preço final.
+
+    Retorna:
+    - dict: 'caminhos', 'retorno_medio', 'prob_perda', 'risco' (DataFrame por nível) e
+      'precos' (Series por quantil).
+    """
+    digest = acumulador.digest
+    risco = pd.DataFrame({
+        "VaR": [-float(digest.quantil(1 - nivel)) for nivel in niveis],
+        "CVaR": [-digest.media_cauda(1 - nivel) for nivel in niveis],
+    }, index=pd.Index(niveis, name="nivel"))
+    precos = pd.Series(preco_inicial * (1 + np.asarray(digest.quantil(list(quantis)))),
+                       index=pd.Index(quantis, name="quantil"), name="preco_final")
+    return {
+        "caminhos": acumulador.contagem,
+        "retorno_medio": acumulador.media,
+        "prob_perda": 1 - acumulador.acima(0.0) / acumulador.contagem if acumulador.contagem else np.nan,
+        "risco": risco,
+        "precos": precos,
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Simulação de Monte Carlo / bootstrap dos retornos.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--caminhos", type=int, default=1_000_000, help="Quantidade de caminhos.")
+    parser.add_argument("--horizonte", type=int, default=HORIZONTE_PADRAO, help="Pregões de cada caminho.")
+    parser.add_argument("--metodo", choices=METODOS, default="bootstrap", help="Forma de sortear os retornos.")
+    parser.add_argument("--bloco", type=int, default=BLOCO_PADRAO, help="Tamanho dos blocos do bootstrap.")
+    parser.add_argument("--semente", type=int, default=42, help="Semente da simulação.")
+    parser.add_argument("--processos", type=int, default=None, help="Quantidade de processos (padrão: um por núcleo).")
+    args = parser.parse_args(argumentos)
+
+    dados = carregamento.carregar_dados(args.processado)
+    precos = dados[COLUNA_PRECO].to_numpy(dtype="float64", na_value=np.nan)
+    preco_inicial = float(precos[~np.isnan(precos)][-1])
+
+    acumulador = simular(retornos_logaritmicos(precos), args.caminhos, args.horizonte, args.metodo, args.bloco,
+                         args.semente, args.processos)
+    resultado = medidas_risco(acumulador, preco_inicial)
+
+    print(f"✅ {resultado['caminhos']:,} caminhos de {args.horizonte} pregões ({args.metodo})")
+    print(f"Preço inicial: ${preco_inicial:.2f} | retorno médio: {resultado['retorno_medio']:.2%} | "
+          f"probabilidade de perda: {resultado['prob_perda']:.2%}")
+    print(resultado["risco"].to_string(float_format=lambda valor: f"{valor:.2%}"))
+    print(resultado["precos"].to_string(float_format=lambda valor: f"${valor:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Linhas de tendência para gráficos de dispersão com muitos pontos.
+
+`px.scatter(..., trendline="lowess")` chama o LOWESS do statsmodels, que ajusta uma
+regressão local em cada ponto (custo O(n²) para a fração padrão de 2/3) a cada renderização.
+Este módulo oferece três motores, todos sobre os pontos ordenados por x (ordenação em
+O(n log n)):
+
+- 'lowess': o mesmo algoritmo (pesos tricúbicos, janelas com os k vizinhos mais próximos e
+  iterações robustas com pesos bisquare), avaliado em cada valor distinto de x. Cada ajuste
+  percorre k vizinhos, então o custo é O(n·k): quadrático quando a fração (k/n) é fixa, por
+  isso o modo automático só o usa até `LIMITE_LOWESS` pontos.
+- 'lowess_rapido': o LOWESS avaliado só em pontos-âncora espaçados pelos quantis de x, com
+  cada janela amostrada em passos fixos; os demais pontos são interpolados entre as âncoras.
+  O custo dos ajustes não depende de n, e o total fica em O(n log n).
+- 'faixas': regressão por faixas de mesma quantidade de pontos, com a mediana (ou outro
+  quantil, ou a média) de y em cada faixa, em O(n log n).
+
+`calcular_tendencia` escolhe o motor pela quantidade de pontos e `obter_tendencia` guarda a
+curva por versão dos dados.
+
+Uso:
+    python -m uber_stocks.tendencia --x Volume --y Close
+"""
+import argparse
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+from uber_stocks import carregamento
+
+MOTORES = ("lowess", "lowess_rapido", "faixas")
+# Fração padrão da janela, a mesma do `trendline="lowess"` do plotly
+FRACAO_PADRAO = 2 / 3
+ITERACOES_PADRAO = 3
+# Até quantos pontos cada motor é escolhido automaticamente
+LIMITE_LOWESS = 2_000
+LIMITE_LOWESS_RAPIDO = 2_000_000
+PONTOS_ANCORA = 200
+AMOSTRA_JANELA = 10_000
+FAIXAS_PADRAO = 100
+# Âncoras ajustadas por vez: limita a matriz (âncoras x pontos da janela) em memória
+BLOCO_AJUSTE = 2 ** 22
+
+
+def escolher_motor(n):
+    """
+    Escolhe o motor de tendência pela quantidade de pontos.
+
+    Parâmetros:
+    - n (int): Quantidade de pontos.
+
+    Retorna:
+    - str: 'lowess', 'lowess_rapido' ou 'faixas'.
+    """
+    if n <= LIMITE_LOWESS:
+        return "lowess"
+    if n <= LIMITE_LOWESS_RAPIDO:
+        return "lowess_rapido"
+    return "faixas"
+
+
+def _ordenar(x, y):
+    # Pares sem valores ausentes, ordenados por x
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    if x.shape != y.shape:
+        raise ValueError("As séries devem ter o mesmo tamanho.")
+    validos = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[validos], y[validos]
+    ordem = np.argsort(x, kind="stable")
+    return x[ordem], y[ordem]
+
+
+def _inicio_janelas(xs, ancoras, k):
+    # Início da janela contígua com os k vizinhos mais próximos de cada âncora, por busca binária:
+    # avançar a janela compensa enquanto o ponto que sai está mais longe que o ponto que entra
+    inicio = np.zeros(len(ancoras), dtype="int64")
+    fim = np.full(len(ancoras), len(xs) - k, dtype="int64")
+    ativas = inicio < fim
+    while ativas.any():
+        meio = (inicio + fim) // 2
+        avancar = (ancoras - xs[meio]) > (xs[np.minimum(meio + k, len(xs) - 1)] - ancoras)
+        inicio = np.where(ativas & avancar, meio + 1, inicio)
+        fim = np.where(ativas & ~avancar, meio, fim)
+        ativas = inicio < fim
+    return inicio
+
+
+def _ajustar(xs, ys, pesos_robustos, ancoras, k, passo):
+    # Regressão linear local com pesos tricúbicos em cada âncora
+    inicio = _inicio_janelas(xs, ancoras, k)
+    raio = np.maximum(ancoras - xs[inicio], xs[inicio + k - 1] - ancoras)
+    # Com passo > 1, cada ponto amostrado fica no meio do trecho que representa
+    deslocamentos = np.arange(passo // 2, k, passo)
+
+    ajustados = np.empty(len(ancoras))
+    bloco = max(1, BLOCO_AJUSTE // len(deslocamentos))
+    for i in range(0, len(ancoras), bloco):
+        fatia = slice(i, i + bloco)
+        indices = inicio[fatia, None] + deslocamentos
+        # Distâncias centradas na âncora, o que evita cancelamento numérico nas somas
+        u = xs[indices] - ancoras[fatia, None]
+        r = raio[fatia, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distancia = np.where(r > 0, np.abs(u) / r, 0.0)
+        pesos = np.clip(1 - distancia ** 3, 0, 1) ** 3 * pesos_robustos[indices]
+
+        soma_pesos = pesos.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media_u = (pesos * u).sum(axis=1) / soma_pesos
+            media_y = (pesos * ys[indices]).sum(axis=1) / soma_pesos
+            variancia = (pesos * u * u).sum(axis=1) / soma_pesos - media_u ** 2
+            covariancia = (pesos * u * ys[indices]).sum(axis=1) / soma_pesos - media_u * media_y
+            inclinacao = np.where(variancia > 1e-12 * r[:, 0] ** 2, covariancia / variancia, 0.0)
+        ajuste = media_y - inclinacao * media_u
+        # Janela sem peso (todos os pontos descartados pela robustez): média simples
+        sem_peso = ~(soma_pesos > 0)
+        if sem_peso.any():
+            ajuste[sem_peso] = ys[indices[sem_peso]].mean(axis=1)
+        ajustados[fatia] = ajuste
+    return ajustados
+
+
+def lowess(x, y, frac=FRACAO_PADRAO, iteracoes=ITERACOES_PADRAO, pontos=None, amostra_janela=None):
+    """
+    Suavização LOWESS (regressão local ponderada e robusta).
+
+    Sem `pontos` e `amostra_janela` o ajuste é feito em cada valor distinto de x, com todos os
+    pontos da janela, como no LOWESS do statsmodels. Com eles, apenas as âncoras são
+    ajustadas e cada janela é percorrida em passos, o que torna o custo independente do
+    tamanho da janela; os valores entre âncoras são interpolados.
+
+    Parâmetros:
+    - x (array-like): Variável explicativa.
+    - y (array-like): Variável resposta.
+    - frac (float): Fração dos pontos em cada janela.
+    - iteracoes (int): Iterações robustas após o primeiro ajuste.
+    - pontos (int, opcional): Quantidade de âncoras. Se None, todos os valores distintos de x.
+    - amostra_janela (int, opcional): Máximo de pontos usados por janela. Se None, todos.
+
+    Retorna:
+    - numpy.ndarray: Valores de x da curva, em ordem crescente.
+    - numpy.ndarray: Valores ajustados da curva.
+    """
+    xs, ys = _ordenar(x, y)
+    n = len(xs)
+    if n == 0:
+        return np.empty(0), np.empty(0)
+    k = min(n, max(2, int(frac * n + 1e-10)))
+    passo = 1 if amostra_janela is None else max(1, -(-k // amostra_janela))
+
+    distintos = np.unique(xs)
+    if pontos is None or pontos >= len(distintos):
+        ancoras = distintos
+    else:
+        # Metade das âncoras nos quantis de x, onde há mais pontos, e metade espaçada
+        # igualmente em x, para acompanhar as caudas esparsas
+        ancoras = np.unique(np.r_[
+            xs[np.linspace(0, n - 1, pontos - pontos // 2).round().astype("int64")],
+            np.linspace(xs[0], xs[-1], pontos // 2),
+        ])
+
+    pesos_robustos = np.ones(n)
+    for iteracao in range(iteracoes + 1):
+        curva = _ajustar(xs, ys, pesos_robustos, ancoras, k, passo)
+        if iteracao == iteracoes:
+            break
+        residuos = ys - np.interp(xs, ancoras, curva)
+        escala = np.median(np.abs(residuos))
+        if escala <= 0:
+            break
+        # Pesos bisquare: pontos com resíduo acima de 6 medianas absolutas deixam de contar
+        pesos_robustos = np.clip(1 - (residuos / (6 * escala)) ** 2, 0, 1) ** 2
+    return ancoras, curva
+
+
+def tendencia_faixas(x, y, faixas=FAIXAS_PADRAO, quantil=0.5):
+    """
+    Regressão por faixas de x com a mesma quantidade de pontos.
+
+    Parâmetros:
+    - x (array-like): Variável explicativa.
+    - y (array-like): Variável resposta.
+    - faixas (int): Quantidade de faixas.
+    - quantil (float | None): Quantil de y em cada faixa (0.5 = mediana). Se None, a média.
+
+    Retorna:
+    - numpy.ndarray: Mediana de x em cada faixa, em ordem crescente.
+    - numpy.ndarray: Quantil (ou média) de y em cada faixa.
+    """
+    xs, ys = _ordenar(x, y)
+    n = len(xs)
+    if n == 0:
+        return np.empty(0), np.empty(0)
+    limites = np.unique(np.linspace(0, n, min(faixas, n) + 1).round().astype("int64"))
+    inicios, tamanhos = limites[:-1], np.diff(limites)
+    centros_x = (xs[inicios + (tamanhos - 1) // 2] + xs[inicios + tamanhos // 2]) / 2
+
+    if quantil is None:
+        return centros_x, np.add.reduceat(ys, inicios) / tamanhos
+
+    # Quantil de cada faixa com seleção parcial (O(n) no total), como `Series.quantile`
+    return centros_x, np.array([np.quantile(ys[inicio:fim], quantil) for inicio, fim in zip(limites[:-1], limites[1:])])
+
+
+def calcular_tendencia(x, y, motor="auto", frac=FRACAO_PADRAO):
+    """
+    Calcula a linha de tendência com o motor indicado ou escolhido pela quantidade de pontos.
+
+    Parâmetros:
+    - x (array-like): Variável explicativa.
+    - y (array-like): Variável resposta.
+    - motor (str): 'auto', 'lowess', 'lowess_rapido' ou 'faixas'.
+    - frac (float): Fração dos pontos em cada janela dos motores LOWESS.
+
+    Retorna:
+    - numpy.ndarray: Valores de x da curva.
+    - numpy.ndarray: Valores de y da curva.
+    - str: Motor utilizado.
+    """
+    if motor == "auto":
+        motor = escolher_motor(len(np.asarray(x)))
+    if motor == "lowess":
+        return (*lowess(x, y, frac), motor)
+    if motor == "lowess_rapido":
+        return (*lowess(x, y, frac, pontos=PONTOS_ANCORA, amostra_janela=AMOSTRA_JANELA), motor)
+    if motor == "faixas":
+        return (*tendencia_faixas(x, y), motor)
+    raise ValueError(f"Motor inválido: '{motor}'. Use 'auto' ou um de {MOTORES}.")
+
+
+def caminho_tendencia(coluna_x, coluna_y, motor, caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Retorna o caminho da curva de tendência guardada ao lado do CSV processado.
+
+    Parâmetros:
+    - coluna_x (str): Coluna da variável explicativa.
+    - coluna_y (str): Coluna da variável resposta.
+    - motor (str): Motor da curva ('auto' inclusive).
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - Path: Caminho do arquivo .npz da curva.
+    """
+    caminho_processado = Path(caminho_processado)
+    nome = "_".join(re.sub(r"\W+", "-", parte.strip()).lower() for parte in (coluna_x, coluna_y, motor))
+    return caminho_processado.with_name(f"{caminho_processado.stem}.tendencia_{nome}.npz")
+
+
+def obter_tendencia(coluna_x="Volume", coluna_y="Close", motor="auto",
+                    caminho_processado=carregamento.CAMINHO_PROCESSADO):
+    """
+    Lê a curva de tendência salva, recalculando-a apenas se os dados mudaram.
+
+    Parâmetros:
+    - coluna_x (str): Coluna da variável explicativa.
+    - coluna_y (str): Coluna da variável resposta.
+    - motor (str): 'auto', 'lowess', 'lowess_rapido' ou 'faixas'.
+    - caminho_processado (str | Path): Caminho do CSV processado.
+
+    Retorna:
+    - numpy.ndarray: Valores de x da curva.
+    - numpy.ndarray: Valores de y da curva.
+    - str: Motor utilizado.
+    """
+    # Garante o snapshot do carregamento, que guarda o hash usado como versão
+    if carregamento.validar_snapshot(caminho_processado) is None:
+        carregamento.carregar_dados(caminho_processado)
+    versao = carregamento.versao_dados(caminho_processado)
+
+    caminho = caminho_tendencia(coluna_x, coluna_y, motor, caminho_processado)
+    try:
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            if str(arquivo["versao"]) == versao:
+                return arquivo["x"], arquivo["y"], str(arquivo["motor"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    dados = carregamento.carregar_dados(caminho_processado)
+    curva_x, curva_y, usado = calcular_tendencia(dados[coluna_x], dados[coluna_y], motor)
+    try:
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        with open(temporario, "wb") as arquivo:
+            np.savez(arquivo, x=curva_x, y=curva_y, motor=np.array(usado), versao=np.array(versao or "", dtype=str))
+        os.replace(temporario, caminho)
+    except OSError:
+        # Sem permissão de escrita a curva continua disponível, apenas sem ser salva
+        pass
+    return curva_x, curva_y, usado
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Calcula a linha de tendência entre duas colunas.")
+    parser.add_argument("--processado", default=str(carregamento.CAMINHO_PROCESSADO), help="CSV processado.")
+    parser.add_argument("--x", default="Volume", help="Coluna da variável explicativa.")
+    parser.add_argument("--y", default="Close", help="Coluna da variável resposta.")
+    parser.add_argument("--motor", default="auto", choices=("auto", *MOTORES), help="Motor da tendência.")
+    args = parser.parse_args(argumentos)
+
+    curva_x, curva_y, motor = obter_tendencia(args.x, args.y, args.motor, args.processado)
+    print(f"✅ Tendência de {args.y} por {args.x} com o motor '{motor}' ({len(curva_x)} pontos)")
+    passo = max(1, len(curva_x) // 10)
+    for valor_x, valor_y in zip(curva_x[::passo], curva_y[::passo]):
+        print(f"  {valor_x:>16,.2f}  {valor_y:>12,.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Perfil de armazenamento compacto para dados OHLCV.
+
+Complementa o `modificar_tipo_colunas` do notebook de tratamento, que converte cada coluna
+para o tipo informado pelo chamador: aqui os tipos são escolhidos a partir dos próprios
+dados (preços em float32 quando a precisão permite, volume em inteiro sem sinal e campos
+de calendário em inteiros pequenos ou categorias), a perda de precisão é medida e a
+memória antes/depois é relatada.
+"""
+import numpy as np
+import pandas as pd
+
+COLUNAS_PRECO = ["Open", "High", "Low", "Close", "Adj Close"]
+COLUNA_VOLUME = "Volume"
+
+# Erro absoluto máximo aceito ao converter preços (centésimo de centavo)
+TOLERANCIA_PADRAO = 1e-4
+
+# Tipos compactos dos campos de calendário derivados da data
+TIPOS_CALENDARIO = {
+    "Year": "uint16",
+    "Month": "uint8",
+    "Day": "uint8",
+    "Weekday": "uint8",
+    "Week": "uint8",
+}
+
+
+class PerdaDePrecisaoError(ValueError):
+    """Erro lançado quando a conversão compacta ultrapassa a tolerância de precisão."""
+
+
+def adicionar_campos_calendario(df, coluna_data="Date", campos=("Month", "Month_Name")):
+    """
+    Acrescenta campos de calendário já em tipos compactos.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame com a coluna de datas em datetime.
+    - coluna_data (str): Nome da coluna de datas.
+    - campos (tuple): Campos desejados entre 'Year', 'Month', 'Day', 'Weekday', 'Week' e 'Month_Name'.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com os campos acrescentados.
+    """
+    datas = df[coluna_data].dt
+    calculos = {
+        "Year": lambda: datas.year,
+        "Month": lambda: datas.month,
+        "Day": lambda: datas.day,
+        "Weekday": lambda: datas.weekday,
+        "Week": lambda: datas.isocalendar().week,
+    }
+
+    for campo in campos:
+        if campo == "Month_Name":
+            # Categoria com os 12 nomes na ordem do calendário: cada linha guarda só um código
+            nomes = [pd.Timestamp(2000, mes, 1).strftime('%B') for mes in range(1, 13)]
+            df[campo] = pd.Categorical.from_codes(datas.month.to_numpy() - 1, categories=nomes, ordered=True)
+        elif campo in calculos:
+            df[campo] = calculos[campo]().to_numpy().astype(TIPOS_CALENDARIO[campo])
+        else:
+            raise ValueError(f"Campo de calendário inválido: '{campo}'")
+    return df
+
+
+def _tipo_volume(serie):
+    # Inteiro sem sinal apenas quando todos os valores são inteiros não negativos
+    valores = serie.to_numpy()
+    if serie.hasnans or len(valores) == 0:
+        return None
+    if not np.all(np.mod(valores, 1) == 0) or valores.min() < 0:
+        return None
+    return "uint32" if valores.max() <= np.iinfo("uint32").max else "uint64"
+
+
+def aplicar_perfil(df, tolerancia=TOLERANCIA_PADRAO, colunas_preco=COLUNAS_PRECO, coluna_volume=COLUNA_VOLUME):
+    """
+    Converte o DataFrame para o perfil compacto e relata a memória antes e depois.
+
+    - Preços: float32, desde que o erro absoluto máximo não ultrapasse `tolerancia`.
+    - Volume: uint32 (ou uint64, se necessário) quando os valores são inteiros não negativos.
+    - Campos de calendário conhecidos (Year, Month, Day, Weekday, Week): inteiros pequenos.
+    - Demais colunas de texto com poucos valores distintos: categoria.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame original (não é modificado).
+    - tolerancia (float): Erro absoluto máximo aceito na conversão dos preços.
+    - colunas_preco (list): Colunas de preço.
+    - coluna_volume (str): Coluna de volume.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame no perfil compacto.
+    - pandas.DataFrame: Relatório por coluna com tipos, memória (bytes) e erro máximo.
+
+    Lança:
+    - PerdaDePrecisaoError: Se algum preço perder mais precisão que a tolerância.
+    """
+    compacto = df.copy()
+    linhas_relatorio = []
+
+    for coluna in df.columns:
+        serie = df[coluna]
+        tipo_novo = None
+        erro = 0.0
+
+        if coluna in colunas_preco and pd.api.types.is_float_dtype(serie.dtype):
+            tipo_novo = "float32"
+            convertida = serie.astype(tipo_novo)
+            erro = float(np.nanmax(np.abs(convertida.to_numpy(dtype="float64") - serie.to_numpy(dtype="float64")), initial=0.0))
+            if erro > tolerancia:
+                raise PerdaDePrecisaoError(
+                    f"Coluna '{coluna}': erro de {erro:.3g} ao converter para float32 (tolerância {tolerancia:.3g})."
+                )
+        elif coluna == coluna_volume and pd.api.types.is_numeric_dtype(serie.dtype):
+            tipo_novo = _tipo_volume(serie)
+        elif coluna in TIPOS_CALENDARIO and pd.api.types.is_integer_dtype(serie.dtype):
+            tipo_novo = TIPOS_CALENDARIO[coluna]
+        elif (serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype)) and serie.nunique() <= len(serie) // 2:
+            tipo_novo = "category"
+
+        if tipo_novo is not None:
+            compacto[coluna] = serie.astype(tipo_novo)
+
+        linhas_relatorio.append({
+            'Coluna': coluna,
+            'Tipo Original': str(serie.dtype),
+            'Tipo Compacto': str(compacto[coluna].dtype),
+            'Memória Antes (bytes)': int(serie.memory_usage(deep=True, index=False)),
+            'Memória Depois (bytes)': int(compacto[coluna].memory_usage(deep=True, index=False)),
+            'Erro Máximo': erro,
+        })
+
+    relatorio = pd.DataFrame(linhas_relatorio)
+    antes = relatorio['Memória Antes (bytes)'].sum()
+    depois = relatorio['Memória Depois (bytes)'].sum()
+    total = pd.DataFrame([{
+        'Coluna': 'Total',
+        'Tipo Original': '',
+        'Tipo Compacto': '',
+        'Memória Antes (bytes)': antes,
+        'Memória Depois (bytes)': depois,
+        'Erro Máximo': relatorio['Erro Máximo'].max() if len(relatorio) else 0.0,
+    }])
+    relatorio = pd.concat([relatorio, total], ignore_index=True)
+    relatorio['Redução (%)'] = (
+        (1 - relatorio['Memória Depois (bytes)'] / relatorio['Memória Antes (bytes)'].replace(0, np.nan)) * 100
+    ).round(1)
+
+    return compacto, relatorio